@@ -13,16 +13,82 @@ required_apps = ["hrms"]
 # Document Events
 doc_events = {
     
+    "Attendance": {
+        "on_submit": "vc_app.vc_overtime.doctype_hooks.attendance.on_submit",
+        "on_cancel": "vc_app.vc_overtime.doctype_hooks.attendance.on_cancel"
+    },
+    "Employee Checkin": {
+        "after_insert": "vc_app.vc_overtime.overtime_live.on_checkin"
+    },
     "Salary Structure Assignment": {
-        "validate": "vc_app.vc_overtime.overtime_calculator.calculate_hourly_rate_on_save"
+        "validate": "vc_app.vc_overtime.overtime_calculator.calculate_hourly_rate_on_save",
+        "on_submit": "vc_app.vc_overtime.overtime_prepared.bump_config_version",
+        "on_cancel": "vc_app.vc_overtime.overtime_prepared.bump_config_version"
+    },
+    "Employee": {
+        "on_update": "vc_app.vc_overtime.overtime_prepared.bump_config_version"
+    },
+    "Holiday List": {
+        "on_update": "vc_app.vc_overtime.overtime_prepared.bump_config_version"
     },
     "Salary Slip": {
         "before_save": "vc_app.vc_overtime.doctype_hooks.salary_slip.before_save",
+        "on_submit": "vc_app.vc_overtime.doctype_hooks.salary_slip.on_submit",
+        "on_cancel": "vc_app.vc_overtime.doctype_hooks.salary_slip.on_cancel",
+    },
+    "Shift Type": {
+        "on_update": [
+            "vc_app.vc_overtime.overtime_calculator.clear_shift_window_cache",
+            "vc_app.vc_overtime.overtime_policy.clear_policy_cache",
+            "vc_app.vc_overtime.overtime_prepared.bump_config_version"
+        ],
+        "on_trash": [
+            "vc_app.vc_overtime.overtime_calculator.clear_shift_window_cache",
+            "vc_app.vc_overtime.overtime_policy.clear_policy_cache",
+            "vc_app.vc_overtime.overtime_prepared.bump_config_version"
+        ]
+    },
+    "Salary Component": {
+        "on_update": "vc_app.vc_overtime.doctype_hooks.salary_slip.clear_overtime_components_cache",
+        "on_trash": "vc_app.vc_overtime.doctype_hooks.salary_slip.clear_overtime_components_cache"
+    },
+    "HR Settings": {
+        "on_update": [
+            "vc_app.vc_overtime.overtime_logger.clear_level_cache",
+            "vc_app.vc_overtime.overtime_policy.clear_policy_cache",
+            "vc_app.vc_overtime.overtime_calculator.recompute_hourly_rates_on_settings_change",
+            "vc_app.vc_overtime.overtime_prepared.bump_config_version"
+        ]
+    },
+    "Additional Salary": {
+        "on_submit": "vc_app.vc_overtime.payroll_prefetch.clear_payroll_overtime",
+        "on_cancel": [
+            "vc_app.vc_overtime.payroll_prefetch.clear_payroll_overtime",
+            "vc_app.vc_overtime.overtime_ledger.reverse_additional_salary"
+        ]
+    },
+    "Payroll Entry": {
+        "before_submit": "vc_app.vc_overtime.doctype_hooks.payroll_entry.before_submit"
     }
 }
 
+# Scheduled Tasks
+scheduler_events = {
+    "daily": [
+        "vc_app.vc_overtime.overtime_processor.close_overtime_periods",
+        "vc_app.vc_overtime.overtime_precompute.precompute_overtime",
+        "vc_app.vc_overtime.overtime_comp_off.allocate_comp_off_daily",
+        "vc_app.vc_overtime.overtime_export.delete_old_exports"
+    ]
+}
+
+# Overtime metrics are buffered per request/job and written to Redis at the end
+after_request = ["vc_app.vc_overtime.overtime_metrics.flush"]
+after_job = ["vc_app.vc_overtime.overtime_metrics.flush"]
+
 # Installation
 after_install = "vc_app.install.after_install"
+after_migrate = "vc_app.install.after_migrate"
 
 # Fixtures for custom fields
 fixtures = [
@@ -41,6 +107,21 @@ fixtures = [
                 "HR Settings-overtime_components_section",
                 "HR Settings-weekday_overtime_component",
                 "HR Settings-holiday_overtime_component",
+                "HR Settings-consolidate_overtime_additional_salary",
+                "HR Settings-overtime_edit_cache_section",
+                "HR Settings-overtime_edit_ttl_hours",
+                "HR Settings-overtime_edit_max_per_user",
+                "HR Settings-overtime_edit_max_total",
+                "HR Settings-overtime_logging_section",
+                "HR Settings-overtime_log_levels",
+                "HR Settings-enable_overtime_instrumentation",
+                "HR Settings-overtime_slow_query_ms",
+                "HR Settings-overtime_precompute_section",
+                "HR Settings-enable_overtime_precompute",
+                "HR Settings-overtime_precompute_days",
+                "HR Settings-overtime_precompute_batch_size",
+                "HR Settings-overtime_prepared_report_days",
+                "HR Settings-overtime_report_shards",
                 
                 # ===== EMPLOYEE =====
                 "Employee-overtime_settings_section",
@@ -60,11 +141,13 @@ fixtures = [
                 # ===== ATTENDANCE =====
                 "Attendance-overtime_tracking_section",
                 "Attendance-calculated_overtime_hours",
+                "Attendance-calculated_overtime_amount",
                 "Attendance-column_break_ot1",
                 "Attendance-overtime_type",
                 "Attendance-column_break_ot2",
                 "Attendance-is_overtime_approved",
                 "Attendance-overtime_additional_salary",
+                "Attendance-comp_off_leave_allocation",
                 "Attendance-audit_section",
                 "Attendance-reset_close_time",
                 "Attendance-effective_out_time",
@@ -84,6 +167,9 @@ fixtures = [
                 "Additional Salary-comp_off_column_break",
                 "Additional Salary-comp_off_leave_allocation",
                 "Additional Salary-comp_off_leave_type",
+                "Additional Salary-overtime_lines_section",
+                "Additional Salary-is_consolidated_overtime",
+                "Additional Salary-overtime_attendance_lines",
                 
                 # ===== SHIFT TYPE (New Holiday/Sunday policies) =====
                 "Shift Type-overtime_section",
@@ -128,6 +128,122 @@ def create_overtime_custom_fields():
                 "fieldtype": "Link",
                 "options": "Salary Component",
                 "insert_after": "weekday_overtime_component"
+            },
+            {
+                "fieldname": "overtime_edit_cache_section",
+                "label": "Overtime Edit Cache",
+                "fieldtype": "Section Break",
+                "insert_after": "consolidate_overtime_additional_salary",
+                "collapsible": 1
+            },
+            {
+                "fieldname": "overtime_edit_ttl_hours",
+                "label": "Edit Expiry (Hours)",
+                "fieldtype": "Int",
+                "insert_after": "overtime_edit_cache_section",
+                "default": "24",
+                "description": "Each unapproved edit expires this many hours after it was last saved"
+            },
+            {
+                "fieldname": "overtime_edit_max_per_user",
+                "label": "Max Edits per User",
+                "fieldtype": "Int",
+                "insert_after": "overtime_edit_ttl_hours",
+                "default": "500",
+                "description": "Oldest edits are evicted once a user exceeds this"
+            },
+            {
+                "fieldname": "overtime_edit_max_total",
+                "label": "Max Edits (All Users)",
+                "fieldtype": "Int",
+                "insert_after": "overtime_edit_max_per_user",
+                "default": "20000",
+                "description": "Oldest edits of the largest caches are evicted once exceeded"
+            },
+            {
+                "fieldname": "overtime_logging_section",
+                "label": "Overtime Logging",
+                "fieldtype": "Section Break",
+                "insert_after": "overtime_edit_max_total",
+                "collapsible": 1
+            },
+            {
+                "fieldname": "overtime_log_levels",
+                "label": "Log Levels",
+                "fieldtype": "Small Text",
+                "insert_after": "overtime_logging_section",
+                "default": "*=WARNING",
+                "description": "One subsystem=LEVEL per line (edit_cache, calculator, processor, report, salary_slip; * for all). Written to logs/vc_overtime.log"
+            },
+            {
+                "fieldname": "enable_overtime_instrumentation",
+                "label": "Profile Overtime Queries",
+                "fieldtype": "Check",
+                "insert_after": "overtime_log_levels",
+                "default": "0",
+                "description": "Record query counts and database/Python time per phase for the report and approvals (shown under the report)"
+            },
+            {
+                "fieldname": "overtime_slow_query_ms",
+                "label": "Slow Query Threshold (ms)",
+                "fieldtype": "Int",
+                "insert_after": "enable_overtime_instrumentation",
+                "default": "1000",
+                "description": "Overtime queries slower than this are logged with their EXPLAIN plan (0 = off)"
+            },
+            {
+                "fieldname": "overtime_precompute_section",
+                "label": "Overtime Precompute",
+                "fieldtype": "Section Break",
+                "insert_after": "overtime_slow_query_ms",
+                "collapsible": 1
+            },
+            {
+                "fieldname": "enable_overtime_precompute",
+                "label": "Precompute Overtime Nightly",
+                "fieldtype": "Check",
+                "insert_after": "overtime_precompute_section",
+                "default": "1",
+                "description": "Calculate and store overtime for submitted attendance every night"
+            },
+            {
+                "fieldname": "overtime_precompute_days",
+                "label": "Days to Recompute",
+                "fieldtype": "Int",
+                "insert_after": "enable_overtime_precompute",
+                "default": "1",
+                "description": "1 = yesterday only"
+            },
+            {
+                "fieldname": "overtime_precompute_batch_size",
+                "label": "Batch Size",
+                "fieldtype": "Int",
+                "insert_after": "overtime_precompute_days",
+                "default": "500"
+            },
+            {
+                "fieldname": "overtime_prepared_report_days",
+                "label": "Prepare Reports Longer Than (Days)",
+                "fieldtype": "Int",
+                "insert_after": "overtime_precompute_batch_size",
+                "default": "62",
+                "description": "VC Overtime Report ranges longer than this are built in a background job and reused until the data changes (0 = off)"
+            },
+            {
+                "fieldname": "overtime_report_shards",
+                "label": "Report Shards",
+                "fieldtype": "Int",
+                "insert_after": "overtime_prepared_report_days",
+                "default": "0",
+                "description": "Split the VC Overtime Report by employee into this many parts calculated in parallel by background workers (0 or 1 = off)"
+            },
+            {
+                "fieldname": "consolidate_overtime_additional_salary",
+                "label": "Consolidate Overtime per Month",
+                "fieldtype": "Check",
+                "insert_after": "holiday_overtime_component",
+                "default": "0",
+                "description": "Accumulate approved days into one draft Additional Salary per employee, component and month; submitted when the period closes"
             }
         ],
         
@@ -226,10 +342,17 @@ def create_overtime_custom_fields():
                 "read_only": 1,
                 "precision": "2"
             },
+            {
+                "fieldname": "calculated_overtime_amount",
+                "label": "Calculated Overtime Amount",
+                "fieldtype": "Currency",
+                "insert_after": "calculated_overtime_hours",
+                "read_only": 1
+            },
             {
                 "fieldname": "column_break_ot1",
                 "fieldtype": "Column Break",
-                "insert_after": "calculated_overtime_hours"
+                "insert_after": "calculated_overtime_amount"
             },
             {
                 "fieldname": "overtime_type",
@@ -260,11 +383,20 @@ def create_overtime_custom_fields():
                 "insert_after": "is_overtime_approved",
                 "read_only": 1
             },
+            {
+                "fieldname": "comp_off_leave_allocation",
+                "label": "Comp Off Leave Allocation",
+                "fieldtype": "Link",
+                "options": "Leave Allocation",
+                "insert_after": "overtime_additional_salary",
+                "read_only": 1,
+                "no_copy": 1
+            },
             {
                 "fieldname": "audit_section",
                 "label": "Time Audit",
                 "fieldtype": "Section Break",
-                "insert_after": "overtime_additional_salary",
+                "insert_after": "comp_off_leave_allocation",
                 "collapsible": 1
             },
             {
@@ -401,6 +533,30 @@ def create_overtime_custom_fields():
                 "insert_after": "comp_off_leave_allocation",
                 "depends_on": "eval:doc.comp_off_granted==1",
                 "read_only": 1
+            },
+            {
+                "fieldname": "overtime_lines_section",
+                "label": "Consolidated Overtime",
+                "fieldtype": "Section Break",
+                "insert_after": "comp_off_leave_type",
+                "depends_on": "eval:doc.is_consolidated_overtime==1",
+                "collapsible": 1
+            },
+            {
+                "fieldname": "is_consolidated_overtime",
+                "label": "Is Consolidated Overtime",
+                "fieldtype": "Check",
+                "insert_after": "overtime_lines_section",
+                "read_only": 1,
+                "default": "0"
+            },
+            {
+                "fieldname": "overtime_attendance_lines",
+                "label": "Overtime Attendance Lines",
+                "fieldtype": "Table",
+                "options": "Overtime Attendance Line",
+                "insert_after": "is_consolidated_overtime",
+                "read_only": 1
             }
         ],
         
@@ -664,6 +820,13 @@ def create_overtime_custom_fields():
     print("  - Salary Component: Overtime multipliers")
 
 
+def after_migrate():
+    """
+    Keep custom fields in sync on existing sites (create_custom_fields is idempotent)
+    """
+    create_overtime_custom_fields()
+
+
 def create_salary_components():
     """
     Create overtime salary components
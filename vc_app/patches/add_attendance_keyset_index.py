@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+    # Keyset pages of the streaming overtime export (overtime_export.iter_attendance_chunks)
+    frappe.db.add_index("Attendance", ["attendance_date", "employee", "name"], "attendance_date_employee_name_index")
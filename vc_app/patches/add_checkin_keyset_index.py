@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+    # Keyset pages of checkin pairing (overtime checkin_pairing.stream_checkins)
+    frappe.db.add_index("Employee Checkin", ["employee", "time", "name"], "employee_time_name_index")
@@ -0,0 +1,187 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/benchmarks/data.py
+# Deterministic synthetic data for the overtime benchmarks
+# =====================================================================
+#
+# Everything is written with frappe.db.bulk_insert (no document hooks)
+# and named with the BENCH- prefix so it can be removed again with
+# delete_benchmark_data(). Use a scratch site: a benchmark company with
+# its own holiday list is created next to the real data.
+
+import random
+from datetime import datetime, time, timedelta
+
+import frappe
+from frappe.utils import add_days, getdate, now
+
+from vc_app.vc_overtime.overtime_calculator import clear_shift_window_cache
+from vc_app.vc_overtime.overtime_policy import clear_policy_cache
+
+PREFIX = "BENCH-"
+COMPANY = "VC Overtime Benchmark"
+HOLIDAY_LIST = PREFIX + "Holidays"
+SHIFT_TYPES = {
+    PREFIX + "Day": (time(8, 0), time(17, 0), 15),
+    PREFIX + "Night": (time(22, 0), time(6, 0), 30)
+}
+DEPARTMENTS = ["Production", "Logistics", "Maintenance", "Quality", "Stores"]
+
+
+def _base(name, docstatus=0):
+    timestamp = now()
+    return [name, timestamp, timestamp, "Administrator", "Administrator", docstatus]
+
+
+BASE_FIELDS = ["name", "creation", "modified", "owner", "modified_by", "docstatus"]
+
+
+def generate_benchmark_data(employees=100, days=30, start_date="2025-01-01", seed=42):
+    """
+    Create `employees` employees with shift and salary structure
+    assignments, a holiday list, and attendance plus IN/OUT checkins
+    for `days` days.
+
+    Returns:
+        dict: company, from_date, to_date and row counts
+    """
+    rng = random.Random(seed)
+    start_date = getdate(start_date)
+    end_date = add_days(start_date, days - 1)
+
+    _ensure_company_and_shifts(start_date, end_date)
+
+    employee_rows, shift_rows, ssa_rows = [], [], []
+    attendance_rows, checkin_rows = [], []
+
+    shift_names = list(SHIFT_TYPES)
+    holidays = {getdate(d) for d in frappe.get_all(
+        "Holiday", filters={"parent": HOLIDAY_LIST}, pluck="holiday_date"
+    )}
+
+    for index in range(employees):
+        employee = f"{PREFIX}EMP-{index:05d}"
+        # Every fifth employee works nights
+        shift_type = shift_names[1] if index % 5 == 4 else shift_names[0]
+        base = rng.randrange(30000, 150000, 500)
+
+        employee_rows.append([*_base(employee),
+            f"Bench Employee {index:05d}", f"Bench {index:05d}", "Active", COMPANY,
+            rng.choice(DEPARTMENTS), 1 if rng.random() < 0.85 else 0, shift_type,
+            "Male" if index % 2 else "Female", "1990-01-01", "2020-01-01"
+        ])
+        shift_rows.append([*_base(f"{PREFIX}SA-{index:05d}", 1),
+            employee, shift_type, COMPANY, start_date, "Active"
+        ])
+        ssa_rows.append([*_base(f"{PREFIX}SSA-{index:05d}", 1),
+            employee, f"{PREFIX}Structure", COMPANY, start_date, base, round(base / 225, 2)
+        ])
+
+        shift_start, _shift_end, _allowance = SHIFT_TYPES[shift_type]
+        for day in range(days):
+            date = add_days(start_date, day)
+            if date in holidays and rng.random() < 0.7:
+                continue
+            if rng.random() < 0.08:
+                continue
+
+            in_time = datetime.combine(date, shift_start) + timedelta(minutes=rng.randint(-20, 20))
+            worked_minutes = rng.choice([480, 495, 510, 540, 570, 600, 660, 720]) + rng.randint(0, 30)
+            out_time = in_time + timedelta(minutes=worked_minutes)
+
+            attendance = f"{PREFIX}ATT-{index:05d}-{day:03d}"
+            attendance_rows.append([*_base(attendance, 1),
+                employee, f"Bench Employee {index:05d}", COMPANY, date, "Present",
+                shift_type, in_time, out_time
+            ])
+            checkin_rows.append([*_base(f"{PREFIX}CHK-{index:05d}-{day:03d}-I"),
+                employee, f"Bench Employee {index:05d}", "IN", in_time, shift_type, attendance
+            ])
+            checkin_rows.append([*_base(f"{PREFIX}CHK-{index:05d}-{day:03d}-O"),
+                employee, f"Bench Employee {index:05d}", "OUT", out_time, shift_type, attendance
+            ])
+
+    frappe.db.bulk_insert("Employee", [*BASE_FIELDS,
+        "employee_name", "first_name", "status", "company", "department",
+        "eligible_for_overtime", "default_shift", "gender", "date_of_birth", "date_of_joining"
+    ], employee_rows)
+    frappe.db.bulk_insert("Shift Assignment", [*BASE_FIELDS,
+        "employee", "shift_type", "company", "start_date", "status"
+    ], shift_rows)
+    frappe.db.bulk_insert("Salary Structure Assignment", [*BASE_FIELDS,
+        "employee", "salary_structure", "company", "from_date", "base", "hourly_rate"
+    ], ssa_rows)
+    frappe.db.bulk_insert("Attendance", [*BASE_FIELDS,
+        "employee", "employee_name", "company", "attendance_date", "status",
+        "shift", "in_time", "out_time"
+    ], attendance_rows)
+    frappe.db.bulk_insert("Employee Checkin", [*BASE_FIELDS,
+        "employee", "employee_name", "log_type", "time", "shift", "attendance"
+    ], checkin_rows)
+    frappe.db.commit()
+
+    return {
+        "company": COMPANY,
+        "from_date": start_date,
+        "to_date": end_date,
+        "employees": len(employee_rows),
+        "attendance": len(attendance_rows),
+        "checkins": len(checkin_rows)
+    }
+
+
+def _ensure_company_and_shifts(start_date, end_date):
+    if not frappe.db.exists("Holiday List", HOLIDAY_LIST):
+        frappe.db.bulk_insert("Holiday List", [*BASE_FIELDS,
+            "holiday_list_name", "from_date", "to_date"
+        ], [[*_base(HOLIDAY_LIST), HOLIDAY_LIST, start_date, add_days(start_date, 364)]])
+
+        # Every 10th day is a public holiday
+        frappe.db.bulk_insert("Holiday", [*BASE_FIELDS,
+            "parent", "parenttype", "parentfield", "holiday_date", "description", "idx"
+        ], [
+            [*_base(f"{PREFIX}HOL-{day:03d}"),
+                HOLIDAY_LIST, "Holiday List", "holidays", add_days(start_date, day), "Bench holiday", day // 10 + 1
+            ]
+            for day in range(9, 365, 10)
+        ])
+
+    if not frappe.db.exists("Company", COMPANY):
+        frappe.db.bulk_insert("Company", [*BASE_FIELDS,
+            "company_name", "abbr", "default_currency", "country", "default_holiday_list"
+        ], [[*_base(COMPANY), COMPANY, "VCOB", "KES", "Kenya", HOLIDAY_LIST]])
+
+    for name, (start, end, allowance) in SHIFT_TYPES.items():
+        if not frappe.db.exists("Shift Type", name):
+            frappe.db.bulk_insert("Shift Type", [*BASE_FIELDS,
+                "start_time", "end_time", "overtime_allowance_minutes",
+                "holiday_overtime_calculation_type", "sunday_overtime_calculation_type"
+            ], [[*_base(name), start, end, allowance, "All Hours as Overtime", "Extra Hours Only"]])
+
+    clear_shift_window_cache()
+    clear_policy_cache()
+
+
+def delete_benchmark_data():
+    """
+    Remove everything generate_benchmark_data() and the benchmarked
+    actions (approvals, ledger, rollups) created.
+    """
+    like = PREFIX + "%"
+    for doctype, field in (
+        ("Employee Checkin", "employee"),
+        ("Attendance", "employee"),
+        ("Overtime Ledger Entry", "employee"),
+        ("Overtime Monthly Rollup", "employee"),
+        ("Shift Assignment", "employee"),
+        ("Salary Structure Assignment", "employee"),
+        ("Employee", "name")
+    ):
+        frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE `{field}` LIKE %s", like)
+
+    frappe.db.sql("""
+        DELETE line FROM `tabOvertime Attendance Line` line
+        INNER JOIN `tabAdditional Salary` a ON a.name = line.parent
+        WHERE a.employee LIKE %s
+    """, like)
+    frappe.db.sql("DELETE FROM `tabAdditional Salary` WHERE employee LIKE %s", like)
+    frappe.db.commit()
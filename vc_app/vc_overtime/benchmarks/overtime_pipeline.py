@@ -0,0 +1,186 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/benchmarks/overtime_pipeline.py
+# End-to-end overtime timings on synthetic data, written as JSON
+# =====================================================================
+#
+# Run (scratch site only - data is generated, approved and deleted):
+#   bench --site <site> execute vc_app.vc_overtime.benchmarks.overtime_pipeline.run \
+#       --kwargs "{'sizes': [100, 1000, 10000], 'days': 30}"
+#
+# For each size the BENCH- data is regenerated with the same seed, then
+# the report, approve/reject, get_overtime_details and the edit-cache
+# endpoints are timed. Compare the JSON files of two versions to spot
+# regressions.
+
+import random
+import time
+
+import frappe
+from frappe.utils import now
+
+from vc_app import __version__
+from vc_app.vc_overtime import overtime_edit_cache
+from vc_app.vc_overtime.benchmarks.data import delete_benchmark_data, generate_benchmark_data
+from vc_app.vc_overtime.overtime_processor import get_overtime_details, process_selected_overtime
+from vc_app.vc_overtime.report.vc_overtime_report.vc_overtime_report import execute
+
+DEFAULT_SIZES = (100, 1000, 10000)
+
+# Report modes that would change what execute() returns or where it runs;
+# they are switched off for the run and restored afterwards
+BENCHMARK_SETTINGS = {
+    "enable_overtime_instrumentation": 0,
+    "overtime_prepared_report_days": 0,
+    "overtime_report_shards": 0
+}
+
+
+def run(sizes=DEFAULT_SIZES, days=30, seed=42, sample=200, output=None, keep_data=False):
+    """
+    Args:
+        sizes: employee counts to benchmark
+        days: attendance days per employee
+        seed: generator seed (same seed, same data)
+        sample: rows used for approve, reject, details and edit-cache timings
+        output: JSON file path (default: <site>/vc_overtime_benchmark.json)
+        keep_data: leave the data of the last size in place
+
+    Returns:
+        dict: benchmark document as written to `output`
+    """
+    frappe.flags.mute_messages = True
+    saved_settings = _override_settings(BENCHMARK_SETTINGS)
+
+    document = {
+        "benchmark": "vc_overtime_pipeline",
+        "app_version": __version__,
+        "created": now(),
+        "seed": seed,
+        "days": days,
+        "sample": sample,
+        "results": []
+    }
+
+    try:
+        for index, size in enumerate(sizes):
+            delete_benchmark_data()
+            document["results"].append(run_size(size, days, seed, sample))
+
+            if not keep_data or index < len(sizes) - 1:
+                delete_benchmark_data()
+    finally:
+        frappe.flags.mute_messages = False
+        _override_settings(saved_settings)
+
+    output = output or frappe.get_site_path("vc_overtime_benchmark.json")
+    with open(output, "w") as f:
+        f.write(frappe.as_json(document))
+
+    print(frappe.as_json(document))
+    print(f"Written to {output}")
+    return document
+
+
+def run_size(employees, days, seed, sample):
+    rng = random.Random(seed)
+    result = {"employees": employees, "timings_ms": {}, "errors": {}}
+    timings = result["timings_ms"]
+
+    started = time.perf_counter()
+    generated = generate_benchmark_data(employees=employees, days=days, seed=seed)
+    timings["generate"] = _ms(started)
+    result["attendance"] = generated["attendance"]
+    result["checkins"] = generated["checkins"]
+
+    filters = frappe._dict(
+        company=generated["company"],
+        from_date=generated["from_date"],
+        to_date=generated["to_date"]
+    )
+
+    started = time.perf_counter()
+    data = execute(filters)[1]
+    timings["report_execute"] = _ms(started)
+    result["report_rows"] = len(data)
+
+    eligible = [row for row in data if row.get("is_eligible")]
+    rng.shuffle(eligible)
+    approve_rows = eligible[:sample]
+    reject_rows = eligible[sample:sample * 2]
+    details_rows = [row["attendance"] for row in data[:sample]]
+
+    started = time.perf_counter()
+    for attendance in details_rows:
+        get_overtime_details(attendance)
+    timings["get_overtime_details_each"] = _per_call(started, len(details_rows))
+
+    _time_edit_cache(timings, [row["attendance"] for row in approve_rows], rng)
+
+    for action, rows in (("approve", approve_rows), ("reject", reject_rows)):
+        if not rows:
+            continue
+        started = time.perf_counter()
+        outcome = process_selected_overtime([{
+            "attendance": row["attendance"],
+            "approved_overtime_hours": row["approved_overtime_hours"],
+            "has_custom_hours": False
+        } for row in rows], action=action)
+        timings[f"process_{action}"] = _ms(started)
+        timings[f"process_{action}_each"] = _per_call(started, len(rows))
+        if outcome["errors"]:
+            result["errors"][action] = len(outcome["errors"])
+
+    started = time.perf_counter()
+    execute(filters)
+    timings["report_execute_after_processing"] = _ms(started)
+
+    return result
+
+
+def _override_settings(values):
+    """
+    Set HR Settings values and return the previous ones
+    """
+    previous = {
+        field: frappe.db.get_single_value("HR Settings", field) for field in values
+    }
+    for field, value in values.items():
+        frappe.db.set_single_value("HR Settings", field, value)
+    frappe.local.vc_overtime_instrumentation = None
+    return previous
+
+
+def _time_edit_cache(timings, attendance_list, rng):
+    overtime_edit_cache.clear_all_edits()
+
+    started = time.perf_counter()
+    for attendance in attendance_list:
+        overtime_edit_cache.save_edit(attendance, round(rng.uniform(0.5, 4), 2))
+    timings["edit_cache_save_each"] = _per_call(started, len(attendance_list))
+
+    started = time.perf_counter()
+    overtime_edit_cache.get_edits()
+    timings["edit_cache_get_edits"] = _ms(started)
+
+    started = time.perf_counter()
+    for attendance in attendance_list:
+        overtime_edit_cache.get_edit(attendance)
+    timings["edit_cache_get_each"] = _per_call(started, len(attendance_list))
+
+    half = attendance_list[:len(attendance_list) // 2]
+    started = time.perf_counter()
+    for attendance in half:
+        overtime_edit_cache.delete_edit(attendance)
+    timings["edit_cache_delete_each"] = _per_call(started, len(half))
+
+    started = time.perf_counter()
+    overtime_edit_cache.clear_all_edits()
+    timings["edit_cache_clear_all"] = _ms(started)
+
+
+def _ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _per_call(started, calls):
+    return round((time.perf_counter() - started) * 1000 / calls, 3) if calls else 0
@@ -0,0 +1,91 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/benchmarks/salary_slip_hooks.py
+# Payroll-scale timing of the Salary Slip hooks (in memory, no inserts)
+# =====================================================================
+#
+# Run:
+#   bench --site <site> execute vc_app.vc_overtime.benchmarks.salary_slip_hooks.run \
+#       --kwargs "{'slips': 4000}"
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import frappe
+
+from vc_app.vc_overtime.doctype_hooks.salary_slip import aggregate_salary_details, on_submit
+from vc_app.vc_overtime.overtime_logger import get_level
+
+COMPONENTS = ["Basic", "House Allowance", "Transport Allowance", "Commission"]
+OVERTIME_COMPONENTS = ["Overtime Pay - Weekday", "Overtime Pay - Holiday"]
+
+
+def make_slip(index, overtime_days, rng):
+    """In-memory slip: fixed components plus one row per overtime Additional Salary"""
+    earnings = [
+        frappe._dict(salary_component=c, amount=rng.uniform(1000, 50000), additional_amount=0,
+            default_amount=0, year_to_date=0, additional_salary=None, idx=i)
+        for i, c in enumerate(COMPONENTS, 1)
+    ]
+    for day in range(overtime_days):
+        earnings.append(frappe._dict(
+            salary_component=rng.choice(OVERTIME_COMPONENTS),
+            amount=rng.uniform(200, 4000), additional_amount=0, default_amount=0,
+            year_to_date=0, additional_salary=f"HR-ADS-{index:05d}-{day:02d}", idx=len(earnings) + 1
+        ))
+    return frappe._dict(name=f"BENCH-SLIP-{index:05d}", earnings=earnings)
+
+
+@contextmanager
+def subsystem_level(subsystem, level):
+    """Override a subsystem's log level for this request only (HR Settings untouched)"""
+    get_level(subsystem)
+    levels = frappe.local.vc_overtime_log_levels
+    frappe.local.vc_overtime_log_levels = dict(levels, **{subsystem: level})
+    try:
+        yield
+    finally:
+        frappe.local.vc_overtime_log_levels = levels
+
+
+def run(slips=4000, overtime_days=(0, 25), seed=42):
+    """
+    Time aggregate_salary_details and on_submit over `slips` slips, each with
+    a random number of overtime rows in the `overtime_days` range.
+
+    Returns:
+        dict: timings in milliseconds
+    """
+    rng = random.Random(seed)
+    docs = [make_slip(i, rng.randint(*overtime_days), rng) for i in range(slips)]
+    no_duplicates = [make_slip(i, 0, rng) for i in range(slips)]
+
+    results = {"slips": slips}
+
+    start = time.perf_counter()
+    for doc in no_duplicates:
+        aggregate_salary_details(doc.earnings, "Earnings")
+    results["aggregate_no_duplicates_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    start = time.perf_counter()
+    for doc in docs:
+        doc.earnings = aggregate_salary_details(doc.earnings, "Earnings")
+    results["aggregate_with_overtime_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    # The ledger UPDATE is one indexed statement per slip and would time the
+    # database; the in-memory slips are not stored, so it is left out.
+    # on_submit returns before the overtime summary below INFO, so salary_slip
+    # is raised to INFO to time the path that does the work
+    with (
+        patch("vc_app.vc_overtime.doctype_hooks.salary_slip.link_salary_slip"),
+        subsystem_level("salary_slip", logging.INFO),
+    ):
+        start = time.perf_counter()
+        for doc in docs:
+            on_submit(doc)
+        results["on_submit_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    print(frappe.as_json(results))
+    return results
@@ -0,0 +1,208 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/checkin_pairing.py
+# Bulk checkin-to-worked-hours pairing (multiple IN/OUT segments per day)
+# =====================================================================
+#
+# Streams `tabEmployee Checkin` for a date range ordered by
+# (employee, time) in keyset-paginated chunks, pairs IN/OUT logs in one
+# linear pass, merges overlapping segments and emits one worked-hours
+# figure per employee and work day. Only the current chunk and the
+# current work day are held in memory, so the range size does not
+# matter. The keyset predicate is written out (not as a row comparison)
+# so MariaDB can seek the (employee, time, name) index added by
+# vc_app.patches.add_checkin_keyset_index.
+#
+# Rules:
+#   - A segment belongs to the work day of the first IN of its continuous
+#     sequence, so a night shift (IN 22:00, OUT 06:00) is counted whole on
+#     the day it started, also when a break after midnight splits it.
+#     Segments continue a sequence when they start within MAX_BREAK of the
+#     previous one's end and the sequence spans at most MAX_SEGMENT.
+#   - Repeated INs keep the earliest; an OUT without an open IN extends
+#     the previous segment (double punch) if it is within MAX_SEGMENT.
+#   - Logs without log_type alternate IN/OUT.
+#   - Segments longer than MAX_SEGMENT are dropped as unpaired.
+
+from datetime import timedelta
+
+import frappe
+from frappe.utils import add_days, flt, get_datetime, getdate
+
+CHUNK_SIZE = 50000
+MAX_SEGMENT = timedelta(hours=20)
+MAX_BREAK = timedelta(hours=4)
+
+
+def stream_checkins(from_date, to_date, employees=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield (employee, time, log_type) ordered by (employee, time).
+    Checkins of the day after to_date are included to close night shifts.
+    """
+    start = get_datetime(getdate(from_date))
+    end = get_datetime(add_days(getdate(to_date), 2))
+
+    conditions = ""
+    values = {"start": start, "end": end, "limit": chunk_size}
+    if employees:
+        conditions = "AND employee IN %(employees)s"
+        values["employees"] = tuple(employees)
+
+    last_employee, last_time, last_name = "", start, ""
+    while True:
+        values.update(last_employee=last_employee, last_time=last_time, last_name=last_name)
+        rows = frappe.db.sql(f"""
+            SELECT name, employee, time, log_type
+            FROM `tabEmployee Checkin`
+            WHERE time >= %(start)s
+                AND time < %(end)s
+                AND (employee > %(last_employee)s OR (employee = %(last_employee)s
+                    AND (time > %(last_time)s OR (time = %(last_time)s AND name > %(last_name)s))))
+                {conditions}
+            ORDER BY employee, time, name
+            LIMIT %(limit)s
+        """, values, as_list=True)
+
+        for _name, employee, time, log_type in rows:
+            yield employee, time, log_type
+
+        if len(rows) < chunk_size:
+            return
+        last_name, last_employee, last_time = rows[-1][0], rows[-1][1], rows[-1][2]
+
+
+def pair_checkins(logs, from_date=None, to_date=None):
+    """
+    Pair an (employee, time)-ordered log stream into worked time per day.
+
+    Yields:
+        dict: employee, work_date, first_in, last_out, worked_seconds,
+              worked_hours, segments, unpaired
+    """
+    from_date = getdate(from_date) if from_date else None
+    to_date = getdate(to_date) if to_date else None
+
+    employee = None
+    open_in = None
+    expect_out = False
+    day = None
+
+    for log_employee, time, log_type in logs:
+        if log_employee != employee:
+            if day:
+                yield from _emit(day, from_date, to_date)
+            employee, open_in, expect_out, day = log_employee, None, False, None
+
+        is_out = log_type == "OUT" if log_type else expect_out
+
+        if not is_out:
+            # Repeated IN keeps the earliest
+            if open_in is None:
+                open_in = time
+            expect_out = True
+            continue
+
+        expect_out = False
+        if open_in is not None:
+            segment_start, open_in = open_in, None
+            if time - segment_start > MAX_SEGMENT:
+                if day:
+                    day["unpaired"] += 1
+                continue
+
+            work_date = _work_date(day, segment_start, time)
+            if day is None or day["work_date"] != work_date:
+                if day:
+                    yield from _emit(day, from_date, to_date)
+                day = _new_day(employee, work_date)
+            _add_segment(day, segment_start, time)
+
+        elif day and day["segments"] and time - day["segments"][-1][0] <= MAX_SEGMENT:
+            # OUT without an open IN: double punch extends the last segment
+            last_start, last_end = day["segments"][-1]
+            day["segments"][-1] = (last_start, max(last_end, time))
+        elif day:
+            day["unpaired"] += 1
+
+    if day:
+        yield from _emit(day, from_date, to_date)
+
+
+def _work_date(day, start, end):
+    """Work day of the current sequence when the segment continues it"""
+    if (
+        day
+        and day["segments"]
+        and start - day["segments"][-1][1] <= MAX_BREAK
+        and end - day["segments"][0][0] <= MAX_SEGMENT
+    ):
+        return day["work_date"]
+    return start.date()
+
+
+def _new_day(employee, work_date):
+    return {"employee": employee, "work_date": work_date, "segments": [], "unpaired": 0}
+
+
+def _add_segment(day, start, end):
+    """Append a segment, merging it into the previous one when they overlap"""
+    segments = day["segments"]
+    if segments and start <= segments[-1][1]:
+        last_start, last_end = segments[-1]
+        segments[-1] = (last_start, max(last_end, end))
+    else:
+        segments.append((start, end))
+
+
+def _emit(day, from_date, to_date):
+    if not day["segments"]:
+        return
+    if (from_date and day["work_date"] < from_date) or (to_date and day["work_date"] > to_date):
+        return
+
+    worked_seconds = sum((end - start).total_seconds() for start, end in day["segments"])
+    yield {
+        "employee": day["employee"],
+        "work_date": day["work_date"],
+        "first_in": day["segments"][0][0],
+        "last_out": day["segments"][-1][1],
+        "worked_seconds": int(worked_seconds),
+        "worked_hours": flt(worked_seconds / 3600, 2),
+        "segments": len(day["segments"]),
+        "unpaired": day["unpaired"]
+    }
+
+
+def get_worked_hours(from_date, to_date, employees=None):
+    """
+    Worked-hours figures for a date range (generator, bounded memory)
+    """
+    return pair_checkins(stream_checkins(from_date, to_date, employees), from_date, to_date)
+
+
+def calculate_overtime_from_checkins(from_date, to_date, company, employees=None):
+    """
+    Feed paired worked hours to the calculator.
+
+    Yields:
+        tuple: (worked-hours dict, overtime calculation dict)
+    """
+    from vc_app.vc_overtime.overtime_calculator import calculate_overtime_for_attendance
+
+    employee_filter = {"company": company}
+    if employees:
+        employee_filter["name"] = ["in", employees]
+    in_company = set(frappe.get_all("Employee", filters=employee_filter, pluck="name"))
+
+    for worked in get_worked_hours(from_date, to_date, employees):
+        if worked["employee"] not in in_company:
+            continue
+
+        ot_calc = calculate_overtime_for_attendance({
+            "employee": worked["employee"],
+            "attendance_date": worked["work_date"],
+            "in_time": worked["first_in"],
+            "out_time": worked["last_out"],
+            "worked_hours": worked["worked_hours"],
+            "company": company
+        })
+        yield worked, ot_calc
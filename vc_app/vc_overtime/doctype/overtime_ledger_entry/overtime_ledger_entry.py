@@ -0,0 +1,15 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class OvertimeLedgerEntry(Document):
+    pass
+
+
+def on_doctype_update():
+    # Range scans per employee over time, and lookups by payroll period
+    frappe.db.add_index("Overtime Ledger Entry", ["employee", "attendance_date"])
+    frappe.db.add_index("Overtime Ledger Entry", ["employee", "payroll_date"])
@@ -0,0 +1,14 @@
+# Copyright (c) 2025, Your Company and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class OvertimeMonthlyRollup(Document):
+    pass
+
+
+def on_doctype_update():
+    frappe.db.add_index("Overtime Monthly Rollup", ["company", "month"])
+    frappe.db.add_index("Overtime Monthly Rollup", ["department", "month"])
@@ -0,0 +1,41 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/doctype_hooks/attendance.py
+# Server-side hooks on Attendance for overtime rollups
+# =====================================================================
+
+import frappe
+
+from vc_app.vc_overtime.overtime_calculator import calculate_overtime_for_attendance
+from vc_app.vc_overtime.overtime_rollup import add_pending_delta, apply_rollup_deltas
+
+
+def on_submit(doc, method=None):
+    """
+    Calculate overtime once, store it on the Attendance and count it as
+    pending in the monthly rollup.
+    """
+    if doc.status != "Present" or not doc.in_time or not doc.out_time:
+        return
+
+    ot_calc = calculate_overtime_for_attendance(doc)
+    if ot_calc['overtime_hours'] <= 0:
+        return
+
+    doc.db_set({
+        "calculated_overtime_hours": ot_calc['overtime_hours'],
+        "calculated_overtime_amount": ot_calc['overtime_amount'],
+        "overtime_type": ot_calc['overtime_type']
+    }, update_modified=False)
+
+    deltas = {}
+    add_pending_delta(deltas, doc.as_dict())
+    apply_rollup_deltas(deltas)
+
+
+def on_cancel(doc, method=None):
+    """
+    Remove the attendance's pending overtime from the rollup
+    """
+    deltas = {}
+    add_pending_delta(deltas, doc.as_dict(), sign=-1)
+    apply_rollup_deltas(deltas)
@@ -0,0 +1,34 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/doctype_hooks/payroll_entry.py
+# Server-side hooks on Payroll Entry for overtime
+# =====================================================================
+
+import frappe
+from frappe import _
+
+from vc_app.vc_overtime.overtime_processor import submit_consolidated_overtime
+from vc_app.vc_overtime.payroll_prefetch import prefetch_payroll_overtime
+
+
+def before_submit(doc, method=None):
+    """
+    Close the overtime period before salary slips are created.
+    Consolidated overtime drafts with attendance up to the period end are
+    fitted to the payroll period (which need not be a calendar month) and
+    submitted so the slips pick them up, then the period's overtime totals are
+    prefetched for the slips built in this request.
+    """
+    results = submit_consolidated_overtime(
+        to_date=doc.end_date,
+        from_date=doc.start_date,
+        company=doc.company
+    )
+
+    if results["submitted"]:
+        frappe.msgprint(
+            _("Submitted {0} consolidated overtime Additional Salaries").format(results["submitted"]),
+            alert=True,
+            indicator="blue"
+        )
+
+    prefetch_payroll_overtime(doc.company, doc.start_date, doc.end_date)
@@ -3,10 +3,18 @@
 # Server-side hook to aggregate duplicate salary components in Salary Slip
 # =====================================================================
 
+import logging
+
 import frappe
 from frappe import _
 from frappe.utils import flt
 
+from vc_app.vc_overtime.overtime_ledger import link_salary_slip, unlink_salary_slip
+from vc_app.vc_overtime.overtime_logger import get_logger
+from vc_app.vc_overtime.payroll_prefetch import get_payroll_overtime
+
+logger = get_logger("salary_slip")
+
 def before_save(doc, method=None):
     """
     Aggregate duplicate salary components in earnings and deductions.
@@ -23,6 +31,11 @@ def before_save(doc, method=None):
         # Don't modify submitted documents
         return
     
+    # Slips of a Payroll Entry share one prefetched map of overtime totals
+    if doc.get("payroll_entry") and doc.earnings:
+        totals = get_payroll_overtime(doc.company, doc.start_date, doc.end_date)
+        apply_prefetched_overtime(doc, totals.get(doc.employee))
+
     # Aggregate earnings
     if doc.earnings:
         original_count = len(doc.earnings)
@@ -54,6 +67,77 @@ def before_save(doc, method=None):
             )
 
 
+def apply_prefetched_overtime(doc, employee_totals):
+    """
+    Fold the overtime earnings HRMS pulled for this slip into one row per
+    component and reference every Additional Salary of the period on it.
+    The prefetched totals are a cross-check: the amounts stay HRMS's own.
+
+    Args:
+        doc: Salary Slip
+        employee_totals: {salary_component: {"amount", "additional_salaries"}}
+                         for this employee (see payroll_prefetch)
+    """
+    if not employee_totals:
+        return
+
+    kept = {}
+    earnings = []
+
+    for row in doc.earnings:
+        component = row.salary_component
+        if component not in employee_totals:
+            earnings.append(row)
+            continue
+
+        amount = flt(row.amount, 2)
+        if component in kept:
+            first = kept[component]
+            first['amount'] += amount
+            first['additional_amount'] += flt(row.additional_amount, 2)
+            first['default_amount'] += flt(row.default_amount, 2)
+            first['year_to_date'] += flt(row.year_to_date, 2)
+            continue
+
+        kept[component] = {
+            'row': row,
+            'amount': amount,
+            'additional_amount': flt(row.additional_amount, 2),
+            'default_amount': flt(row.default_amount, 2),
+            'year_to_date': flt(row.year_to_date, 2)
+        }
+        earnings.append(row)
+
+    if not kept:
+        return
+
+    for component, data in kept.items():
+        row = data['row']
+        total = employee_totals[component]
+
+        row.amount = flt(data['amount'], 2)
+        row.additional_amount = flt(data['additional_amount'], 2)
+        row.default_amount = flt(data['default_amount'], 2)
+        row.year_to_date = flt(data['year_to_date'], 2)
+
+        if abs(total['amount'] - row.amount) > 0.01:
+            # Slip and prefetch disagree (e.g. Additional Salary submitted mid-run);
+            # keep the slip's own figures
+            logger.warning(
+                "Salary Slip %s: %s rows total %s, payroll prefetch %s",
+                doc.name, component, row.amount, total['amount']
+            )
+            continue
+
+        if hasattr(row, 'additional_salary') and len(total['additional_salaries']) > 1:
+            row.additional_salary = ", ".join(total['additional_salaries'])
+
+    for idx, row in enumerate(earnings, 1):
+        row.idx = idx
+
+    doc.earnings = earnings
+
+
 def aggregate_salary_details(details, detail_type=""):
     """
     Aggregate duplicate salary components while preserving all data.
@@ -63,78 +147,97 @@ def aggregate_salary_details(details, detail_type=""):
         detail_type: "Earnings" or "Deductions" (for logging)
     
     Returns:
-        List of aggregated Salary Detail rows
+        List of aggregated Salary Detail rows (the original list, untouched,
+        when no component repeats)
     """
     if not details or len(details) <= 1:
         return details
     
-    # Group by salary component
+    # Fast path: single pass to find repeated components
+    seen = set()
+    duplicated = set()
+    for detail in details:
+        component = detail.salary_component
+        if component in seen:
+            duplicated.add(component)
+        else:
+            seen.add(component)
+
+    if not duplicated:
+        return details
+
+    has_reference = hasattr(details[0], 'additional_salary')
+
+    # Group repeated components only; unique rows pass through as they are
     component_map = {}
+    aggregated = []
     
     for detail in details:
         component = detail.salary_component
         
-        if component not in component_map:
+        if component not in duplicated:
+            aggregated.append(detail)
+            continue
+
+        data = component_map.get(component)
+        if data is None:
             # First occurrence - initialize
-            component_map[component] = {
+            data = component_map[component] = {
                 'detail': detail,
                 'additional_salaries': [],
-                'amount': flt(detail.amount, 2),
-                'additional_amount': flt(detail.additional_amount, 2),
-                'default_amount': flt(detail.default_amount, 2),
-                'year_to_date': flt(detail.year_to_date, 2),
-                'count': 1,
-                'first_idx': detail.idx
+                'amount': 0.0,
+                'additional_amount': 0.0,
+                'default_amount': 0.0,
+                'year_to_date': 0.0
             }
-            
-            # Track additional salary reference
-            if hasattr(detail, 'additional_salary') and detail.additional_salary:
-                component_map[component]['additional_salaries'].append(detail.additional_salary)
-        else:
-            # Duplicate found - aggregate amounts
-            component_map[component]['amount'] += flt(detail.amount, 2)
-            component_map[component]['additional_amount'] += flt(detail.additional_amount, 2)
-            component_map[component]['default_amount'] += flt(detail.default_amount, 2)
-            component_map[component]['year_to_date'] += flt(detail.year_to_date, 2)
-            component_map[component]['count'] += 1
-            
-            # Track additional additional salary reference
-            if hasattr(detail, 'additional_salary') and detail.additional_salary:
-                component_map[component]['additional_salaries'].append(detail.additional_salary)
-    
-    # Build aggregated list
-    aggregated = []
-    idx = 1
+            aggregated.append(detail)
+
+        data['amount'] += flt(detail.amount, 2)
+        data['additional_amount'] += flt(detail.additional_amount, 2)
+        data['default_amount'] += flt(detail.default_amount, 2)
+        data['year_to_date'] += flt(detail.year_to_date, 2)
+
+        # Track additional salary reference
+        if has_reference and detail.additional_salary:
+            data['additional_salaries'].append(detail.additional_salary)
     
-    for component, data in component_map.items():
+    for data in component_map.values():
         detail = data['detail']
+        detail.amount = flt(data['amount'], 2)
+        detail.additional_amount = flt(data['additional_amount'], 2)
+        detail.default_amount = flt(data['default_amount'], 2)
+        detail.year_to_date = flt(data['year_to_date'], 2)
         
-        if data['count'] > 1:
-            # Multiple entries found - update with aggregated values
-            detail.amount = flt(data['amount'], 2)
-            detail.additional_amount = flt(data['additional_amount'], 2)
-            detail.default_amount = flt(data['default_amount'], 2)
-            detail.year_to_date = flt(data['year_to_date'], 2)
-            
-            # Combine additional salary references
-            if data['additional_salaries']:
-                if hasattr(detail, 'additional_salary'):
-                    detail.additional_salary = ", ".join(data['additional_salaries'])
-            
-            # Add aggregation note (optional - comment out if not needed)
-            # if hasattr(detail, 'description'):
-            #     original_desc = detail.description or ""
-            #     detail.description = f"{original_desc} [Aggregated from {data['count']} entries]".strip()
-        
-        # Update index to maintain order
+        # Combine additional salary references
+        if data['additional_salaries']:
+            detail.additional_salary = ", ".join(data['additional_salaries'])
+
+    # Update index to maintain order
+    for idx, detail in enumerate(aggregated, 1):
         detail.idx = idx
-        idx += 1
-        
-        aggregated.append(detail)
     
     return aggregated
 
 
+def get_overtime_components():
+    """
+    Names of Salary Components flagged is_overtime_component (cached)
+    """
+    return frappe.cache().get_value(
+        "vc_overtime_components",
+        generator=lambda: set(frappe.get_all(
+            "Salary Component", filters={"is_overtime_component": 1}, pluck="name"
+        ))
+    )
+
+
+def clear_overtime_components_cache(doc=None, method=None):
+    """
+    Salary Component on_update / on_trash hook
+    """
+    frappe.cache().delete_value("vc_overtime_components")
+
+
 def validate(doc, method=None):
     """
     Optional: Additional validation after aggregation
@@ -144,22 +247,37 @@ def validate(doc, method=None):
 
 def on_submit(doc, method=None):
     """
-    Optional: Log aggregation details for audit trail
+    Link the overtime ledger to this slip and log aggregation details
+    for audit trail
     """
-    # Count overtime components
+    link_salary_slip(doc)
+
+    if not logger.is_enabled_for(logging.INFO):
+        return
+
+    # Count overtime components (flagged on Salary Component)
+    overtime = get_overtime_components()
     overtime_components = []
     
     for earning in doc.earnings:
-        if "overtime" in earning.salary_component.lower():
-            if hasattr(earning, 'additional_salary') and earning.additional_salary:
-                # Check if aggregated (contains comma)
-                if "," in earning.additional_salary:
-                    count = len(earning.additional_salary.split(","))
-                    overtime_components.append(f"{earning.salary_component} (aggregated from {count} entries)")
-                else:
-                    overtime_components.append(earning.salary_component)
+        if earning.salary_component not in overtime or not earning.additional_salary:
+            continue
+
+        # Check if aggregated (contains comma)
+        count = earning.additional_salary.count(",") + 1
+        if count > 1:
+            overtime_components.append(f"{earning.salary_component} (aggregated from {count} entries)")
+        else:
+            overtime_components.append(earning.salary_component)
     
     if overtime_components:
-        frappe.logger().info(
-            f"Salary Slip {doc.name} includes overtime: {', '.join(overtime_components)}"
-        )
\ No newline at end of file
+        logger.info(
+            "Salary Slip %s includes overtime: %s", doc.name, ", ".join(overtime_components)
+        )
+
+
+def on_cancel(doc, method=None):
+    """
+    Release overtime ledger rows paid by this slip
+    """
+    unlink_salary_slip(doc)
@@ -3,15 +3,37 @@
 # Updated with shift-specific overtime allowance/grace period
 # =====================================================================
 
+from datetime import datetime, time, timedelta
+
 import frappe
 from frappe import _
-from frappe.utils import flt, cint, getdate, time_diff_in_hours, get_datetime, add_to_date
-from datetime import datetime, timedelta
+from frappe.utils import cint, flt, get_datetime, get_time, getdate, time_diff_in_hours
+
+from vc_app.vc_overtime.overtime_context import (
+    context_eligible,
+    context_is_holiday,
+    context_rate,
+    context_shift_type,
+    get_active_context,
+)
+from vc_app.vc_overtime.overtime_instrumentation import instrumented
+from vc_app.vc_overtime.overtime_logger import get_logger
+from vc_app.vc_overtime.overtime_metrics import timed
+from vc_app.vc_overtime.overtime_policy import (
+    DAY_CODES,
+    get_multipliers,
+    get_policy_table,
+    is_comp_off_eligible,
+)
+from vc_app.vc_overtime.overtime_prepared import bump_config_version
+from vc_app.vc_overtime.overtime_sql import run_sql
 
 # =====================================================================
 # CORE CALCULATION FUNCTIONS
 # =====================================================================
 
+@instrumented("calculate_overtime_for_attendance")
+@timed("vc_overtime_calculation_seconds")
 def calculate_overtime_for_attendance(attendance_doc):
     """
     Calculate overtime dynamically from attendance data.
@@ -22,6 +44,8 @@ def calculate_overtime_for_attendance(attendance_doc):
     - Standard hours = 8
     - Overtime threshold = shift_end + overtime_allowance_minutes
     - Overtime hours = max(0, worked_hours - standard_hours - (allowance_minutes / 60))
+    - Holiday/Sunday: Shift Type policy ("All Hours ..." deducts nothing),
+      see overtime_policy
     
     Parameters:
         attendance_doc: Attendance document or dict with:
@@ -30,6 +54,9 @@ def calculate_overtime_for_attendance(attendance_doc):
             - in_time
             - out_time
             - company
+            - worked_hours (optional, e.g. from checkin_pairing; used
+              instead of out_time - in_time when breaks or several
+              IN/OUT segments are involved)
     
     Returns:
         dict: {
@@ -41,7 +68,9 @@ def calculate_overtime_for_attendance(attendance_doc):
             'is_eligible': bool,
             'shift_end': datetime,
             'overtime_threshold': datetime,
-            'allowance_minutes': int
+            'allowance_minutes': int,
+            'calculation_method': str,
+            'comp_off_eligible': bool
         }
     """
     result = {
@@ -53,7 +82,9 @@ def calculate_overtime_for_attendance(attendance_doc):
         'is_eligible': False,
         'shift_end': None,
         'overtime_threshold': None,
-        'allowance_minutes': 0
+        'allowance_minutes': 0,
+        'calculation_method': None,
+        'comp_off_eligible': False
     }
     
     # Get attendance data
@@ -63,18 +94,23 @@ def calculate_overtime_for_attendance(attendance_doc):
         in_time = attendance_doc.get('in_time')
         out_time = attendance_doc.get('out_time')
         company = attendance_doc.get('company')
+        worked_hours = attendance_doc.get('worked_hours')
     else:
         employee = attendance_doc.employee
         date = attendance_doc.attendance_date
         in_time = attendance_doc.in_time
         out_time = attendance_doc.out_time
         company = attendance_doc.company
+        worked_hours = None
     
     if not out_time or not in_time:
         return result
     
     # Check eligibility
-    is_eligible = frappe.db.get_value("Employee", employee, "eligible_for_overtime")
+    context = get_active_context()
+    is_eligible = context_eligible(context, employee) if context else None
+    if is_eligible is None:
+        is_eligible = frappe.db.get_value("Employee", employee, "eligible_for_overtime")
     result['is_eligible'] = bool(is_eligible)
     
     # Get shift details including overtime allowance
@@ -86,8 +122,7 @@ def calculate_overtime_for_attendance(attendance_doc):
     result['allowance_minutes'] = shift_details['overtime_allowance_minutes']
     
     # Calculate overtime threshold (shift_end + allowance)
-    overtime_threshold = add_to_date(
-        shift_details['end_time'], 
+    overtime_threshold = shift_details['end_time'] + timedelta(
         minutes=shift_details['overtime_allowance_minutes']
     )
     result['overtime_threshold'] = overtime_threshold
@@ -96,15 +131,30 @@ def calculate_overtime_for_attendance(attendance_doc):
     in_dt = get_datetime(in_time)
     out_dt = get_datetime(out_time)
     
-    # Calculate total worked hours
-    total_worked_hours = time_diff_in_hours(out_dt, in_dt)
+    # Calculate total worked hours (paired checkin segments when given)
+    if worked_hours is not None:
+        total_worked_hours = flt(worked_hours)
+    else:
+        total_worked_hours = time_diff_in_hours(out_dt, in_dt)
+
+    # Compiled Shift Type policy (deduction, multiplier, comp off per day type)
+    policy_table = get_policy_table(shift_details['shift_type'])
+
+    # Nothing to do when no day type could give overtime (skips the holiday lookup)
+    if total_worked_hours <= min(policy['deduction_hours'] for policy in policy_table) \
+            and not any(policy['comp_off_leave_type'] for policy in policy_table):
+        return result
+
+    # Determine overtime type
+    ot_type = get_overtime_type(date, company)
+    policy = policy_table[DAY_CODES[ot_type]]
+    result['calculation_method'] = policy['calculation_type']
+    result['comp_off_eligible'] = is_comp_off_eligible(policy, total_worked_hours)
     
     # Calculate overtime hours using the formula:
     # OT = (out_time - in_time) - 8 hours - (allowance_minutes / 60)
-    standard_hours = 8.0
-    allowance_hours = flt(shift_details['overtime_allowance_minutes'] / 60.0, 2)
-    
-    overtime_hours = total_worked_hours - standard_hours - allowance_hours
+    # ("All Hours ..." policies deduct nothing)
+    overtime_hours = total_worked_hours - policy['deduction_hours']
     
     # Only count positive overtime
     overtime_hours = max(0, overtime_hours)
@@ -113,9 +163,6 @@ def calculate_overtime_for_attendance(attendance_doc):
         return result
     
     result['overtime_hours'] = flt(overtime_hours, 2)
-    
-    # Determine overtime type
-    ot_type = get_overtime_type(date, company)
     result['overtime_type'] = ot_type
     
     # Get hourly rate
@@ -126,7 +173,7 @@ def calculate_overtime_for_attendance(attendance_doc):
         return result
     
     # Get multiplier
-    multiplier = get_overtime_multiplier(ot_type)
+    multiplier = policy['multiplier']
     result['overtime_multiplier'] = multiplier
     
     # Calculate amount
@@ -136,19 +183,51 @@ def calculate_overtime_for_attendance(attendance_doc):
     return result
 
 
+@instrumented("get_shift_details")
 def get_shift_details(employee, date):
     """
     Get shift details including overtime allowance.
+    Night shifts (end_time <= start_time) end on the next day.
     
     Returns:
         dict: {
             'shift_type': str,
+            'start_time': datetime,
             'end_time': datetime,
+            'rolls_over': bool,
             'overtime_allowance_minutes': int
         }
     """
+    context = get_active_context()
+    if context and employee in context["employees"]:
+        shift_type = context_shift_type(context, employee, date)
+    else:
+        shift_type = get_assigned_shift_type(employee, date)
+
+    if not shift_type:
+        return None
+
+    window = get_shift_window(shift_type)
+    if not window:
+        return None
+
+    day_start = datetime.combine(getdate(date), time.min)
+
+    return {
+        'shift_type': shift_type,
+        'start_time': day_start + timedelta(seconds=window['start_offset']),
+        'end_time': day_start + timedelta(seconds=window['end_offset']),
+        'rolls_over': window['rolls_over'],
+        'overtime_allowance_minutes': window['allowance_seconds'] // 60
+    }
+
+
+def get_assigned_shift_type(employee, date):
+    """
+    Shift Type from the latest Shift Assignment, else the Employee default
+    """
     # Try shift assignment first
-    shift = frappe.db.sql("""
+    shift = run_sql("""
         SELECT shift_type
         FROM `tabShift Assignment`
         WHERE employee = %s
@@ -163,45 +242,90 @@ def get_shift_details(employee, date):
     else:
         shift_type = frappe.db.get_value("Employee", employee, "default_shift")
     
-    if not shift_type:
-        return None
+    return shift_type
+
+
+# =====================================================================
+# SHIFT WINDOWS (precomputed per Shift Type)
+# =====================================================================
+
+SHIFT_WINDOWS_CACHE_KEY = "vc_overtime_shift_windows"
+
+
+def get_shift_window(shift_type):
+    """
+    Window descriptor for a Shift Type, cached in Redis.
     
-    # Get shift type details including overtime allowance
-    shift_details = frappe.db.get_value(
-        "Shift Type", 
-        shift_type, 
-        ["end_time", "overtime_allowance_minutes"],
+    Offsets are seconds from midnight of the attendance date; a shift
+    that ends at or before its start rolls over, so its end offset is
+    past 86400. Bulk callers can work on these integers directly
+    (e.g. overtime_threshold = day_start_ts + end_offset + allowance_seconds).
+
+    Returns:
+        dict: {
+            'start_offset': int,
+            'end_offset': int,
+            'rolls_over': bool,
+            'allowance_seconds': int
+        } or None when the Shift Type has no end time
+    """
+    return frappe.cache().hget(
+        SHIFT_WINDOWS_CACHE_KEY,
+        shift_type,
+        generator=lambda: build_shift_window(shift_type)
+    )
+
+
+def build_shift_window(shift_type):
+    shift = frappe.db.get_value(
+        "Shift Type",
+        shift_type,
+        ["start_time", "end_time", "overtime_allowance_minutes"],
         as_dict=True
     )
     
-    if not shift_details or not shift_details.end_time:
+    if not shift or shift.end_time is None:
         return None
     
-    end_time = shift_details.end_time
-    
-    # Convert timedelta to time if needed
-    if isinstance(end_time, datetime):
-        end_time = end_time.time()
-    elif hasattr(end_time, 'seconds'):
-        total_seconds = int(end_time.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-        end_time = datetime.min.time().replace(hour=hours, minute=minutes, second=seconds)
+    start_offset = _seconds_from_midnight(shift.start_time)
+    end_offset = _seconds_from_midnight(shift.end_time)
     
-    # Combine with date
-    end_datetime = datetime.combine(getdate(date), end_time)
-    
-    # Get overtime allowance (default to 0 if not set)
-    overtime_allowance = cint(shift_details.get('overtime_allowance_minutes') or 0)
+    rolls_over = shift.start_time is not None and end_offset <= start_offset
+    if rolls_over:
+        end_offset += 86400
     
     return {
-        'shift_type': shift_type,
-        'end_time': end_datetime,
-        'overtime_allowance_minutes': overtime_allowance
+        'start_offset': start_offset,
+        'end_offset': end_offset,
+        'rolls_over': rolls_over,
+        'allowance_seconds': cint(shift.overtime_allowance_minutes) * 60
     }
 
 
+def _seconds_from_midnight(value):
+    """
+    Shift Type times come back as timedelta from MariaDB; accept time,
+    datetime and "HH:MM:SS" strings as well.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) % 86400
+    if isinstance(value, str):
+        value = get_time(value)
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def clear_shift_window_cache(doc=None, method=None):
+    """
+    Shift Type on_update / on_trash hook
+    """
+    if doc:
+        frappe.cache().hdel(SHIFT_WINDOWS_CACHE_KEY, doc.name)
+    else:
+        frappe.cache().delete_key(SHIFT_WINDOWS_CACHE_KEY)
+
+
 def get_shift_end_time(employee, date):
     """
     Get shift end time for employee on date.
@@ -216,19 +340,17 @@ def get_shift_end_time(employee, date):
     return None
 
 
+@instrumented("get_hourly_rate")
 def get_hourly_rate(employee, date):
     """
     Get hourly rate from Salary Structure Assignment.
     """
-    ssa = frappe.db.sql("""
-        SELECT hourly_rate, base
-        FROM `tabSalary Structure Assignment`
-        WHERE employee = %s
-            AND docstatus = 1
-            AND from_date <= %s
-        ORDER BY from_date DESC
-        LIMIT 1
-    """, (employee, date), as_dict=True)
+    context = get_active_context()
+    if context and employee in context["employees"]:
+        rate = context_rate(context, employee, date)
+        ssa = [frappe._dict(hourly_rate=rate[0], base=rate[1])] if rate else []
+    else:
+        ssa = get_salary_structure_rate(employee, date)
     
     if not ssa:
         return 0
@@ -245,12 +367,32 @@ def get_hourly_rate(employee, date):
     return flt(hourly_rate, 2)
 
 
+def get_salary_structure_rate(employee, date):
+    return run_sql("""
+        SELECT hourly_rate, base
+        FROM `tabSalary Structure Assignment`
+        WHERE employee = %s
+            AND docstatus = 1
+            AND from_date <= %s
+        ORDER BY from_date DESC
+        LIMIT 1
+    """, (employee, date), as_dict=True)
+
+
+@instrumented("get_overtime_type")
 def get_overtime_type(date, company):
     """
     Determine overtime type: Normal, Holiday, or Sunday
     """
     # Check holiday
-    holiday_list = frappe.db.get_value("Company", company, "default_holiday_list")
+    context = get_active_context()
+    if context and company in context["holiday_lists"]:
+        if context_is_holiday(context, company, date):
+            return "Holiday"
+        holiday_list = None
+    else:
+        holiday_list = frappe.db.get_value("Company", company, "default_holiday_list")
+
     if holiday_list:
         is_holiday = frappe.db.exists("Holiday", {
             "parent": holiday_list,
@@ -270,14 +412,7 @@ def get_overtime_multiplier(overtime_type):
     """
     Get multiplier based on type.
     """
-    if overtime_type in ["Holiday", "Sunday"]:
-        return flt(frappe.db.get_single_value(
-            "HR Settings", "holiday_overtime_multiplier"
-        ) or 2.0, 2)
-    else:
-        return flt(frappe.db.get_single_value(
-            "HR Settings", "weekday_overtime_multiplier"
-        ) or 1.5, 2)
+    return get_multipliers()[overtime_type if overtime_type in ("Holiday", "Sunday") else "Normal"]
     
 
 def calculate_hourly_rate_on_save(doc, method=None):
@@ -328,6 +463,96 @@ def calculate_hourly_rate_on_save(doc, method=None):
     doc.hourly_rate = hourly_rate
 
 
+def recompute_hourly_rates_on_settings_change(doc, method=None):
+    """
+    HR Settings on_update hook: when standard_hours_per_month changes,
+    recompute every stored hourly rate in a background job.
+    """
+    if not doc.has_value_changed("standard_hours_per_month"):
+        return
+
+    frappe.enqueue(
+        "vc_app.vc_overtime.overtime_calculator.recompute_hourly_rates",
+        queue="long",
+        timeout=1800,
+        enqueue_after_commit=True,
+        standard_hours=cint(doc.standard_hours_per_month) or 225,
+        notify_user=frappe.session.user
+    )
+
+
+HOURLY_RATE_BATCH_SIZE = 1000
+
+
+def recompute_hourly_rates(standard_hours=None, notify_user=None):
+    """
+    Batched version of calculate_hourly_rate_on_save for all draft and
+    submitted Salary Structure Assignments. Rates are computed in Python
+    with the same flt(base / standard_hours, 2) as the save hook (SQL
+    ROUND on the DECIMAL quotient can differ from it by a cent) and
+    written with one UPDATE per batch of changed rows.
+
+    Returns:
+        int: number of assignments whose rate changed
+    """
+    standard_hours = cint(standard_hours) or cint(frappe.db.get_single_value(
+        "HR Settings", "standard_hours_per_month"
+    )) or 225
+
+    modified = frappe.utils.now()
+    changed = 0
+    last_name = ""
+
+    while True:
+        rows = run_sql("""
+            SELECT name, base, hourly_rate
+            FROM `tabSalary Structure Assignment`
+            WHERE docstatus < 2
+                AND base > 0
+                AND name > %(last_name)s
+            ORDER BY name
+            LIMIT %(limit)s
+        """, {"last_name": last_name, "limit": HOURLY_RATE_BATCH_SIZE}, as_dict=True)
+        if not rows:
+            break
+
+        rates = {}
+        for row in rows:
+            hourly_rate = flt(row.base / standard_hours, 2)
+            if flt(row.hourly_rate, 2) != hourly_rate:
+                rates[row.name] = hourly_rate
+
+        if rates:
+            cases = " ".join(["WHEN %s THEN %s"] * len(rates))
+            run_sql(f"""
+                UPDATE `tabSalary Structure Assignment`
+                SET hourly_rate = CASE name {cases} END,
+                    modified = %s
+                WHERE name IN ({", ".join(["%s"] * len(rates))})
+            """, [*(value for item in rates.items() for value in item), modified, *rates])
+            frappe.db.commit()
+            changed += len(rates)
+
+        if len(rows) < HOURLY_RATE_BATCH_SIZE:
+            break
+        last_name = rows[-1].name
+
+    # Rates prefetched for bulk calculation and prepared reports are stale now
+    frappe.local.vc_overtime_context = None
+    frappe.clear_document_cache("Salary Structure Assignment")
+    if changed:
+        bump_config_version()
+
+    message = _("Hourly rate recalculated for {0} Salary Structure Assignments ({1} hours per month)").format(
+        changed, standard_hours
+    )
+    get_logger("calculator").info("%s", message)
+    if notify_user:
+        frappe.publish_realtime("msgprint", message, user=notify_user)
+
+    return changed
+
+
 @frappe.whitelist()
 def calculate_hourly_rate(salary_structure_assignment):
     """
@@ -0,0 +1,152 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_codec.py
+# Compact encoding for cached overtime payloads (edit cache, report caches)
+# =====================================================================
+#
+# Layout: one format version byte followed by the body.
+#
+#   0x01  zlib-compressed JSON
+#   0x02  zlib-compressed msgpack (used when msgpack is installed)
+#
+# encode_records()/decode_records() additionally store a mapping of
+# key -> dict as columns, so repeated field names (approved_hours,
+# timestamp, edited_by, ...) are written once and repeated string
+# values are dictionary-encoded. encode_columns() applies the same
+# layout to a list of rows for JSON responses (no version byte).
+
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMAT_ZJSON = 0x01
+FORMAT_MSGPACK = 0x02
+
+COMPRESS_LEVEL = 6
+
+
+def encode(payload):
+    """
+    Encode any JSON-serialisable payload to compact bytes.
+
+    Returns:
+        bytes: version byte + compressed body
+    """
+    if msgpack is not None:
+        body = msgpack.packb(payload, use_bin_type=True)
+        return bytes([FORMAT_MSGPACK]) + zlib.compress(body, COMPRESS_LEVEL)
+
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    return bytes([FORMAT_ZJSON]) + zlib.compress(body, COMPRESS_LEVEL)
+
+
+def decode(blob):
+    """
+    Decode bytes produced by encode().
+    Plain JSON strings (the legacy cache format) are accepted as well.
+    """
+    if not blob:
+        return None
+
+    if isinstance(blob, str):
+        return json.loads(blob)
+
+    version = blob[0]
+    if version == FORMAT_ZJSON:
+        return json.loads(zlib.decompress(blob[1:]))
+    if version == FORMAT_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Payload was encoded with msgpack, which is not installed")
+        return msgpack.unpackb(zlib.decompress(blob[1:]), raw=False)
+
+    # Legacy uncompressed JSON stored as bytes
+    return json.loads(blob)
+
+
+def encode_records(records):
+    """
+    Encode a mapping of key -> flat dict in columnar form.
+
+    Example:
+        {"ATT-1": {"approved_hours": 2.0, "edited_by": "a@x"},
+         "ATT-2": {"approved_hours": 1.5, "edited_by": "a@x"}}
+    is stored as
+        {"k": ["ATT-1", "ATT-2"],
+         "c": {"approved_hours": [2.0, 1.5], "edited_by": {"d": ["a@x"], "i": [0, 0]}}}
+    """
+    keys = list(records)
+    fields = {}
+    for record in records.values():
+        for field in record:
+            fields.setdefault(field, None)
+
+    columns = {}
+    for field in fields:
+        values = [records[key].get(field) for key in keys]
+        columns[field] = dictionary_encode(values)
+
+    return encode({"k": keys, "c": columns})
+
+
+def decode_records(blob):
+    """
+    Decode bytes produced by encode_records() back to key -> dict.
+    Legacy row-oriented payloads are returned unchanged.
+    """
+    payload = decode(blob)
+    if not payload:
+        return {}
+
+    if not (isinstance(payload, dict) and set(payload) == {"k", "c"}):
+        return payload
+
+    keys = payload["k"]
+    records = {key: {} for key in keys}
+    for field, column in payload["c"].items():
+        values = dictionary_decode(column)
+        for key, value in zip(keys, values, strict=True):
+            records[key][field] = value
+
+    return records
+
+
+def encode_columns(rows, fields, derived=()):
+    """
+    Columnar form of a list of row dicts for a JSON response.
+
+    `derived` fields are not sent; the client recomputes them.
+
+    Returns:
+        dict: {"length": n, "columns": [field, ...], "values": [column, ...],
+               "derived": [field, ...]}
+    """
+    fields = [f for f in fields if f not in derived]
+    return {
+        "length": len(rows),
+        "columns": fields,
+        "values": [dictionary_encode([row.get(f) for row in rows]) for f in fields],
+        "derived": list(derived)
+    }
+
+
+def dictionary_encode(values):
+    """Store repeated strings once; other columns are kept as plain lists"""
+    if len(values) < 2 or not all(v is None or isinstance(v, str) for v in values):
+        return values
+
+    lookup = {}
+    indexes = [lookup.setdefault(v, len(lookup)) for v in values]
+    if len(lookup) * 2 > len(values):
+        return values
+
+    return {"d": list(lookup), "i": indexes}
+
+
+def dictionary_decode(column):
+    if isinstance(column, dict):
+        dictionary = column["d"]
+        return [dictionary[i] for i in column["i"]]
+    return column
@@ -0,0 +1,243 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_comp_off.py
+# Bulk compensatory-off allocation for Holiday/Sunday work
+# =====================================================================
+#
+# Shift Type policies ("All Hours + Comp Off", "Extra Hours + Comp Off",
+# compiled in overtime_policy) grant one day off to employees who worked
+# at least the configured minimum hours on a holiday or Sunday. A whole day's attendance is
+# evaluated in one background job:
+#   - attendance, shift policies and existing allocations are loaded once
+#   - a Leave Allocation covering the period is topped up (with its own
+#     leave ledger entry), otherwise a new one is created and submitted
+#   - Attendance.comp_off_leave_allocation marks rows already granted, so
+#     running the job twice for a date grants nothing new
+#   - the overtime Additional Salary of the day records the grant; on a
+#     consolidated (monthly) Additional Salary it is recorded on the
+#     attendance's line
+#   - each grant runs in its own savepoint: a failing employee is logged
+#     and skipped, the rest of the day is still granted
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, flt, getdate, time_diff_in_hours
+
+from vc_app.vc_overtime.overtime_calculator import get_overtime_type, get_shift_details
+from vc_app.vc_overtime.overtime_context import overtime_context
+from vc_app.vc_overtime.overtime_logger import get_logger
+from vc_app.vc_overtime.overtime_policy import get_day_policy, is_comp_off_eligible
+
+logger = get_logger("comp_off")
+
+COMP_OFF_VALIDITY_DAYS = 90
+COMP_OFF_DAYS = 1.0
+
+
+@frappe.whitelist()
+def allocate_comp_off(date, company):
+    """
+    Grant comp off for a holiday/Sunday in a background job
+    """
+    frappe.only_for(["HR Manager", "System Manager"])
+
+    frappe.enqueue(
+        "vc_app.vc_overtime.overtime_comp_off.allocate_comp_off_job",
+        queue="long",
+        timeout=3600,
+        date=getdate(date),
+        company=company
+    )
+    frappe.msgprint(_("Compensatory off is being allocated in the background"), alert=True)
+
+
+def allocate_comp_off_job(date, company):
+    """
+    Evaluate comp-off policies for one day's attendance and allocate leave
+
+    Returns:
+        dict: evaluated, granted, extended, created, failed
+    """
+    date = getdate(date)
+    stats = {"evaluated": 0, "granted": 0, "extended": 0, "created": 0, "failed": 0}
+
+    rows = frappe.db.sql("""
+        SELECT a.name, a.employee, a.company, a.attendance_date, a.in_time, a.out_time,
+            a.overtime_additional_salary, IFNULL(s.is_consolidated_overtime, 0) AS is_consolidated_overtime
+        FROM `tabAttendance` a
+        INNER JOIN `tabEmployee` e ON e.name = a.employee
+        LEFT JOIN `tabAdditional Salary` s ON s.name = a.overtime_additional_salary
+        WHERE a.docstatus = 1
+            AND a.status = 'Present'
+            AND a.out_time IS NOT NULL
+            AND IFNULL(a.comp_off_leave_allocation, '') = ''
+            AND e.eligible_for_overtime = 1
+            AND a.company = %s
+            AND a.attendance_date = %s
+    """, (company, date), as_dict=True)
+
+    if not rows:
+        return stats
+
+    grants = []
+    with overtime_context([row.employee for row in rows], [company], date, date):
+        ot_type = get_overtime_type(date, company)
+        if ot_type not in ("Holiday", "Sunday"):
+            return stats
+
+        for row in rows:
+            stats["evaluated"] += 1
+            shift = get_shift_details(row.employee, date)
+            if not shift:
+                continue
+
+            policy = get_day_policy(shift['shift_type'], ot_type)
+            if not is_comp_off_eligible(policy, time_diff_in_hours(row.out_time, row.in_time)):
+                continue
+
+            grants.append(frappe._dict(
+                row, leave_type=policy['comp_off_leave_type'], overtime_type=ot_type
+            ))
+
+    if not grants:
+        return stats
+
+    allocations = get_open_allocations(
+        [g.employee for g in grants], {g.leave_type for g in grants}, add_days(date, 1)
+    )
+
+    for grant in grants:
+        key = (grant.employee, grant.leave_type)
+        frappe.db.savepoint("comp_off_grant")
+        try:
+            allocation = allocations.get(key)
+            if allocation:
+                extend_allocation(allocation, COMP_OFF_DAYS, add_days(date, 1))
+                action = "extended"
+            else:
+                allocation = create_allocation(grant, COMP_OFF_DAYS)
+                allocations[key] = allocation
+                action = "created"
+            grant.leave_allocation = allocation.name
+            mark_granted([grant])
+        except Exception:
+            frappe.db.rollback(save_point="comp_off_grant")
+            # The cached allocation may hold the rolled-back top-up
+            allocations.pop(key, None)
+            frappe.log_error(
+                title=f"VC Overtime comp off failed for {grant.employee} on {date}"
+            )
+            stats["failed"] += 1
+            continue
+
+        stats[action] += 1
+        stats["granted"] += 1
+
+    frappe.db.commit()
+
+    logger.info(
+        "Comp off for %s %s: %s evaluated, %s granted (%s extended, %s created), %s failed",
+        company, date, stats["evaluated"], stats["granted"], stats["extended"], stats["created"],
+        stats["failed"]
+    )
+    return stats
+
+
+def get_open_allocations(employees, leave_types, date):
+    """
+    Submitted allocations that cover a date, one query for all employees
+
+    Returns:
+        dict: {(employee, leave_type): Leave Allocation doc}
+    """
+    names = frappe.db.sql("""
+        SELECT employee, leave_type, name
+        FROM `tabLeave Allocation`
+        WHERE docstatus = 1
+            AND employee IN %s
+            AND leave_type IN %s
+            AND %s BETWEEN from_date AND to_date
+    """, (tuple(set(employees)), tuple(leave_types), date), as_dict=True)
+
+    return {
+        (row.employee, row.leave_type): frappe.get_doc("Leave Allocation", row.name)
+        for row in names
+    }
+
+
+def extend_allocation(allocation, days, from_date):
+    """
+    Top up an allocation the way Compensatory Leave Request does
+    """
+    from hrms.hr.doctype.leave_allocation.leave_allocation import create_additional_leave_ledger_entry
+
+    allocation.new_leaves_allocated = flt(allocation.new_leaves_allocated) + days
+    allocation.validate()
+    allocation.db_set("new_leaves_allocated", allocation.total_leaves_allocated)
+    allocation.db_set("total_leaves_allocated", allocation.total_leaves_allocated)
+    create_additional_leave_ledger_entry(allocation, days, from_date)
+
+
+def create_allocation(grant, days):
+    allocation = frappe.get_doc({
+        "doctype": "Leave Allocation",
+        "employee": grant.employee,
+        "leave_type": grant.leave_type,
+        "from_date": add_days(grant.attendance_date, 1),
+        "to_date": add_days(grant.attendance_date, COMP_OFF_VALIDITY_DAYS),
+        "new_leaves_allocated": days,
+        "is_overtime_comp_off": 1,
+        "overtime_additional_salary": grant.overtime_additional_salary,
+        "overtime_work_date": grant.attendance_date,
+        "overtime_type": grant.overtime_type,
+        "description": _("Compensatory off for work on {0}").format(grant.attendance_date)
+    })
+    allocation.insert(ignore_permissions=True)
+    allocation.submit()
+    return allocation
+
+
+def mark_granted(grants):
+    """
+    Link each Attendance (and its overtime Additional Salary, or its line of
+    a consolidated one) to the allocation
+    """
+    cases = " ".join(["WHEN %s THEN %s"] * len(grants))
+    values = [v for g in grants for v in (g.name, g.leave_allocation)]
+    names = [g.name for g in grants]
+
+    frappe.db.sql(f"""
+        UPDATE `tabAttendance`
+        SET comp_off_leave_allocation = CASE name {cases} END
+        WHERE name IN ({", ".join(["%s"] * len(names))})
+    """, values + names)
+
+    for grant in grants:
+        if not grant.overtime_additional_salary:
+            continue
+        if grant.is_consolidated_overtime:
+            # One document pays the whole month: record the grant per day
+            frappe.db.sql("""
+                UPDATE `tabOvertime Attendance Line`
+                SET comp_off_leave_allocation = %s
+                WHERE parent = %s AND parenttype = 'Additional Salary' AND attendance = %s
+            """, (grant.leave_allocation, grant.overtime_additional_salary, grant.name))
+        else:
+            frappe.db.set_value("Additional Salary", grant.overtime_additional_salary, {
+                "comp_off_granted": 1,
+                "comp_off_days": COMP_OFF_DAYS,
+                "comp_off_leave_allocation": grant.leave_allocation,
+                "comp_off_leave_type": grant.leave_type
+            }, update_modified=False)
+
+
+def allocate_comp_off_daily():
+    """
+    Daily scheduler entry: yesterday's holiday/Sunday work for every company
+    """
+    date = add_days(getdate(), -1)
+    for company in frappe.get_all("Company", pluck="name"):
+        try:
+            allocate_comp_off_job(date, company)
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(title=f"VC Overtime comp off failed for {company} on {date}")
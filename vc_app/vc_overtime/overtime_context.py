@@ -0,0 +1,161 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_context.py
+# Prefetched lookups for bulk overtime calculation
+# =====================================================================
+#
+# The calculator resolves the shift, hourly rate, holiday and eligibility
+# of every row with its own queries. For bulk work (nightly precompute,
+# report) those are loaded once for all employees of a date range:
+#
+#     with overtime_context(employees, companies, from_date, to_date):
+#         for row in rows:
+#             calculate_overtime_for_attendance(row)
+#
+# While a context is active (frappe.local), the calculator reads from it
+# instead of the database. Shift windows are warmed in the Redis cache.
+
+from bisect import bisect_right
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import getdate
+
+_MISSING = object()
+
+
+@contextmanager
+def overtime_context(employees, companies, from_date, to_date):
+    previous = getattr(frappe.local, "vc_overtime_context", None)
+    frappe.local.vc_overtime_context = build_overtime_context(employees, companies, from_date, to_date)
+    try:
+        yield frappe.local.vc_overtime_context
+    finally:
+        frappe.local.vc_overtime_context = previous
+
+
+def get_active_context():
+    return getattr(frappe.local, "vc_overtime_context", None)
+
+
+def build_overtime_context(employees, companies, from_date, to_date):
+    """
+    Load everything the calculator looks up per row, in five queries.
+
+    Returns:
+        dict: {
+            'employees': {employee: {'eligible': bool, 'default_shift': str}},
+            'shift_assignments': {employee: ([start_date, ...], [shift_type, ...])},
+            'rates': {employee: ([from_date, ...], [(hourly_rate, base), ...])},
+            'holiday_lists': {company: holiday_list},
+            'holidays': {holiday_list: {date, ...}}
+        }
+    """
+    from vc_app.vc_overtime.overtime_calculator import get_shift_window
+
+    employees = tuple(set(employees)) or ("",)
+    companies = tuple(set(companies)) or ("",)
+    from_date, to_date = getdate(from_date), getdate(to_date)
+
+    context = {
+        "employees": {},
+        "shift_assignments": {},
+        "rates": {},
+        "holiday_lists": {},
+        "holidays": {}
+    }
+
+    for row in frappe.db.sql("""
+        SELECT name, eligible_for_overtime, default_shift
+        FROM `tabEmployee`
+        WHERE name IN %s
+    """, (employees,), as_dict=True):
+        context["employees"][row.name] = {
+            "eligible": bool(row.eligible_for_overtime),
+            "default_shift": row.default_shift
+        }
+
+    shift_types = {e["default_shift"] for e in context["employees"].values() if e["default_shift"]}
+    for row in frappe.db.sql("""
+        SELECT employee, start_date, shift_type
+        FROM `tabShift Assignment`
+        WHERE employee IN %s
+            AND start_date <= %s
+            AND docstatus = 1
+        ORDER BY employee, start_date, creation
+    """, (employees, to_date), as_dict=True):
+        dates, values = context["shift_assignments"].setdefault(row.employee, ([], []))
+        dates.append(row.start_date)
+        values.append(row.shift_type)
+        shift_types.add(row.shift_type)
+
+    for row in frappe.db.sql("""
+        SELECT employee, from_date, hourly_rate, base
+        FROM `tabSalary Structure Assignment`
+        WHERE employee IN %s
+            AND from_date <= %s
+            AND docstatus = 1
+        ORDER BY employee, from_date, creation
+    """, (employees, to_date), as_dict=True):
+        dates, values = context["rates"].setdefault(row.employee, ([], []))
+        dates.append(row.from_date)
+        values.append((row.hourly_rate, row.base))
+
+    for row in frappe.db.sql("""
+        SELECT name, default_holiday_list
+        FROM `tabCompany`
+        WHERE name IN %s
+    """, (companies,), as_dict=True):
+        context["holiday_lists"][row.name] = row.default_holiday_list
+
+    holiday_lists = tuple(filter(None, context["holiday_lists"].values()))
+    if holiday_lists:
+        for row in frappe.db.sql("""
+            SELECT parent, holiday_date
+            FROM `tabHoliday`
+            WHERE parent IN %s
+                AND holiday_date BETWEEN %s AND %s
+        """, (holiday_lists, from_date, to_date), as_dict=True):
+            context["holidays"].setdefault(row.parent, set()).add(row.holiday_date)
+
+    # Warm the Redis shift window cache
+    for shift_type in shift_types:
+        get_shift_window(shift_type)
+
+    return context
+
+
+def _latest_on_or_before(series, date):
+    if not series:
+        return None
+    dates, values = series
+    index = bisect_right(dates, getdate(date))
+    return values[index - 1] if index else None
+
+
+def context_shift_type(context, employee, date):
+    shift_type = _latest_on_or_before(context["shift_assignments"].get(employee), date)
+    if shift_type:
+        return shift_type
+    return (context["employees"].get(employee) or {}).get("default_shift")
+
+
+def context_rate(context, employee, date):
+    """
+    Returns:
+        tuple: (hourly_rate, base) of the assignment in force, or None
+    """
+    return _latest_on_or_before(context["rates"].get(employee), date)
+
+
+def context_eligible(context, employee):
+    employee_info = context["employees"].get(employee, _MISSING)
+    if employee_info is _MISSING:
+        return None
+    return employee_info["eligible"]
+
+
+def context_is_holiday(context, company, date):
+    holiday_list = context["holiday_lists"].get(company)
+    if not holiday_list:
+        return False
+    return getdate(date) in context["holidays"].get(holiday_list, ())
@@ -1,57 +1,227 @@
 # =====================================================================
 # FILE: vc_app/vc_overtime/overtime_edit_cache.py
 # Server-side session cache for overtime edits
+# Bounded per user and globally, per-entry TTL, hit/miss counters
+# Payloads are stored through overtime_codec (columnar, compressed)
 # =====================================================================
 
-import frappe
 import json
+import time
+
+import frappe
 from frappe import _
-import logging
+from frappe.utils import cint, get_datetime
+
+from vc_app.vc_overtime.overtime_codec import decode_records, encode_records
+from vc_app.vc_overtime.overtime_logger import get_logger
+
+logger = get_logger("edit_cache")
+
+# Hash of user -> number of cached edits, used for the global cap
+INDEX_KEY = "overtime_edits_index"
+
+# Prefix for the shared counters (hits, misses, evictions)
+STATS_PREFIX = "overtime_edit_cache"
+
+DEFAULT_TTL_HOURS = 24
+DEFAULT_MAX_PER_USER = 500
+DEFAULT_MAX_TOTAL = 20000
+
+
+# =====================================================================
+# INTERNAL HELPERS
+# =====================================================================
+
+def get_cache_settings():
+    """
+    Read edit cache limits from HR Settings (falls back to defaults)
+    """
+    ttl_hours = cint(frappe.db.get_single_value("HR Settings", "overtime_edit_ttl_hours")) or DEFAULT_TTL_HOURS
+    return {
+        "ttl_seconds": ttl_hours * 3600,
+        "max_per_user": cint(frappe.db.get_single_value("HR Settings", "overtime_edit_max_per_user"))
+            or DEFAULT_MAX_PER_USER,
+        "max_total": cint(frappe.db.get_single_value("HR Settings", "overtime_edit_max_total"))
+            or DEFAULT_MAX_TOTAL
+    }
+
+
+def _cache_key(user):
+    return f"overtime_edits_{user}"
+
+
+def _saved_at(edit):
+    """Epoch seconds an edit was saved (older entries only carry `timestamp`)"""
+    saved_at = edit.get("saved_at")
+    if saved_at is None:
+        saved_at = get_datetime(edit.get("timestamp")).timestamp()
+    return saved_at
+
+
+def _load_edits(user, settings):
+    """
+    Load a user's edits and drop every entry older than the TTL.
+
+    Returns:
+        tuple: (edits dict, number of expired entries removed)
+    """
+    raw = frappe.cache().hget(_cache_key(user), "data")
+    if not raw:
+        return {}, 0
+
+    edits = decode_records(raw)
+    cutoff = time.time() - settings["ttl_seconds"]
+    expired = [attendance for attendance, edit in edits.items() if _saved_at(edit) < cutoff]
+    for attendance in expired:
+        del edits[attendance]
+
+    if expired:
+        _incr_stat("evicted_expired", len(expired))
+    return edits, len(expired)
+
+
+def _store_edits(user, edits, settings):
+    """
+    Persist a user's edits and keep the global index in sync.
+    The key TTL only bounds the newest entry; older ones expire on read.
+    """
+    cache_key = _cache_key(user)
+    if edits:
+        frappe.cache().hset(cache_key, "data", encode_records(edits))
+        frappe.cache().expire(frappe.cache().make_key(cache_key), settings["ttl_seconds"])
+        frappe.cache().hset(INDEX_KEY, user, len(edits))
+    else:
+        frappe.cache().delete_key(cache_key)
+        frappe.cache().hdel(INDEX_KEY, user)
+
+
+def _evict_oldest(edits, keep):
+    """Remove the oldest entries so that at most `keep` remain"""
+    overflow = len(edits) - keep
+    if overflow <= 0:
+        return 0
+    for attendance in sorted(edits, key=lambda a: _saved_at(edits[a]))[:overflow]:
+        del edits[attendance]
+    return overflow
+
+
+def _get_index():
+    """User -> edit count for every user holding cached edits"""
+    index = frappe.cache().hgetall(INDEX_KEY) or {}
+    return {frappe.safe_decode(user): cint(count) for user, count in index.items()}
+
+
+def _enforce_global_cap(settings):
+    """
+    Trim the largest per-user caches (oldest entries first) until the
+    total number of cached edits fits within the global cap.
+    """
+    index = _get_index()
+    overflow = sum(index.values()) - settings["max_total"]
+
+    while overflow > 0 and index:
+        user = max(index, key=index.get)
+        edits, _expired = _load_edits(user, settings)
+        # Never trim a user below half of the largest remaining cache
+        removed = _evict_oldest(edits, max(len(edits) - overflow, len(edits) // 2))
+        if not removed:
+            _store_edits(user, edits, settings)
+            index.pop(user)
+            continue
+
+        _store_edits(user, edits, settings)
+        _incr_stat("evicted_capacity", removed)
+        overflow -= removed
+        index[user] = len(edits)
+
+
+def _incr_stat(name, amount=1):
+    cache = frappe.cache()
+    cache.incrby(cache.make_key(f"{STATS_PREFIX}:{name}"), amount)
+
+
+def _get_stat(name):
+    cache = frappe.cache()
+    return cint(cache.get(cache.make_key(f"{STATS_PREFIX}:{name}")))
+
+
+def evict_attendance(attendance_list):
+    """
+    Remove edits for the given attendance records from every user's cache.
+    Called once overtime for them has been approved.
+
+    Returns:
+        int: Number of entries removed
+    """
+    targets = set(attendance_list)
+    if not targets:
+        return 0
+
+    settings = get_cache_settings()
+    removed = 0
+    for user in _get_index():
+        edits, expired = _load_edits(user, settings)
+        stale = targets.intersection(edits)
+        for attendance in stale:
+            del edits[attendance]
+        if stale or expired:
+            _store_edits(user, edits, settings)
+        removed += len(stale)
+
+    if removed:
+        _incr_stat("evicted_approved", removed)
+    return removed
+
+
+# =====================================================================
+# WHITELISTED API
+# =====================================================================
 
-logging.basicConfig(level=logging.DEBUG)
 @frappe.whitelist()
 def save_edit(attendance, approved_hours):
     """
     Save an overtime edit to server cache
-    
+
     Args:
         attendance: Attendance record ID (e.g., HR-ATT-2025-00376)
         approved_hours: Edited hours (float)
-    
+
     Returns:
         dict: Success message with saved data
     """
     try:
         user = frappe.session.user
-        cache_key = f"overtime_edits_{user}"
-        
-        # Get existing edits
-        edits = frappe.cache().hget(cache_key, "data")
-        if edits:
-            edits = json.loads(edits)
-        else:
-            edits = {}
-        
+        settings = get_cache_settings()
+
+        # Get existing edits (expired entries are dropped here)
+        edits, _expired = _load_edits(user, settings)
+
         # Add/update this edit
         edits[attendance] = {
             "approved_hours": float(approved_hours),
             "timestamp": frappe.utils.now(),
+            "saved_at": time.time(),
             "edited_by": user
         }
-        
-        # Save back to cache (expires in 24 hours)
-        frappe.cache().hset(cache_key, "data", json.dumps(edits))
-        frappe.cache().expire(cache_key, 86400)  # 24 hours
-        
-        frappe.logger().info(f"Saved edit: {attendance} → {approved_hours} hrs (user: {user})")
-        
+
+        # Keep the per-user cache bounded
+        evicted = _evict_oldest(edits, settings["max_per_user"])
+        if evicted:
+            _incr_stat("evicted_capacity", evicted)
+
+        _store_edits(user, edits, settings)
+        _enforce_global_cap(settings)
+
+        logger.debug("Saved edit: %s → %s hrs (user: %s)", attendance, approved_hours, user, sample=0.1)
+
         return {
             "success": True,
             "attendance": attendance,
             "approved_hours": float(approved_hours),
-            "total_edits": len(edits)
+            "total_edits": len(edits),
+            "evicted": evicted
         }
-        
+
     except Exception as e:
         frappe.log_error(f"Error saving overtime edit: {str(e)}")
         return {
@@ -64,31 +234,34 @@ def save_edit(attendance, approved_hours):
 def get_edits():
     """
     Get all pending edits for current user
-    
+
     Returns:
         dict: All edits keyed by attendance ID
     """
     try:
         user = frappe.session.user
-        cache_key = f"overtime_edits_{user}"
-        
-        edits = frappe.cache().hget(cache_key, "data")
-        
+        settings = get_cache_settings()
+
+        edits, expired = _load_edits(user, settings)
+        if expired:
+            _store_edits(user, edits, settings)
+
         if edits:
-            edits = json.loads(edits)
-            frappe.logger().info(f"Retrieved {len(edits)} edits for user: {user}")
+            _incr_stat("hits")
+            logger.debug("Retrieved %s edits for user: %s", len(edits), user, sample=0.1)
             return {
                 "success": True,
                 "edits": edits,
                 "count": len(edits)
             }
         else:
+            _incr_stat("misses")
             return {
                 "success": True,
                 "edits": {},
                 "count": 0
             }
-            
+
     except Exception as e:
         frappe.log_error(f"Error retrieving overtime edits: {str(e)}")
         return {
@@ -102,36 +275,37 @@ def get_edits():
 def get_edit(attendance):
     """
     Get a single edit by attendance ID
-    
+
     Args:
         attendance: Attendance record ID
-    
+
     Returns:
         dict: Edit data or None
     """
     try:
         user = frappe.session.user
-        cache_key = f"overtime_edits_{user}"
-        
-        edits = frappe.cache().hget(cache_key, "data")
-        
-        if edits:
-            edits = json.loads(edits)
-            edit = edits.get(attendance)
-            
-            if edit:
-                return {
-                    "success": True,
-                    "found": True,
-                    "edit": edit
-                }
-        
+        settings = get_cache_settings()
+
+        edits, expired = _load_edits(user, settings)
+        if expired:
+            _store_edits(user, edits, settings)
+
+        edit = edits.get(attendance)
+        if edit:
+            _incr_stat("hits")
+            return {
+                "success": True,
+                "found": True,
+                "edit": edit
+            }
+
+        _incr_stat("misses")
         return {
             "success": True,
             "found": False,
             "edit": None
         }
-        
+
     except Exception as e:
         frappe.log_error(f"Error retrieving overtime edit: {str(e)}")
         return {
@@ -144,37 +318,38 @@ def get_edit(attendance):
 def delete_edit(attendance):
     """
     Delete a single edit
-    
+
     Args:
         attendance: Attendance record ID
-    
+
     Returns:
         dict: Success message
     """
     try:
         user = frappe.session.user
-        cache_key = f"overtime_edits_{user}"
-        
-        edits = frappe.cache().hget(cache_key, "data")
-        
-        if edits:
-            edits = json.loads(edits)
-            if attendance in edits:
-                del edits[attendance]
-                frappe.cache().hset(cache_key, "data", json.dumps(edits))
-                
-                return {
-                    "success": True,
-                    "deleted": True,
-                    "remaining": len(edits)
-                }
-        
+        settings = get_cache_settings()
+
+        edits, expired = _load_edits(user, settings)
+
+        if attendance in edits:
+            del edits[attendance]
+            _store_edits(user, edits, settings)
+
+            return {
+                "success": True,
+                "deleted": True,
+                "remaining": len(edits)
+            }
+
+        if expired:
+            _store_edits(user, edits, settings)
+
         return {
             "success": True,
             "deleted": False,
             "message": "Edit not found"
         }
-        
+
     except Exception as e:
         frappe.log_error(f"Error deleting overtime edit: {str(e)}")
         return {
@@ -187,30 +362,28 @@ def delete_edit(attendance):
 def clear_all_edits():
     """
     Clear all edits for current user
-    
+
     Returns:
         dict: Success message
     """
     try:
         user = frappe.session.user
-        cache_key = f"overtime_edits_{user}"
-        
+        settings = get_cache_settings()
+
         # Get count before clearing
-        edits = frappe.cache().hget(cache_key, "data")
-        count = 0
-        if edits:
-            count = len(json.loads(edits))
-        
+        edits, _expired = _load_edits(user, settings)
+        count = len(edits)
+
         # Clear cache
-        frappe.cache().delete_key(cache_key)
-        
-        frappe.logger().info(f"Cleared {count} edits for user: {user}")
-        
+        _store_edits(user, {}, settings)
+
+        logger.info("Cleared %s edits for user: %s", count, user)
+
         return {
             "success": True,
             "cleared": count
         }
-        
+
     except Exception as e:
         frappe.log_error(f"Error clearing overtime edits: {str(e)}")
         return {
@@ -223,53 +396,48 @@ def clear_all_edits():
 def mark_edits_applied(attendance_list):
     """
     Mark edits as applied after approval (removes them from cache)
-    
+
     Args:
         attendance_list: List of attendance IDs that were approved
-    
+
     Returns:
         dict: Success message
     """
     try:
         user = frappe.session.user
-        cache_key = f"overtime_edits_{user}"
-        
-        edits = frappe.cache().hget(cache_key, "data")
-        
-        if edits:
-            edits = json.loads(edits)
-            
+        settings = get_cache_settings()
+
+        edits, expired = _load_edits(user, settings)
+
+        if edits or expired:
             # Parse attendance_list if it's a string
             if isinstance(attendance_list, str):
                 attendance_list = json.loads(attendance_list)
-            
+
             # Remove applied edits
             removed = 0
             for attendance in attendance_list:
                 if attendance in edits:
                     del edits[attendance]
                     removed += 1
-            
+
             # Save updated cache
-            if edits:
-                frappe.cache().hset(cache_key, "data", json.dumps(edits))
-            else:
-                frappe.cache().delete_key(cache_key)
-            
-            frappe.logger().info(f"Marked {removed} edits as applied for user: {user}")
-            
+            _store_edits(user, edits, settings)
+
+            logger.info("Marked %s edits as applied for user: %s", removed, user)
+
             return {
                 "success": True,
                 "removed": removed,
                 "remaining": len(edits)
             }
-        
+
         return {
             "success": True,
             "removed": 0,
             "remaining": 0
         }
-        
+
     except Exception as e:
         frappe.log_error(f"Error marking edits as applied: {str(e)}")
         return {
@@ -281,45 +449,62 @@ def mark_edits_applied(attendance_list):
 @frappe.whitelist()
 def get_cache_info():
     """
-    Get information about cached edits (for debugging)
-    
+    Get information about cached edits (for debugging).
+    Reports sizes, counts and counters only - edits are not returned.
+
     Returns:
         dict: Cache statistics
     """
     try:
         user = frappe.session.user
-        cache_key = f"overtime_edits_{user}"
-        
-        edits = frappe.cache().hget(cache_key, "data")
-        
-        if edits:
-            edits = json.loads(edits)
-            
-            # Get TTL (time to live)
-            ttl = frappe.cache().ttl(cache_key)
-            
-            return {
-                "success": True,
-                "user": user,
-                "cache_key": cache_key,
-                "edit_count": len(edits),
-                "ttl_seconds": ttl,
-                "ttl_hours": round(ttl / 3600, 2),
-                "edits": edits
-            }
-        else:
-            return {
-                "success": True,
-                "user": user,
-                "cache_key": cache_key,
-                "edit_count": 0,
-                "ttl_seconds": 0,
-                "message": "No edits in cache"
+        cache_key = _cache_key(user)
+        settings = get_cache_settings()
+
+        raw = frappe.cache().hget(cache_key, "data")
+        edits, expired = _load_edits(user, settings)
+        if expired:
+            _store_edits(user, edits, settings)
+
+        ttl = max(cint(frappe.cache().ttl(frappe.cache().make_key(cache_key))), 0) if edits else 0
+        now = time.time()
+        ages = [now - _saved_at(edit) for edit in edits.values()]
+
+        index = _get_index()
+        hits = _get_stat("hits")
+        misses = _get_stat("misses")
+
+        return {
+            "success": True,
+            "user": user,
+            "cache_key": cache_key,
+            "edit_count": len(edits),
+            "payload_bytes": len(raw) if raw and edits else 0,
+            "ttl_seconds": ttl,
+            "ttl_hours": round(ttl / 3600, 2),
+            "oldest_edit_age_seconds": round(max(ages), 1) if ages else 0,
+            "newest_edit_age_seconds": round(min(ages), 1) if ages else 0,
+            "limits": {
+                "entry_ttl_hours": settings["ttl_seconds"] // 3600,
+                "max_per_user": settings["max_per_user"],
+                "max_total": settings["max_total"]
+            },
+            "global": {
+                "users": len(index),
+                "total_edits": sum(index.values())
+            },
+            "counters": {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0,
+                "evicted_expired": _get_stat("evicted_expired"),
+                "evicted_capacity": _get_stat("evicted_capacity"),
+                "evicted_approved": _get_stat("evicted_approved")
             }
-            
+        }
+
     except Exception as e:
         frappe.log_error(f"Error getting cache info: {str(e)}")
         return {
             "success": False,
             "error": str(e)
-        }
\ No newline at end of file
+        }
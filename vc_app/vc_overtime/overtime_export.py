@@ -0,0 +1,267 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_export.py
+# Streaming CSV/XLSX export of the VC Overtime Report
+# =====================================================================
+#
+# The standard report export builds the whole result in memory. Here a
+# background job runs the report as a generator pipeline:
+#   attendance pages -> chunk calculation -> overtime rows -> file writer
+# Attendance is read in keyset-paginated pages of CHUNK_SIZE (ordered by
+# date, employee, name), each page is calculated inside its own
+# prefetched context and written straight to a private file, so only
+# one chunk is held in memory whatever the date range. When the file is
+# complete the user is notified over realtime ("vc_overtime_export_ready")
+# with a link to download_export.
+#
+# Exports are kept outside private/files and no File document is
+# created (File would read the whole file back and apply max_file_size);
+# each user's exports live in their own directory, from which
+# download_export streams them. Files older than EXPORT_RETENTION_DAYS
+# are removed daily.
+#
+# The export is ordered by date ascending (the on-screen report shows
+# the newest first).
+
+import csv
+import glob
+import hashlib
+import os
+import time
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, now_datetime
+
+from vc_app.vc_overtime.overtime_context import overtime_context
+from vc_app.vc_overtime.overtime_logger import get_logger
+from vc_app.vc_overtime.overtime_processor import get_approved_overtime
+from vc_app.vc_overtime.overtime_sql import run_sql
+from vc_app.vc_overtime.report.vc_overtime_report.vc_overtime_report import (
+    calculate_rows,
+    get_attendance_query,
+    get_columns,
+    get_conditions,
+)
+
+logger = get_logger("report")
+
+CHUNK_SIZE = 1000
+FILE_FORMATS = ("csv", "xlsx")
+EXPORT_READY_EVENT = "vc_overtime_export_ready"
+EXPORT_DIR = "vc_overtime_exports"
+EXPORT_RETENTION_DAYS = 2
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+
+
+@frappe.whitelist()
+def export_overtime(filters, file_format="csv"):
+    """
+    Export the report for `filters` to CSV/XLSX in a background job
+    """
+    frappe.only_for(["HR Manager", "HR User", "System Manager"])
+
+    filters = frappe._dict(frappe.parse_json(filters) or {})
+    if file_format not in FILE_FORMATS:
+        frappe.throw(_("Unsupported export format: {0}").format(file_format))
+
+    frappe.enqueue(
+        "vc_app.vc_overtime.overtime_export.export_overtime_job",
+        queue="long",
+        timeout=7200,
+        filters=filters,
+        file_format=file_format,
+        user=frappe.session.user
+    )
+    frappe.msgprint(_("The export is being prepared. You will be notified when it is ready."), alert=True)
+
+
+def export_overtime_job(filters, file_format="csv", user=None):
+    """
+    Write the report rows to a private file and notify `user`
+
+    Returns:
+        dict: file_url (download link), rows
+    """
+    filters = frappe._dict(filters)
+    columns = [c for c in get_columns() if c["fieldname"] != "select_row"]
+
+    file_name = "vc-overtime-{}-{}-{}.{}".format(
+        (filters.get("company") and frappe.scrub(filters.company)) or "all",
+        now_datetime().strftime("%Y%m%d-%H%M%S"),
+        frappe.generate_hash(length=8),
+        file_format
+    )
+    export_dir = get_export_dir(user or frappe.session.user)
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, file_name)
+
+    writer = write_xlsx if file_format == "xlsx" else write_csv
+    try:
+        rows = writer(path, columns, iter_overtime_rows(filters))
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        frappe.log_error(title="VC Overtime export failed")
+        if user:
+            frappe.publish_realtime(
+                EXPORT_READY_EVENT, {"error": _("Overtime export failed")}, user=user
+            )
+        raise
+
+    logger.info("Exported %s overtime rows to %s", rows, file_name)
+    result = {
+        "file_url": f"/api/method/vc_app.vc_overtime.overtime_export.download_export?file_name={file_name}",
+        "rows": rows
+    }
+    if user:
+        frappe.publish_realtime(EXPORT_READY_EVENT, result, user=user)
+    return result
+
+
+def get_export_dir(user=None):
+    """Exports directory, or the directory of one user's exports"""
+    if not user:
+        return frappe.get_site_path("private", EXPORT_DIR)
+    return frappe.get_site_path("private", EXPORT_DIR, hashlib.sha1(user.encode()).hexdigest()[:16])
+
+
+@frappe.whitelist()
+def download_export(file_name):
+    """
+    Stream a finished export to the user who requested it (only their own
+    directory is looked up)
+    """
+    from werkzeug.wrappers import Response
+    from werkzeug.wsgi import wrap_file
+
+    file_name = os.path.basename(file_name or "")
+    path = os.path.join(get_export_dir(frappe.session.user), file_name)
+    if not (file_name.startswith("vc-overtime-") and os.path.isfile(path)):
+        raise frappe.DoesNotExistError(_("Export {0} not found").format(file_name))
+
+    response = Response(
+        wrap_file(frappe.local.request.environ, open(path, "rb")),
+        mimetype=CONTENT_TYPES.get(file_name.rsplit(".", 1)[-1], "application/octet-stream"),
+        direct_passthrough=True
+    )
+    response.headers["Content-Disposition"] = f'attachment; filename="{file_name}"'
+    response.headers["Content-Length"] = str(os.path.getsize(path))
+    return response
+
+
+def delete_old_exports():
+    """
+    Daily: remove exports older than EXPORT_RETENTION_DAYS, including the
+    File documents earlier versions created for exports
+    """
+    cutoff = time.time() - EXPORT_RETENTION_DAYS * 86400
+    for path in glob.glob(os.path.join(get_export_dir(), "*", "vc-overtime-*")):
+        if os.path.getmtime(path) < cutoff:
+            os.remove(path)
+
+    for name in frappe.get_all("File", filters={
+        "file_name": ["like", "vc-overtime-%"],
+        "is_private": 1,
+        "creation": ["<", add_days(now_datetime(), -EXPORT_RETENTION_DAYS)]
+    }, pluck="name"):
+        frappe.delete_doc("File", name, ignore_permissions=True)
+
+
+# =====================================================================
+# PIPELINE
+# =====================================================================
+
+def iter_attendance_chunks(filters, chunk_size=CHUNK_SIZE):
+    """
+    Yield pages of report attendance rows, keyset-paginated on
+    (attendance_date, employee, name)
+    """
+    conditions = get_conditions(filters)
+    values = dict(filters, limit=chunk_size)
+    keyset = ""
+
+    while True:
+        rows = run_sql(
+            get_attendance_query(
+                conditions + keyset,
+                order_by="a.attendance_date, a.employee, a.name"
+            ) + " LIMIT %(limit)s",
+            values,
+            as_dict=1
+        )
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+
+        last = rows[-1]
+        values.update(
+            last_date=last.attendance_date, last_employee=last.employee, last_name=last.attendance
+        )
+        # Written out rather than as a row comparison so MariaDB seeks the
+        # (attendance_date, employee, name) index
+        keyset = """
+            AND (a.attendance_date > %(last_date)s OR (a.attendance_date = %(last_date)s
+                AND (a.employee > %(last_employee)s OR (a.employee = %(last_employee)s
+                    AND a.name > %(last_name)s))))
+        """
+
+
+def calculate_chunk(chunk, company=None):
+    """
+    Overtime for one page of attendance, with its own context and
+    approved-overtime lookup
+    """
+    from_date = min(row.attendance_date for row in chunk)
+    to_date = max(row.attendance_date for row in chunk)
+
+    approved_days, approved_attendance = get_approved_overtime(from_date, to_date, company)
+    with overtime_context(
+        [row.employee for row in chunk], [row.company for row in chunk], from_date, to_date
+    ):
+        calculate_rows(chunk, approved_days, approved_attendance)
+
+    return [row for row in chunk if row.get("overtime_hours", 0) > 0]
+
+
+def iter_overtime_rows(filters, chunk_size=CHUNK_SIZE):
+    """
+    Report rows with overtime, one calculated chunk at a time
+    """
+    for chunk in iter_attendance_chunks(filters, chunk_size):
+        yield from calculate_chunk(chunk, filters.get("company"))
+
+
+# =====================================================================
+# WRITERS
+# =====================================================================
+
+def write_csv(path, columns, rows):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([c["label"] for c in columns])
+        for row in rows:
+            writer.writerow([row.get(c["fieldname"]) for c in columns])
+            count += 1
+    return count
+
+
+def write_xlsx(path, columns, rows):
+    from openpyxl import Workbook
+
+    # write_only keeps a constant-size buffer instead of the whole sheet
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(_("Overtime"))
+    sheet.append([c["label"] for c in columns])
+
+    count = 0
+    for row in rows:
+        sheet.append([row.get(c["fieldname"]) for c in columns])
+        count += 1
+
+    workbook.save(path)
+    return count
@@ -0,0 +1,194 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_instrumentation.py
+# Opt-in query-count and latency breakdown for overtime entry points
+# =====================================================================
+#
+# Enabled with HR Settings > Overtime Logging > "Profile Overtime Queries".
+# Functions decorated with @instrumented("phase") are timed; while any
+# phase is open, frappe.db.sql is wrapped to count queries, database
+# time and returned rows. Query figures are inclusive: a query run by
+# get_shift_details inside calculate_overtime_for_attendance counts for
+# both phases. Python time = total time - database time.
+#
+# When the outermost phase closes, the profile is kept for the request
+# (shown in the report message) and pushed to a short Redis list read
+# by get_overtime_instrumentation().
+
+import functools
+import json
+import time
+from contextlib import contextmanager
+
+import frappe
+
+PROFILES_KEY = "vc_overtime_profiles"
+MAX_PROFILES = 50
+PHASE_FIELDS = ("calls", "queries", "rows", "db_ms", "total_ms", "python_ms")
+
+
+def is_enabled():
+    enabled = getattr(frappe.local, "vc_overtime_instrumentation", None)
+    if enabled is None:
+        enabled = frappe.local.vc_overtime_instrumentation = bool(
+            frappe.db.get_single_value("HR Settings", "enable_overtime_instrumentation")
+        )
+    return enabled
+
+
+def instrumented(phase_name):
+    """
+    Decorator: time a function as `phase_name` when instrumentation is on
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return fn(*args, **kwargs)
+            with phase(phase_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def phase(name):
+    profile = getattr(frappe.local, "vc_overtime_profile", None)
+    if profile is None:
+        profile = frappe.local.vc_overtime_profile = _start_profile(name)
+
+    entry = profile["phases"].get(name)
+    if entry is None:
+        entry = profile["phases"][name] = dict.fromkeys(PHASE_FIELDS, 0)
+
+    profile["stack"].append(entry)
+    started = time.perf_counter()
+    try:
+        yield entry
+    finally:
+        entry["calls"] += 1
+        entry["total_ms"] += (time.perf_counter() - started) * 1000
+        profile["stack"].pop()
+        if not profile["stack"]:
+            _finish_profile(profile)
+
+
+def _start_profile(entry_point):
+    db = frappe.local.db
+    previous = db.__dict__.get("sql")
+    original = db.sql
+
+    profile = {
+        "entry_point": entry_point,
+        "stack": [],
+        "phases": {},
+        "restore": (db, previous)
+    }
+
+    def sql(*args, **kwargs):
+        started = time.perf_counter()
+        result = original(*args, **kwargs)
+        elapsed = (time.perf_counter() - started) * 1000
+        rows = len(result) if isinstance(result, (list, tuple)) else 0
+
+        for entry in {id(e): e for e in profile["stack"]}.values():
+            entry["queries"] += 1
+            entry["db_ms"] += elapsed
+            entry["rows"] += rows
+        return result
+
+    db.sql = sql
+    return profile
+
+
+def _finish_profile(profile):
+    db, previous = profile["restore"]
+    if previous is None:
+        db.__dict__.pop("sql", None)
+    else:
+        db.sql = previous
+    frappe.local.vc_overtime_profile = None
+
+    phases = {}
+    for name, entry in profile["phases"].items():
+        entry["python_ms"] = max(0, entry["total_ms"] - entry["db_ms"])
+        phases[name] = {
+            field: round(entry[field], 2) if field.endswith("_ms") else entry[field]
+            for field in PHASE_FIELDS
+        }
+
+    summary = {
+        "entry_point": profile["entry_point"],
+        "user": frappe.session.user,
+        "timestamp": frappe.utils.now(),
+        "phases": phases
+    }
+    frappe.local.vc_overtime_last_profile = summary
+
+    cache = frappe.cache()
+    cache.lpush(PROFILES_KEY, frappe.as_json(summary, indent=None))
+    cache.ltrim(PROFILES_KEY, 0, MAX_PROFILES - 1)
+
+
+def get_last_profile():
+    return getattr(frappe.local, "vc_overtime_last_profile", None)
+
+
+def render_profile(profile):
+    """
+    HTML breakdown for the report message area
+    """
+    if not profile:
+        return ""
+
+    rows = "".join(
+        "<tr><td>{}</td>{}</tr>".format(
+            frappe.utils.escape_html(name),
+            "".join(f"<td style='text-align:right'>{values[field]}</td>" for field in PHASE_FIELDS)
+        )
+        for name, values in sorted(
+            profile["phases"].items(), key=lambda item: item[1]["total_ms"], reverse=True
+        )
+    )
+    header = "".join(f"<th style='text-align:right'>{field}</th>" for field in PHASE_FIELDS)
+
+    return (
+        "<table class='table table-bordered table-condensed' style='font-size:11px'>"
+        f"<thead><tr><th>phase</th>{header}</tr></thead><tbody>{rows}</tbody></table>"
+    )
+
+
+@frappe.whitelist()
+def get_overtime_instrumentation(limit=20):
+    """
+    Recent profiles and their per-phase totals
+
+    Returns:
+        dict: {"profiles": [...], "totals": {entry_point: {phase: {...}}}}
+    """
+    frappe.only_for(["System Manager", "HR Manager"])
+
+    limit = min(frappe.utils.cint(limit) or 20, MAX_PROFILES)
+    profiles = [
+        json.loads(frappe.safe_decode(p)) for p in frappe.cache().lrange(PROFILES_KEY, 0, limit - 1)
+    ]
+
+    totals = {}
+    for profile in profiles:
+        by_phase = totals.setdefault(profile["entry_point"], {})
+        for name, values in profile["phases"].items():
+            total = by_phase.setdefault(name, dict.fromkeys(PHASE_FIELDS, 0))
+            for field in PHASE_FIELDS:
+                total[field] = round(total[field] + values[field], 2)
+
+    return {
+        "enabled": is_enabled(),
+        "profiles": profiles,
+        "totals": totals
+    }
+
+
+@frappe.whitelist()
+def clear_overtime_instrumentation():
+    frappe.only_for(["System Manager"])
+    frappe.cache().delete_key(PROFILES_KEY)
+    return {"success": True}
@@ -0,0 +1,196 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_ledger.py
+# Append-only overtime ledger (one row per approved attendance)
+# =====================================================================
+#
+# Rows are bulk-inserted at approval time and linked to the Salary Slip
+# that pays them on slip submit, so overtime history can be read with
+# range scans on (employee, attendance_date) instead of joining
+# Additional Salary custom fields or parsing Salary Detail references.
+# Rows are never updated in value or deleted: cancelling an overtime
+# Additional Salary appends a "Reversal" row (negated hours and amount,
+# same Additional Salary) for each of its rows and returns their
+# attendance to pending. Balances are SUMs over all entries.
+
+import frappe
+from frappe.utils import flt, getdate, now
+
+from vc_app.vc_overtime.overtime_rollup import add_pending_delta, add_rollup_delta, apply_rollup_deltas
+
+LEDGER_DOCTYPE = "Overtime Ledger Entry"
+
+LEDGER_FIELDS = (
+    "employee",
+    "attendance",
+    "attendance_date",
+    "overtime_type",
+    "company",
+    "overtime_hours",
+    "hourly_rate",
+    "overtime_multiplier",
+    "amount",
+    "additional_salary",
+    "payroll_date",
+    "entry_type"
+)
+
+ENTRY_APPROVAL = "Approval"
+ENTRY_REVERSAL = "Reversal"
+
+
+def make_ledger_entry(attendance_name, att_data, ot_calc, final_hours, final_amount, additional_salary):
+    """
+    Build a ledger row for an approved attendance (written later in bulk)
+    """
+    return {
+        "employee": att_data['employee'],
+        "attendance": attendance_name,
+        "attendance_date": getdate(att_data['attendance_date']),
+        "overtime_type": ot_calc['overtime_type'],
+        "company": att_data['company'],
+        "overtime_hours": flt(final_hours, 2),
+        "hourly_rate": flt(ot_calc['hourly_rate'], 2),
+        "overtime_multiplier": flt(ot_calc['overtime_multiplier'], 2),
+        "amount": flt(final_amount, 2),
+        "additional_salary": additional_salary.name,
+        "payroll_date": getdate(additional_salary.payroll_date),
+        "entry_type": ENTRY_APPROVAL
+    }
+
+
+def write_ledger_entries(entries):
+    """
+    Insert ledger rows in one bulk statement
+    """
+    if not entries:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus", *LEDGER_FIELDS]
+    values = [
+        [frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0]
+        + [entry.get(field) for field in LEDGER_FIELDS]
+        for entry in entries
+    ]
+
+    frappe.db.bulk_insert(LEDGER_DOCTYPE, fields, values)
+
+
+def link_salary_slip(slip):
+    """
+    Reference the slip on the ledger rows of the Additional Salaries its
+    earnings pay (aggregated rows list several, comma-separated)
+    """
+    additional_salaries = {
+        name.strip()
+        for row in slip.get("earnings") or []
+        for name in (row.get("additional_salary") or "").split(",")
+        if name.strip()
+    }
+    if not additional_salaries:
+        return
+
+    frappe.db.sql("""
+        UPDATE `tabOvertime Ledger Entry`
+        SET salary_slip = %(slip)s
+        WHERE additional_salary IN %(additional_salaries)s
+            AND employee = %(employee)s
+            AND IFNULL(salary_slip, '') = ''
+    """, {
+        "slip": slip.name,
+        "additional_salaries": tuple(additional_salaries),
+        "employee": slip.employee
+    })
+
+
+def unlink_salary_slip(slip):
+    frappe.db.sql("""
+        UPDATE `tabOvertime Ledger Entry`
+        SET salary_slip = NULL
+        WHERE salary_slip = %s
+    """, (slip.name,))
+
+
+def reverse_additional_salary(doc, method=None):
+    """
+    Additional Salary on_cancel hook (overtime only): append a reversal for
+    each ledger row of the cancelled document, clear the approval on their
+    attendance and move them from approved back to pending in the rollup
+    """
+    if not doc.get("is_overtime_salary"):
+        return
+
+    rows = frappe.db.sql("""
+        SELECT l.name, l.attendance, l.employee, e.employee_name, e.department, l.company,
+            l.attendance_date, l.overtime_type, l.overtime_hours, l.hourly_rate,
+            l.overtime_multiplier, l.amount, l.additional_salary, l.payroll_date,
+            a.calculated_overtime_hours, a.calculated_overtime_amount
+        FROM `tabOvertime Ledger Entry` l
+        INNER JOIN `tabEmployee` e ON e.name = l.employee
+        LEFT JOIN `tabAttendance` a ON a.name = l.attendance
+        WHERE l.additional_salary = %(additional_salary)s
+            AND IFNULL(l.entry_type, %(approval)s) = %(approval)s
+            AND NOT EXISTS (
+                SELECT 1 FROM `tabOvertime Ledger Entry` r
+                WHERE r.additional_salary = l.additional_salary
+                    AND r.attendance = l.attendance
+                    AND r.entry_type = %(reversal)s
+            )
+    """, {
+        "additional_salary": doc.name,
+        "approval": ENTRY_APPROVAL,
+        "reversal": ENTRY_REVERSAL
+    }, as_dict=True)
+    if not rows:
+        return
+
+    reversals = []
+    deltas = {}
+    for row in rows:
+        reversals.append(dict(
+            {field: row.get(field) for field in LEDGER_FIELDS},
+            overtime_hours=-flt(row.overtime_hours),
+            amount=-flt(row.amount),
+            entry_type=ENTRY_REVERSAL
+        ))
+        add_rollup_delta(
+            deltas, row,
+            approved_count=-1,
+            approved_hours=-flt(row.overtime_hours),
+            approved_amount=-flt(row.amount)
+        )
+        add_pending_delta(deltas, row)
+
+    frappe.db.sql("""
+        UPDATE `tabAttendance`
+        SET is_overtime_approved = 0, overtime_additional_salary = NULL
+        WHERE overtime_additional_salary = %s
+    """, (doc.name,))
+    write_ledger_entries(reversals)
+    apply_rollup_deltas(deltas)
+
+
+def get_overtime_history(employee=None, from_date=None, to_date=None, company=None):
+    """
+    Ledger rows for a date range (range scan on attendance_date),
+    reversals included: sum hours and amounts for balances
+    """
+    filters = {}
+    if employee:
+        filters["employee"] = employee
+    if company:
+        filters["company"] = company
+    if from_date and to_date:
+        filters["attendance_date"] = ["between", [getdate(from_date), getdate(to_date)]]
+    elif from_date:
+        filters["attendance_date"] = [">=", getdate(from_date)]
+    elif to_date:
+        filters["attendance_date"] = ["<=", getdate(to_date)]
+
+    return frappe.get_all(
+        LEDGER_DOCTYPE,
+        filters=filters,
+        fields=["name", *LEDGER_FIELDS, "salary_slip"],
+        order_by="attendance_date asc"
+    )
@@ -0,0 +1,178 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_live.py
+# Real-time provisional overtime from Employee Checkin ingestion
+# =====================================================================
+#
+# Each Employee Checkin (after_insert) updates a small per-employee,
+# per-day state in Redis: first IN, latest OUT and the shift context
+# resolved on the first checkin of the day. Provisional overtime is
+# recomputed from that state in O(1), so the "overtime in progress
+# today" board never scans the checkin table.
+#
+# The update runs in a "short" queue job enqueued after the checkin
+# commits, so checkin ingestion (biometric sync) never waits on the
+# per-employee lock or fails because of the board; a failed update is
+# logged and skipped.
+
+from datetime import datetime
+
+import frappe
+from frappe.utils import add_days, cint, flt, get_datetime, getdate, now_datetime, today
+
+from vc_app.vc_overtime.overtime_calculator import get_shift_details
+from vc_app.vc_overtime.overtime_logger import get_logger
+
+logger = get_logger("live")
+
+STANDARD_SECONDS = 8 * 3600
+
+# Keep yesterday's state around for night shifts that end after midnight
+STATE_TTL_SECONDS = 2 * 86400
+
+LOCK_TIMEOUT_SECONDS = 10
+
+
+def _state_key(date):
+    return f"overtime_live|{getdate(date)}"
+
+
+def on_checkin(doc, method=None):
+    """
+    Employee Checkin after_insert hook: update the live state in the
+    background once the checkin is committed
+    """
+    try:
+        frappe.enqueue(
+            "vc_app.vc_overtime.overtime_live.update_live_state",
+            queue="short",
+            enqueue_after_commit=True,
+            checkin={
+                "employee": doc.employee,
+                "employee_name": doc.employee_name,
+                "time": str(doc.time),
+                "log_type": doc.log_type
+            }
+        )
+    except Exception:
+        logger.warning("Live overtime update not queued for checkin %s", doc.name)
+
+
+def update_live_state(checkin):
+    """
+    Apply one checkin to the live state
+    """
+    doc = frappe._dict(checkin)
+    cache = frappe.cache()
+    try:
+        # Checkins of one employee can be processed concurrently (device sync,
+        # workers); the read-modify-write of the state is serialised per employee
+        with cache.lock(cache.make_key(f"overtime_live_lock|{doc.employee}"),
+                        timeout=LOCK_TIMEOUT_SECONDS, blocking_timeout=LOCK_TIMEOUT_SECONDS):
+            _update_state(doc)
+    except Exception as e:
+        logger.warning("Live overtime update skipped for %s at %s: %s", doc.employee, doc.time, e)
+
+
+def _update_state(doc):
+    checkin_time = get_datetime(doc.time)
+    checkin_ts = checkin_time.timestamp()
+    date = checkin_time.date()
+
+    state = frappe.cache().hget(_state_key(date), doc.employee)
+
+    # An OUT with no state today may close yesterday's (night) shift
+    if state is None and doc.log_type == "OUT":
+        yesterday = add_days(date, -1)
+        previous = frappe.cache().hget(_state_key(yesterday), doc.employee)
+        if previous and not previous.get("last_out"):
+            date, state = yesterday, previous
+
+    if state is None:
+        state = _new_state(doc, date)
+
+    is_out = doc.log_type == "OUT" or (not doc.log_type and state["first_in"] is not None)
+    if is_out:
+        if state["last_out"] is None or checkin_ts > state["last_out"]:
+            state["last_out"] = checkin_ts
+    elif state["first_in"] is None or checkin_ts < state["first_in"]:
+        state["first_in"] = checkin_ts
+
+    state["provisional_hours"] = provisional_overtime_hours(state)
+
+    key = _state_key(date)
+    frappe.cache().hset(key, doc.employee, state)
+    frappe.cache().expire(frappe.cache().make_key(key), STATE_TTL_SECONDS)
+
+
+def _new_state(doc, date):
+    """
+    State for the first checkin of the day (resolves the shift once)
+    """
+    shift = get_shift_details(doc.employee, date)
+    return {
+        "employee": doc.employee,
+        "employee_name": doc.employee_name,
+        "department": frappe.db.get_value("Employee", doc.employee, "department"),
+        "shift_type": shift['shift_type'] if shift else None,
+        "allowance_seconds": cint(shift['overtime_allowance_minutes']) * 60 if shift else 0,
+        "first_in": None,
+        "last_out": None,
+        "provisional_hours": 0
+    }
+
+
+def provisional_overtime_hours(state, now=None):
+    """
+    Same formula as the calculator: worked - 8 hours - allowance.
+    Without an OUT yet, time worked so far is measured up to `now`.
+    """
+    if state["first_in"] is None:
+        return 0
+
+    end = state["last_out"] if state["last_out"] is not None else now
+    if end is None:
+        return 0
+
+    overtime_seconds = end - state["first_in"] - STANDARD_SECONDS - state["allowance_seconds"]
+    return flt(max(0, overtime_seconds) / 3600, 2)
+
+
+@frappe.whitelist()
+def get_live_overtime(date=None, department=None):
+    """
+    Live "overtime in progress" board for a day (default: today)
+
+    Returns:
+        list of dicts sorted by provisional overtime, highest first
+    """
+    frappe.has_permission("Attendance", "read", throw=True)
+
+    states = frappe.cache().hgetall(_state_key(date or today())) or {}
+    now = now_datetime().timestamp()
+
+    board = []
+    for state in states.values():
+        if department and state.get("department") != department:
+            continue
+
+        in_progress = state["last_out"] is None
+        board.append({
+            "employee": state["employee"],
+            "employee_name": state["employee_name"],
+            "department": state.get("department"),
+            "shift_type": state["shift_type"],
+            "first_in": _to_datetime(state["first_in"]),
+            "last_out": _to_datetime(state["last_out"]),
+            "in_progress": in_progress,
+            "provisional_overtime_hours": provisional_overtime_hours(state, now) if in_progress
+                else state["provisional_hours"]
+        })
+
+    board.sort(key=lambda row: row["provisional_overtime_hours"], reverse=True)
+    return board
+
+
+def _to_datetime(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp)
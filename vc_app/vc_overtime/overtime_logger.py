@@ -0,0 +1,112 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_logger.py
+# Level-gated, lazily formatted logger for the overtime module
+# =====================================================================
+#
+# Usage:
+#     from vc_app.vc_overtime.overtime_logger import get_logger
+#     logger = get_logger("edit_cache")
+#     logger.debug("Saved edit: %s -> %s hrs", attendance, hours, sample=0.01)
+#
+# Levels are configured per subsystem in HR Settings > Overtime Logging
+# ("Log Levels"), one "subsystem=LEVEL" per line; "*" sets the default.
+# Nothing is read or configured at import time.
+
+import logging
+import random
+
+import frappe
+
+LOGGER_NAME = "vc_overtime"
+DEFAULT_LEVEL = logging.WARNING
+LEVELS_CACHE_KEY = "vc_overtime_log_levels"
+
+_loggers = {}
+
+
+def get_logger(subsystem):
+    """
+    Get the overtime logger for a subsystem (edit_cache, calculator, processor, ...)
+    """
+    if subsystem not in _loggers:
+        _loggers[subsystem] = OvertimeLogger(subsystem)
+    return _loggers[subsystem]
+
+
+class OvertimeLogger:
+    """
+    Thin wrapper around frappe.logger("vc_overtime").
+
+    Every call first checks the configured level for the subsystem, so a
+    disabled message costs one dict lookup: the message is only formatted
+    (%-style, by the logging module) when it is actually emitted.
+    Pass sample=<0..1> on hot paths to emit only a fraction of messages.
+    """
+
+    def __init__(self, subsystem):
+        self.subsystem = subsystem
+
+    def is_enabled_for(self, level):
+        return level >= get_level(self.subsystem)
+
+    def debug(self, msg, *args, sample=None):
+        self._log(logging.DEBUG, msg, args, sample)
+
+    def info(self, msg, *args, sample=None):
+        self._log(logging.INFO, msg, args, sample)
+
+    def warning(self, msg, *args, sample=None):
+        self._log(logging.WARNING, msg, args, sample)
+
+    def error(self, msg, *args, sample=None):
+        self._log(logging.ERROR, msg, args, sample)
+
+    def _log(self, level, msg, args, sample):
+        if not self.is_enabled_for(level):
+            return
+        if sample is not None and random.random() >= sample:
+            return
+
+        logger = frappe.logger(LOGGER_NAME, allow_site=True)
+        if logger.level > level:
+            # Gating already happened above; let the module logger pass it through
+            logger.setLevel(level)
+        logger.log(level, f"[{self.subsystem}] {msg}", *args)
+
+
+def get_level(subsystem):
+    """
+    Effective level for a subsystem, cached per request and in Redis
+    """
+    levels = getattr(frappe.local, "vc_overtime_log_levels", None)
+    if levels is None:
+        levels = frappe.cache().get_value(LEVELS_CACHE_KEY, generator=_load_levels)
+        frappe.local.vc_overtime_log_levels = levels
+
+    return levels.get(subsystem, levels.get("*", DEFAULT_LEVEL))
+
+
+def _load_levels():
+    """
+    Parse HR Settings "overtime_log_levels", e.g.:
+        *=WARNING
+        edit_cache=DEBUG
+    """
+    config = frappe.db.get_single_value("HR Settings", "overtime_log_levels") or ""
+    levels = {}
+    for line in config.splitlines():
+        if "=" not in line:
+            continue
+        subsystem, level_name = (part.strip() for part in line.split("=", 1))
+        level = logging.getLevelName(level_name.upper())
+        if subsystem and isinstance(level, int):
+            levels[subsystem] = level
+    return levels
+
+
+def clear_level_cache(doc=None, method=None):
+    """
+    HR Settings on_update hook: pick up changed log levels
+    """
+    frappe.cache().delete_value(LEVELS_CACHE_KEY)
+    frappe.local.vc_overtime_log_levels = None
@@ -0,0 +1,213 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_metrics.py
+# Prometheus metrics for the overtime module, aggregated in Redis
+# =====================================================================
+#
+# Observations are buffered per request/job in frappe.local and written
+# to one Redis hash in a single pipeline by the after_request / after_job
+# hooks, so every worker adds to the same counters. Hash fields are
+# stored as Prometheus series names (histograms already cumulative):
+#     vc_overtime_report_build_seconds_bucket{le="0.5"}  ->  12
+#
+# Scrape (System Manager API key):
+#     GET /api/method/vc_app.vc_overtime.overtime_metrics.metrics
+#     Authorization: token <api_key>:<api_secret>
+
+import functools
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint
+from werkzeug.wrappers import Response
+
+METRICS_KEY = "vc_overtime_metrics"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# name: (type, help, buckets)
+METRICS = {
+    "vc_overtime_report_build_seconds": (
+        "histogram", "VC Overtime Report get_data duration", LATENCY_BUCKETS),
+    "vc_overtime_report_rows_scanned_total": (
+        "counter", "Attendance rows read by the overtime report", None),
+    "vc_overtime_report_rows_returned_total": (
+        "counter", "Rows with overtime returned by the overtime report", None),
+    "vc_overtime_calculation_seconds": (
+        "histogram", "calculate_overtime_for_attendance duration", LATENCY_BUCKETS),
+    "vc_overtime_approvals_total": (
+        "counter", "Attendance overtime approved", None),
+    "vc_overtime_rejections_total": (
+        "counter", "Attendance overtime rejected", None),
+    "vc_overtime_processing_errors_total": (
+        "counter", "Approve/reject rows that failed", None),
+    "vc_overtime_additional_salary_seconds": (
+        "histogram", "Overtime Additional Salary insert/submit duration", LATENCY_BUCKETS),
+    "vc_overtime_edit_cache_hits_total": (
+        "counter", "Edit cache lookups that found an edit", None),
+    "vc_overtime_edit_cache_misses_total": (
+        "counter", "Edit cache lookups without an edit", None),
+    "vc_overtime_edit_cache_evictions_total": (
+        "counter", "Edits evicted from the edit cache", None),
+    "vc_overtime_edit_cache_entries": (
+        "gauge", "Edits currently cached (all users)", None),
+    "vc_overtime_edit_cache_users": (
+        "gauge", "Users holding cached edits", None)
+}
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _buffer():
+    buffer = getattr(frappe.local, "vc_overtime_metrics_buffer", None)
+    if buffer is None:
+        buffer = frappe.local.vc_overtime_metrics_buffer = {}
+    return buffer
+
+
+def inc(name, amount=1, **labels):
+    """
+    Add to a counter (buffered until the end of the request/job)
+    """
+    if amount:
+        series = _series(name, labels)
+        buffer = _buffer()
+        buffer[series] = buffer.get(series, 0) + amount
+
+
+def observe(name, value, **labels):
+    """
+    Record a histogram observation (seconds)
+    """
+    buffer = _buffer()
+    for le in METRICS[name][2]:
+        if value <= le:
+            series = _series(name + "_bucket", {**labels, "le": le})
+            buffer[series] = buffer.get(series, 0) + 1
+    for suffix, amount in (("_bucket", 1), ("_sum", value), ("_count", 1)):
+        series_labels = {**labels, "le": "+Inf"} if suffix == "_bucket" else labels
+        series = _series(name + suffix, series_labels)
+        buffer[series] = buffer.get(series, 0) + amount
+
+
+@contextmanager
+def timer(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def timed(name):
+    """
+    Decorator: observe a function's duration in histogram `name`
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def flush(*args, **kwargs):
+    """
+    after_request / after_job hook: write buffered metrics in one pipeline
+    """
+    buffer = getattr(frappe.local, "vc_overtime_metrics_buffer", None)
+    if not buffer:
+        return
+    frappe.local.vc_overtime_metrics_buffer = {}
+
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(METRICS_KEY)
+        pipe = cache.pipeline(transaction=False)
+        for series, amount in buffer.items():
+            pipe.hincrbyfloat(key, series, amount)
+        pipe.execute()
+    except Exception:
+        # Metrics must never break the request they describe
+        frappe.log_error(title="VC Overtime metrics flush failed")
+
+
+# =====================================================================
+# EXPOSITION
+# =====================================================================
+
+def _edit_cache_series():
+    from vc_app.vc_overtime.overtime_edit_cache import _get_index, _get_stat
+
+    index = _get_index()
+    return {
+        "vc_overtime_edit_cache_hits_total": _get_stat("hits"),
+        "vc_overtime_edit_cache_misses_total": _get_stat("misses"),
+        _series("vc_overtime_edit_cache_evictions_total", {"reason": "expired"}): _get_stat("evicted_expired"),
+        _series("vc_overtime_edit_cache_evictions_total", {"reason": "capacity"}): _get_stat("evicted_capacity"),
+        _series("vc_overtime_edit_cache_evictions_total", {"reason": "approved"}): _get_stat("evicted_approved"),
+        "vc_overtime_edit_cache_entries": sum(index.values()),
+        "vc_overtime_edit_cache_users": len(index)
+    }
+
+
+def render_metrics():
+    """
+    Prometheus text exposition format (0.0.4)
+    """
+    cache = frappe.cache()
+    values = {
+        frappe.safe_decode(field): float(value)
+        for field, value in cache.hscan_iter(cache.make_key(METRICS_KEY))
+    }
+    values.update(_edit_cache_series())
+
+    by_metric = {}
+    for series, value in values.items():
+        base = series.split("{", 1)[0]
+        for suffix in ("_bucket", "_sum", "_count"):
+            if base.endswith(suffix) and base[:-len(suffix)] in METRICS:
+                base = base[:-len(suffix)]
+                break
+        by_metric.setdefault(base, []).append((series, value))
+
+    lines = []
+    for name, (metric_type, help_text, _buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for series, value in sorted(by_metric.get(name, []), key=_series_sort_key):
+            lines.append(f"{series} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _series_sort_key(item):
+    series = item[0]
+    # Keep histogram buckets in ascending le order
+    if 'le="' in series:
+        le = series.split('le="', 1)[1].split('"', 1)[0]
+        return (series.split("{", 1)[0], series.split('le="', 1)[0], float("inf") if le == "+Inf" else float(le))
+    return (series, "", 0)
+
+
+def _format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+@frappe.whitelist()
+def metrics():
+    frappe.only_for(["System Manager"])
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+@frappe.whitelist()
+def reset_metrics():
+    frappe.only_for(["System Manager"])
+    frappe.cache().delete_key(METRICS_KEY)
+    return {"success": True}
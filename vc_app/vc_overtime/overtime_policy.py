@@ -0,0 +1,113 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_policy.py
+# Compiled per-Shift-Type overtime policy table
+# =====================================================================
+#
+# A Shift Type's Holiday/Sunday calculation types, comp-off settings and
+# overtime allowance are compiled together with the HR Settings
+# multipliers into a three-entry table indexed by day code:
+#
+#     table = get_policy_table(shift_type)
+#     policy = table[DAY_CODES[overtime_type]]
+#     overtime_hours = max(0, worked_hours - policy['deduction_hours'])
+#
+# Each entry holds:
+#   deduction_hours      8 + allowance ("Extra Hours ...") or 0 ("All Hours ...")
+#   multiplier           weekday / holiday / sunday multiplier
+#   calculation_type     the configured mode (Normal days: "Extra Hours Only")
+#   comp_off_leave_type  set only for the "+ Comp Off" modes
+#   comp_off_min_hours   worked hours needed for comp off
+#
+# Tables are cached in Redis and cleared on Shift Type / HR Settings update.
+
+import frappe
+from frappe.utils import cint, flt
+
+POLICY_TABLES_CACHE_KEY = "vc_overtime_policy_tables"
+
+DAY_NORMAL, DAY_HOLIDAY, DAY_SUNDAY = 0, 1, 2
+DAY_CODES = {None: DAY_NORMAL, "Normal": DAY_NORMAL, "Holiday": DAY_HOLIDAY, "Sunday": DAY_SUNDAY}
+
+STANDARD_HOURS = 8.0
+EXTRA_HOURS_ONLY = "Extra Hours Only"
+ALL_HOURS_TYPES = ("All Hours as Overtime", "All Hours + Comp Off")
+COMP_OFF_TYPES = ("All Hours + Comp Off", "Extra Hours + Comp Off")
+DEFAULT_COMP_OFF_LEAVE_TYPE = "Compensatory Off"
+
+
+def get_policy_table(shift_type):
+    """
+    Compiled policy table for a Shift Type (tuple indexed by day code)
+    """
+    return frappe.cache().hget(
+        POLICY_TABLES_CACHE_KEY,
+        shift_type,
+        generator=lambda: compile_policy_table(shift_type)
+    )
+
+
+def get_day_policy(shift_type, overtime_type):
+    return get_policy_table(shift_type)[DAY_CODES[overtime_type]]
+
+
+def compile_policy_table(shift_type):
+    shift = frappe.db.get_value("Shift Type", shift_type, [
+        "overtime_allowance_minutes",
+        "holiday_overtime_calculation_type", "holiday_comp_off_leave_type", "holiday_min_hours_for_comp_off",
+        "sunday_overtime_calculation_type", "sunday_comp_off_leave_type", "sunday_min_hours_for_comp_off"
+    ], as_dict=True) or frappe._dict()
+
+    multipliers = get_multipliers()
+    extra_hours_deduction = STANDARD_HOURS + flt(cint(shift.overtime_allowance_minutes) / 60.0, 2)
+
+    table = [None, None, None]
+    table[DAY_NORMAL] = {
+        "deduction_hours": extra_hours_deduction,
+        "multiplier": multipliers["Normal"],
+        "calculation_type": EXTRA_HOURS_ONLY,
+        "comp_off_leave_type": None,
+        "comp_off_min_hours": 0
+    }
+
+    for overtime_type, day_code in (("Holiday", DAY_HOLIDAY), ("Sunday", DAY_SUNDAY)):
+        prefix = overtime_type.lower()
+        calculation_type = shift.get(f"{prefix}_overtime_calculation_type") or EXTRA_HOURS_ONLY
+        grants_comp_off = calculation_type in COMP_OFF_TYPES
+
+        table[day_code] = {
+            "deduction_hours": 0 if calculation_type in ALL_HOURS_TYPES else extra_hours_deduction,
+            "multiplier": multipliers[overtime_type],
+            "calculation_type": calculation_type,
+            "comp_off_leave_type": (
+                shift.get(f"{prefix}_comp_off_leave_type") or DEFAULT_COMP_OFF_LEAVE_TYPE
+            ) if grants_comp_off else None,
+            "comp_off_min_hours": flt(shift.get(f"{prefix}_min_hours_for_comp_off")) if grants_comp_off else 0
+        }
+
+    return tuple(table)
+
+
+def get_multipliers():
+    """
+    HR Settings multipliers per overtime type. Sunday falls back to the
+    holiday multiplier when not set.
+    """
+    weekday = flt(frappe.db.get_single_value("HR Settings", "weekday_overtime_multiplier") or 1.5, 2)
+    holiday = flt(frappe.db.get_single_value("HR Settings", "holiday_overtime_multiplier") or 2.0, 2)
+    sunday = flt(frappe.db.get_single_value("HR Settings", "sunday_overtime_multiplier") or holiday, 2)
+
+    return {"Normal": weekday, "Holiday": holiday, "Sunday": sunday}
+
+
+def is_comp_off_eligible(policy, worked_hours):
+    return bool(policy["comp_off_leave_type"]) and flt(worked_hours) >= policy["comp_off_min_hours"]
+
+
+def clear_policy_cache(doc=None, method=None):
+    """
+    Shift Type on_update / on_trash and HR Settings on_update hook
+    """
+    if doc and doc.doctype == "Shift Type":
+        frappe.cache().hdel(POLICY_TABLES_CACHE_KEY, doc.name)
+    else:
+        frappe.cache().delete_key(POLICY_TABLES_CACHE_KEY)
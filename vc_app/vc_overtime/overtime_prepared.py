@@ -0,0 +1,290 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_prepared.py
+# Background-prepared results for long-range VC Overtime Reports
+# =====================================================================
+#
+# Ranges longer than HR Settings "Prepare Reports Longer Than (Days)"
+# are not calculated in the web request. The first run enqueues a job
+# (one per filter set) that builds the rows with progress updates and
+# stores them in Redis, columnar-encoded by overtime_codec. The report
+# is refreshed over realtime when the job finishes.
+#
+# A stored result is reused for identical filters while its data
+# version matches. The version covers what the rows are computed from:
+#   - count and last modification of Attendance in the range (rejections
+#     update the attendance)
+#   - count and last modification of overtime Additional Salary, and of
+#     consolidated attendance lines by attendance date
+#   - a configuration stamp bumped by Shift Type, HR Settings, Holiday
+#     List, Employee and Salary Structure Assignment changes
+# Frappe's own prepared_report flag is not used: it applies to every
+# run and replaces the interactive report (editing, approvals).
+#
+# When the version has moved on (e.g. after an approval) the stored rows
+# keep being served while a new job refreshes them: attendance changed
+# since the result was prepared is recalculated and patched in, so the
+# report never goes blank between approvals.
+
+import hashlib
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import cint, date_diff, format_datetime, getdate, now_datetime
+
+from vc_app.vc_overtime.overtime_codec import decode_records, encode_records
+from vc_app.vc_overtime.overtime_logger import get_logger
+from vc_app.vc_overtime.overtime_sharding import sort_key
+
+logger = get_logger("report")
+
+RESULT_KEY_PREFIX = "vc_overtime_prepared_report"
+CONFIG_VERSION_KEY = "vc_overtime_config_version"
+RESULT_TTL = 24 * 3600
+PREPARED_EVENT = "vc_overtime_report_prepared"
+
+# Beyond this many changed rows the stored result is served unpatched
+PATCH_LIMIT = 2000
+
+FILTER_FIELDS = ("company", "from_date", "to_date", "employee", "department", "eligible_for_overtime")
+
+
+def get_threshold_days():
+    return cint(frappe.db.get_single_value("HR Settings", "overtime_prepared_report_days"))
+
+
+def should_prepare(filters):
+    """
+    True when the report range is long enough to be built in the background
+    """
+    threshold = get_threshold_days()
+    if threshold <= 0 or not filters:
+        return False
+    if not (filters.get("from_date") and filters.get("to_date")):
+        return False
+    return date_diff(filters.get("to_date"), filters.get("from_date")) + 1 > threshold
+
+
+def filters_hash(filters):
+    normalized = {f: str(filters.get(f)) for f in FILTER_FIELDS if filters.get(f)}
+    return hashlib.md5(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+def _result_key(filters):
+    return frappe.cache().make_key(f"{RESULT_KEY_PREFIX}:{filters_hash(filters)}")
+
+
+def get_data_version(filters):
+    """
+    Stamp that changes whenever the report rows for `filters` could change
+    """
+    values = {"from_date": getdate(filters.get("from_date")), "to_date": getdate(filters.get("to_date"))}
+    company = line_company = ""
+    if filters.get("company"):
+        company = "AND company = %(company)s"
+        line_company = "AND s.company = %(company)s"
+        values["company"] = filters.get("company")
+
+    attendance = frappe.db.sql(f"""
+        SELECT COUNT(*), MAX(modified)
+        FROM `tabAttendance`
+        WHERE attendance_date BETWEEN %(from_date)s AND %(to_date)s
+            {company}
+    """, values)[0]
+
+    additional_salary = frappe.db.sql(f"""
+        SELECT COUNT(*), MAX(modified)
+        FROM `tabAdditional Salary`
+        WHERE is_overtime_salary = 1
+            AND payroll_date BETWEEN %(from_date)s AND %(to_date)s
+            {company}
+    """, values)[0]
+
+    # Consolidated drafts are dated at period end, often outside the range,
+    # and approval does not touch Attendance.modified: follow their lines
+    consolidated = frappe.db.sql(f"""
+        SELECT COUNT(*), MAX(s.modified)
+        FROM `tabOvertime Attendance Line` l
+        INNER JOIN `tabAdditional Salary` s ON s.name = l.parent
+        WHERE l.parenttype = 'Additional Salary'
+            AND s.docstatus < 2
+            AND l.attendance_date BETWEEN %(from_date)s AND %(to_date)s
+            {line_company}
+    """, values)[0]
+
+    config = cint(frappe.cache().get(frappe.cache().make_key(CONFIG_VERSION_KEY)))
+
+    stamp = json.dumps([attendance, additional_salary, consolidated, config], default=str)
+    return hashlib.md5(stamp.encode()).hexdigest()
+
+
+def bump_config_version(doc=None, method=None):
+    """
+    Shift Type / HR Settings / Holiday List / Employee / Salary Structure
+    Assignment hook: invalidate every prepared result
+    """
+    cache = frappe.cache()
+    cache.incrby(cache.make_key(CONFIG_VERSION_KEY), 1)
+
+
+# =====================================================================
+# REPORT ENTRY
+# =====================================================================
+
+def get_prepared_data(filters):
+    """
+    Stored rows for `filters` (patched while a refresh is prepared), or
+    start preparing them.
+
+    Returns:
+        tuple: (data, message)
+    """
+    version = get_data_version(filters)
+    stored = load_result(filters)
+
+    if stored and stored["version"] == version:
+        return stored["data"], _("Prepared in the background at {0}").format(
+            format_datetime(stored["prepared_at"])
+        )
+
+    enqueue_prepare(filters, version)
+
+    if stored:
+        return patch_changed_rows(filters, stored), _(
+            "Prepared in the background at {0}, with later changes applied. A refreshed result is being prepared."
+        ).format(format_datetime(stored["prepared_at"]))
+
+    return [], _("This period is longer than {0} days and is being prepared in the background. The report refreshes when it is ready.").format(
+        get_threshold_days()
+    )
+
+
+def enqueue_prepare(filters, version):
+    frappe.enqueue(
+        "vc_app.vc_overtime.overtime_prepared.prepare_report_job",
+        queue="long",
+        timeout=7200,
+        job_id=f"{RESULT_KEY_PREFIX}:{filters_hash(filters)}",
+        deduplicate=True,
+        filters=filters,
+        version=version,
+        user=frappe.session.user
+    )
+
+
+def patch_changed_rows(filters, stored):
+    """
+    Stored rows with the attendance changed since they were prepared
+    recalculated (as get_changed_rows does for approvals)
+    """
+    from vc_app.vc_overtime.report.vc_overtime_report.vc_overtime_report import get_rows
+
+    changed = get_changed_attendance(filters, stored["prepared_at"])
+    if not changed or len(changed) > PATCH_LIMIT:
+        return stored["data"]
+
+    rows = get_rows(frappe._dict(filters, attendance=tuple(changed)))
+    # Dates and datetimes become strings, as in the stored rows
+    fresh = {row["attendance"]: row for row in json.loads(frappe.as_json(rows, indent=None))}
+
+    data = []
+    for row in stored["data"]:
+        if row["attendance"] not in changed:
+            data.append(row)
+        elif row["attendance"] in fresh:
+            data.append(fresh.pop(row["attendance"]))
+    if fresh:
+        # Newly qualifying rows go to their place in report order
+        data.extend(fresh.values())
+        data.sort(key=sort_key)
+    return data
+
+
+def get_changed_attendance(filters, since):
+    """
+    Attendance in the report range touched after `since`: the attendance
+    itself, its per-day overtime Additional Salary or its consolidated line
+    """
+    values = {
+        "from_date": getdate(filters.get("from_date")),
+        "to_date": getdate(filters.get("to_date")),
+        "since": since
+    }
+    company = line_company = ""
+    if filters.get("company"):
+        company = "AND a.company = %(company)s"
+        line_company = "AND s.company = %(company)s"
+        values["company"] = filters.get("company")
+
+    return set(frappe.db.sql_list(f"""
+        SELECT a.name
+        FROM `tabAttendance` a
+        WHERE a.attendance_date BETWEEN %(from_date)s AND %(to_date)s
+            AND a.modified > %(since)s
+            {company}
+        UNION
+        SELECT a.name
+        FROM `tabAdditional Salary` s
+        INNER JOIN `tabAttendance` a
+            ON a.employee = s.employee AND a.attendance_date = s.payroll_date
+        WHERE s.is_overtime_salary = 1
+            AND IFNULL(s.is_consolidated_overtime, 0) = 0
+            AND s.payroll_date BETWEEN %(from_date)s AND %(to_date)s
+            AND s.modified > %(since)s
+            {line_company}
+        UNION
+        SELECT l.attendance
+        FROM `tabOvertime Attendance Line` l
+        INNER JOIN `tabAdditional Salary` s ON s.name = l.parent
+        WHERE l.parenttype = 'Additional Salary'
+            AND l.attendance_date BETWEEN %(from_date)s AND %(to_date)s
+            AND s.modified > %(since)s
+            {line_company}
+    """, values))
+
+
+def load_result(filters):
+    blob = frappe.cache().get(_result_key(filters))
+    if not blob:
+        return None
+
+    header, _sep, body = blob.partition(b"\n")
+    stored = json.loads(header)
+    stored["data"] = list(decode_records(body).values())
+    return stored
+
+
+def store_result(filters, version, data):
+    header = frappe.as_json({"version": version, "prepared_at": str(now_datetime())}, indent=None)
+    # Dates and datetimes become strings, as in the report response
+    rows = json.loads(frappe.as_json(data, indent=None))
+    blob = header.encode() + b"\n" + encode_records({row["attendance"]: row for row in rows})
+    frappe.cache().set(_result_key(filters), blob, ex=RESULT_TTL)
+
+
+# =====================================================================
+# BACKGROUND JOB
+# =====================================================================
+
+def prepare_report_job(filters, version, user=None):
+    """
+    Build the report rows for `filters` and store them under `version`
+    """
+    from vc_app.vc_overtime.report.vc_overtime_report.vc_overtime_report import get_data
+
+    filters = frappe._dict(filters)
+    title = _("Preparing VC Overtime Report")
+
+    def progress(done, total):
+        frappe.publish_progress(
+            done * 100 / total, title=title, description=_("Calculated {0} of {1}").format(done, total)
+        )
+
+    data = get_data(filters, progress=progress)
+    store_result(filters, version, data)
+    logger.info("Prepared %s overtime rows for %s", len(data), filters_hash(filters))
+
+    if user:
+        frappe.publish_realtime(
+            PREPARED_EVENT, {"filters_hash": filters_hash(filters), "rows": len(data)}, user=user
+        )
@@ -3,23 +3,42 @@
 # UPDATED: Now handles approved_overtime_hours from frontend
 # =====================================================================
 
-import frappe
-from frappe import _
-from frappe.utils import flt, getdate, add_to_date, get_datetime, time_diff_in_hours
 import hashlib
+import random
 from datetime import datetime
+
+import frappe
+from frappe import _
+from frappe.utils import (
+    add_days,
+    add_to_date,
+    cint,
+    flt,
+    get_datetime,
+    get_last_day,
+    getdate,
+    time_diff_in_hours,
+    today,
+)
+
 from vc_app.vc_overtime.overtime_calculator import (
     calculate_overtime_for_attendance,
+    get_overtime_multiplier,
     get_shift_details,
-    get_overtime_multiplier
 )
-import random 
+from vc_app.vc_overtime.overtime_edit_cache import evict_attendance
+from vc_app.vc_overtime.overtime_instrumentation import instrumented
+from vc_app.vc_overtime.overtime_ledger import make_ledger_entry, write_ledger_entries
+from vc_app.vc_overtime.overtime_metrics import inc, timer
+from vc_app.vc_overtime.overtime_rollup import add_pending_delta, add_rollup_delta, apply_rollup_deltas
+from vc_app.vc_overtime.overtime_sql import run_sql
 
 # =====================================================================
 # MAIN PROCESSING FUNCTION
 # =====================================================================
 
 @frappe.whitelist()
+@instrumented("process_selected_overtime")
 def process_selected_overtime(attendance_list, action="approve"):
     """
     Process selected overtime records.
@@ -48,6 +67,9 @@ def process_selected_overtime(attendance_list, action="approve"):
         "rejected": 0,
         "errors": []
     }
+    approved_attendance = []
+    ledger_entries = []
+    rollup_deltas = {}
     
     for item in attendance_list:
         try:
@@ -64,7 +86,8 @@ def process_selected_overtime(attendance_list, action="approve"):
             
             # Get attendance data
             att_data = frappe.db.get_value("Attendance", att_name, 
-                ["employee", "attendance_date", "in_time", "out_time", "company"], 
+                ["employee", "employee_name", "department", "attendance_date", "in_time", "out_time", "company",
+                 "calculated_overtime_hours", "calculated_overtime_amount", "is_overtime_approved"],
                 as_dict=True
             )
             
@@ -78,12 +101,24 @@ def process_selected_overtime(attendance_list, action="approve"):
             
             if action == "approve":
                 # Approve and create Additional Salary
-                approve_overtime(att_name, att_data, approved_hours, has_custom_hours)
+                ledger_entry = approve_overtime(att_name, att_data, approved_hours, has_custom_hours)
+                ledger_entries.append(ledger_entry)
+                approved_attendance.append(att_name)
+
+                add_pending_delta(rollup_deltas, att_data, sign=-1)
+                add_rollup_delta(
+                    rollup_deltas, att_data,
+                    approved_count=1,
+                    approved_hours=ledger_entry['overtime_hours'],
+                    approved_amount=ledger_entry['amount']
+                )
                 results["approved"] += 1
                 results["processed"] += 1
             elif action == "reject":
                 # Reject and reset time
                 reject_overtime(att_name, att_data, approved_hours, has_custom_hours)
+                add_pending_delta(rollup_deltas, att_data, sign=-1)
+                add_rollup_delta(rollup_deltas, att_data, rejected_count=1)
                 results["rejected"] += 1
                 results["processed"] += 1
             else:
@@ -94,8 +129,20 @@ def process_selected_overtime(attendance_list, action="approve"):
             results["errors"].append(error_msg)
             frappe.log_error(error_msg, "Overtime Processing Error")
     
+    # One bulk insert into the overtime ledger for the whole batch
+    write_ledger_entries(ledger_entries)
+    apply_rollup_deltas(rollup_deltas)
+
     frappe.db.commit()
     
+    inc("vc_overtime_approvals_total", results["approved"])
+    inc("vc_overtime_rejections_total", results["rejected"])
+    inc("vc_overtime_processing_errors_total", len(results["errors"]))
+
+    # Approved rows can no longer be edited - drop their cached edits
+    if approved_attendance:
+        evict_attendance(approved_attendance)
+
     return results
 
 
@@ -103,6 +150,7 @@ def process_selected_overtime(attendance_list, action="approve"):
 # APPROVE OVERTIME
 # =====================================================================
 
+@instrumented("approve_overtime")
 def approve_overtime(attendance_name, att_data, approved_hours=0, has_custom_hours=False):
     """
     Approve overtime and create Additional Salary.
@@ -112,6 +160,9 @@ def approve_overtime(attendance_name, att_data, approved_hours=0, has_custom_hou
         att_data: Attendance data dict
         approved_hours: Manually approved hours (0 = use calculated)
         has_custom_hours: Whether hours were manually edited
+
+    Returns:
+        dict: Overtime ledger row for the approved attendance
     """
     # Check eligibility
     is_eligible = frappe.db.get_value("Employee", att_data['employee'], "eligible_for_overtime")
@@ -154,6 +205,7 @@ def approve_overtime(attendance_name, att_data, approved_hours=0, has_custom_hou
         "employee": att_data['employee'],
         "payroll_date": att_data['attendance_date'],
         "is_overtime_salary": 1,
+        "is_consolidated_overtime": 0,
         "docstatus": ["<", 2]
     })
     
@@ -162,6 +214,12 @@ def approve_overtime(attendance_name, att_data, approved_hours=0, has_custom_hou
             att_data['attendance_date']
         ))
     
+    consolidated = get_consolidated_additional_salary(attendance_name)
+    if consolidated:
+        frappe.throw(_("Overtime for {0} is already included in Additional Salary {1}").format(
+            attendance_name, consolidated
+        ))
+
     # Get salary component
     if ot_calc['overtime_type'] in ["Holiday", "Sunday"]:
         component = frappe.db.get_single_value("HR Settings", "holiday_overtime_component")
@@ -175,6 +233,27 @@ def approve_overtime(attendance_name, att_data, approved_hours=0, has_custom_hou
     if not frappe.db.exists("Salary Component", component):
         frappe.throw(_("Salary Component {0} does not exist").format(component))
     
+    if cint(frappe.db.get_single_value("HR Settings", "consolidate_overtime_additional_salary")):
+        # One draft per (employee, component, month), submitted at period close
+        add_sal = add_to_consolidated_additional_salary(
+            attendance_name, att_data, component, final_hours, final_amount, ot_calc
+        )
+        mark_attendance_approved(attendance_name, add_sal.name)
+
+        if has_custom_hours and approved_hours > 0:
+            reset_time_to_approved_hours(attendance_name, att_data, approved_hours, ot_calc)
+
+        frappe.msgprint(
+            _("Added {0} OT hours for {1} to Additional Salary {2} (period ending {3})").format(
+                final_hours,
+                att_data['employee'],
+                add_sal.name,
+                add_sal.payroll_date
+            ),
+            alert=True
+        )
+        return make_ledger_entry(attendance_name, att_data, ot_calc, final_hours, final_amount, add_sal)
+
     # Create Additional Salary
     add_sal = frappe.new_doc("Additional Salary")
     add_sal.employee = att_data['employee']
@@ -193,10 +272,15 @@ def approve_overtime(attendance_name, att_data, approved_hours=0, has_custom_hou
         add_sal.overtime_type = ot_calc['overtime_type']
     if hasattr(add_sal, 'overtime_attendance'):
         add_sal.overtime_attendance = attendance_name
+    if hasattr(add_sal, 'overtime_calculation_method'):
+        add_sal.overtime_calculation_method = ot_calc['calculation_method']
     
     # Save and submit
-    add_sal.insert(ignore_permissions=True)
-    add_sal.submit()
+    with timer("vc_overtime_additional_salary_seconds", operation="insert"):
+        add_sal.insert(ignore_permissions=True)
+    with timer("vc_overtime_additional_salary_seconds", operation="submit"):
+        add_sal.submit()
+    mark_attendance_approved(attendance_name, add_sal.name)
     
     # If custom hours used, also reset the checkout time to match
     if has_custom_hours and approved_hours > 0:
@@ -213,11 +297,277 @@ def approve_overtime(attendance_name, att_data, approved_hours=0, has_custom_hou
         alert=True
     )
 
+    return make_ledger_entry(attendance_name, att_data, ot_calc, final_hours, final_amount, add_sal)
+
+
+# =====================================================================
+# CONSOLIDATED ADDITIONAL SALARY (one per employee/component/month)
+# =====================================================================
+
+def add_to_consolidated_additional_salary(attendance_name, att_data, component, final_hours, final_amount, ot_calc):
+    """
+    Accumulate an approved day into the draft Additional Salary for
+    (employee, component, payroll period). The payroll period is the
+    calendar month; the draft is dated on its last day.
+
+    Returns:
+        Additional Salary document (draft)
+    """
+    period_end = get_last_day(att_data['attendance_date'])
+
+    # Lock the draft so concurrent approvals append to the same document
+    draft = frappe.db.get_value("Additional Salary", {
+        "employee": att_data['employee'],
+        "salary_component": component,
+        "payroll_date": period_end,
+        "is_consolidated_overtime": 1,
+        "docstatus": 0
+    }, "name", for_update=True)
+
+    if draft:
+        add_sal = frappe.get_doc("Additional Salary", draft)
+    else:
+        add_sal = frappe.new_doc("Additional Salary")
+        add_sal.employee = att_data['employee']
+        add_sal.company = att_data['company']
+        add_sal.salary_component = component
+        add_sal.payroll_date = period_end
+        add_sal.overwrite_salary_structure_amount = 0
+        add_sal.is_overtime_salary = 1
+        add_sal.is_consolidated_overtime = 1
+        add_sal.overtime_type = ot_calc['overtime_type']
+        add_sal.amount = 0
+        add_sal.overtime_hours = 0
+
+    add_sal.append("overtime_attendance_lines", {
+        "attendance": attendance_name,
+        "attendance_date": att_data['attendance_date'],
+        "overtime_type": ot_calc['overtime_type'],
+        "overtime_hours": final_hours,
+        "hourly_rate": ot_calc['hourly_rate'],
+        "overtime_multiplier": ot_calc['overtime_multiplier'],
+        "amount": final_amount
+    })
+    add_sal.amount = flt(flt(add_sal.amount) + final_amount, 2)
+    add_sal.overtime_hours = flt(flt(add_sal.overtime_hours) + final_hours, 2)
+
+    with timer("vc_overtime_additional_salary_seconds", operation="consolidate"):
+        add_sal.save(ignore_permissions=True)
+    return add_sal
+
+
+def get_consolidated_additional_salary(attendance_name):
+    """
+    Name of the consolidated Additional Salary (draft or submitted) that
+    already includes this attendance, if any.
+    """
+    result = run_sql("""
+        SELECT s.name
+        FROM `tabOvertime Attendance Line` l
+        INNER JOIN `tabAdditional Salary` s ON s.name = l.parent
+        WHERE l.attendance = %s
+            AND l.parenttype = 'Additional Salary'
+            AND s.docstatus < 2
+        LIMIT 1
+    """, (attendance_name,))
+
+    return result[0][0] if result else None
+
+
+@frappe.whitelist()
+def submit_consolidated_overtime(to_date=None, company=None, from_date=None):
+    """
+    Close overtime payroll periods: submit consolidated drafts dated on or
+    before to_date (default: yesterday).
+
+    With from_date (a payroll period, which need not be a calendar month)
+    drafts are selected by their attendance lines instead: every draft with
+    a line on or before to_date is fitted to the period and submitted.
+
+    Returns:
+        dict with submitted count and errors
+    """
+    if from_date:
+        names = get_drafts_with_lines_until(getdate(to_date), company)
+    else:
+        filters = {
+            "is_consolidated_overtime": 1,
+            "docstatus": 0,
+            "payroll_date": ["<=", getdate(to_date) if to_date else add_days(today(), -1)]
+        }
+        if company:
+            filters["company"] = company
+        names = frappe.get_all("Additional Salary", filters=filters, pluck="name")
+
+    results = {"submitted": 0, "errors": []}
+
+    for name in names:
+        try:
+            add_sal = frappe.get_doc("Additional Salary", name)
+            if from_date:
+                fit_draft_to_period(add_sal, getdate(from_date), getdate(to_date))
+            add_sal.submit()
+            results["submitted"] += 1
+        except Exception as e:
+            results["errors"].append(f"{name}: {e!s}")
+            frappe.log_error(frappe.get_traceback(), "Overtime Period Close Error")
+
+    return results
+
+
+def get_drafts_with_lines_until(to_date, company=None):
+    """
+    Consolidated drafts holding at least one attendance dated on or before to_date
+    """
+    company_condition = "AND s.company = %(company)s" if company else ""
+    return frappe.db.sql_list(f"""
+        SELECT DISTINCT s.name
+        FROM `tabAdditional Salary` s
+        INNER JOIN `tabOvertime Attendance Line` l
+            ON l.parent = s.name AND l.parenttype = 'Additional Salary'
+        WHERE s.is_consolidated_overtime = 1
+            AND s.docstatus = 0
+            AND l.attendance_date <= %(to_date)s
+            {company_condition}
+    """, {"to_date": to_date, "company": company})
+
+
+def fit_draft_to_period(add_sal, from_date, to_date):
+    """
+    Make a consolidated draft payable in the payroll period from_date..to_date:
+    lines after to_date move to a new draft (keeping the original date), and
+    the draft is re-dated to to_date when its date falls outside the period.
+    Attendance links and ledger rows follow the lines.
+    """
+    later = [line for line in add_sal.overtime_attendance_lines if getdate(line.attendance_date) > to_date]
+
+    if later:
+        remainder = frappe.copy_doc(add_sal)
+        remainder.set("overtime_attendance_lines", [])
+        for line in later:
+            remainder.append("overtime_attendance_lines", {
+                field: line.get(field)
+                for field in ("attendance", "attendance_date", "overtime_type", "overtime_hours",
+                              "hourly_rate", "overtime_multiplier", "amount")
+            })
+        _set_consolidated_totals(remainder)
+        remainder.insert(ignore_permissions=True)
+
+        moved = [line.attendance for line in later]
+        add_sal.set("overtime_attendance_lines", [
+            line for line in add_sal.overtime_attendance_lines if line.attendance not in moved
+        ])
+        _set_consolidated_totals(add_sal)
+
+        for attendance in moved:
+            mark_attendance_approved(attendance, remainder.name)
+        _relink_ledger(moved, add_sal.name, remainder.name, remainder.payroll_date)
+
+    if not (from_date <= getdate(add_sal.payroll_date) <= to_date):
+        add_sal.payroll_date = to_date
+    add_sal.save(ignore_permissions=True)
+    _relink_ledger(
+        [line.attendance for line in add_sal.overtime_attendance_lines], add_sal.name, add_sal.name,
+        add_sal.payroll_date
+    )
+
+
+def _set_consolidated_totals(add_sal):
+    for idx, line in enumerate(add_sal.overtime_attendance_lines, 1):
+        line.idx = idx
+    add_sal.amount = flt(sum(flt(line.amount) for line in add_sal.overtime_attendance_lines), 2)
+    add_sal.overtime_hours = flt(sum(flt(line.overtime_hours) for line in add_sal.overtime_attendance_lines), 2)
+
+
+def _relink_ledger(attendance_list, from_salary, additional_salary, payroll_date):
+    if not attendance_list:
+        return
+    frappe.db.sql("""
+        UPDATE `tabOvertime Ledger Entry`
+        SET additional_salary = %(additional_salary)s,
+            payroll_date = %(payroll_date)s
+        WHERE attendance IN %(attendance)s
+            AND additional_salary = %(from_salary)s
+            AND IFNULL(salary_slip, '') = ''
+    """, {
+        "from_salary": from_salary,
+        "additional_salary": additional_salary,
+        "payroll_date": getdate(payroll_date),
+        "attendance": tuple(attendance_list)
+    })
+
+
+def close_overtime_periods():
+    """
+    Scheduled daily: submit consolidated drafts of periods that have ended
+    """
+    submit_consolidated_overtime()
+
+
+def mark_attendance_approved(attendance_name, additional_salary):
+    """
+    Flag the attendance as approved and link the Additional Salary
+    """
+    frappe.db.set_value("Attendance", attendance_name, {
+        "is_overtime_approved": 1,
+        "overtime_additional_salary": additional_salary
+    }, update_modified=False)
+
+
+def get_approved_overtime(from_date=None, to_date=None, company=None):
+    """
+    Approved overtime for a date range in two queries (used by the report
+    instead of checking Additional Salary row by row).
+
+    Consolidated Additional Salaries are dated at the end of their period,
+    so they are only matched through their attendance lines.
+
+    Returns:
+        tuple: (set of (employee, date) with a per-day Additional Salary,
+                set of attendance names in consolidated Additional Salaries)
+    """
+    conditions = []
+    values = {}
+
+    if from_date:
+        conditions.append("AND {date} >= %(from_date)s")
+        values["from_date"] = getdate(from_date)
+    if to_date:
+        conditions.append("AND {date} <= %(to_date)s")
+        values["to_date"] = getdate(to_date)
+    if company:
+        conditions.append("AND s.company = %(company)s")
+        values["company"] = company
+
+    per_day = run_sql("""
+        SELECT s.employee, s.payroll_date
+        FROM `tabAdditional Salary` s
+        WHERE s.is_overtime_salary = 1
+            AND IFNULL(s.is_consolidated_overtime, 0) = 0
+            AND s.docstatus < 2
+            {conditions}
+    """.format(conditions=" ".join(conditions).format(date="s.payroll_date")), values)
+
+    consolidated = run_sql("""
+        SELECT l.attendance
+        FROM `tabOvertime Attendance Line` l
+        INNER JOIN `tabAdditional Salary` s ON s.name = l.parent
+        WHERE l.parenttype = 'Additional Salary'
+            AND s.docstatus < 2
+            {conditions}
+    """.format(conditions=" ".join(conditions).format(date="l.attendance_date")), values)
+
+    return (
+        {(employee, getdate(payroll_date)) for employee, payroll_date in per_day},
+        {row[0] for row in consolidated}
+    )
+
 
 # =====================================================================
 # REJECT OVERTIME
 # =====================================================================
 
+@instrumented("reject_overtime")
 def reject_overtime(attendance_name, att_data, approved_hours=0, has_custom_hours=False):
     """
     Reject overtime and reset checkout time.
@@ -280,7 +630,7 @@ def reject_overtime(attendance_name, att_data, approved_hours=0, has_custom_hour
         new_worked_hours = 8.0
     
     # Find the most recent OUT checkin for this attendance
-    out_checkin = frappe.db.sql("""
+    out_checkin = run_sql("""
         SELECT name, time
         FROM `tabEmployee Checkin`
         WHERE employee = %s
@@ -292,7 +642,7 @@ def reject_overtime(attendance_name, att_data, approved_hours=0, has_custom_hour
     
     if not out_checkin:
         # Try without attendance link
-        out_checkin = frappe.db.sql("""
+        out_checkin = run_sql("""
             SELECT name, time
             FROM `tabEmployee Checkin`
             WHERE employee = %s
@@ -320,12 +670,15 @@ def reject_overtime(attendance_name, att_data, approved_hours=0, has_custom_hour
         reset_time
     )
     
-    # Update working hours
+    # Update working hours; the attendance no longer has pending overtime
     frappe.db.set_value(
         "Attendance",
         attendance_name,
-        "working_hours",
-        flt(new_worked_hours, 2)
+        {
+            "working_hours": flt(new_worked_hours, 2),
+            "calculated_overtime_hours": 0,
+            "calculated_overtime_amount": 0
+        }
     )
     
     frappe.msgprint(
@@ -370,7 +723,7 @@ def reset_time_to_approved_hours(attendance_name, att_data, approved_hours, ot_c
     new_out_time = add_to_date(new_out_time, minutes=variance_minutes)
     
     # Update Employee Checkin
-    out_checkin = frappe.db.sql("""
+    out_checkin = run_sql("""
         SELECT name
         FROM `tabEmployee Checkin`
         WHERE employee = %s
@@ -448,9 +801,12 @@ def get_overtime_details(attendance_name):
         "employee": att_data['employee'],
         "payroll_date": att_data['attendance_date'],
         "is_overtime_salary": 1,
+        "is_consolidated_overtime": 0,
         "docstatus": ["<", 2]
     }, ["name", "amount"], as_dict=True)
     
+    consolidated = get_consolidated_additional_salary(attendance_name)
+
     return {
         "overtime_hours": ot_calc['overtime_hours'],
         "overtime_type": ot_calc['overtime_type'],
@@ -459,6 +815,6 @@ def get_overtime_details(attendance_name):
         "overtime_threshold": ot_calc['overtime_threshold'],
         "allowance_minutes": ot_calc['allowance_minutes'],
         "is_eligible": ot_calc['is_eligible'],
-        "is_approved": bool(additional_salary),
-        "additional_salary": additional_salary.name if additional_salary else None
+        "is_approved": bool(additional_salary or consolidated),
+        "additional_salary": additional_salary.name if additional_salary else consolidated
     }
\ No newline at end of file
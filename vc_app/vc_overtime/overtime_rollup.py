@@ -0,0 +1,307 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_rollup.py
+# Materialised monthly overtime totals (per employee, summed per department)
+# =====================================================================
+#
+# Overtime Monthly Rollup holds one row per (employee, month) with
+# pending / approved / rejected counts, hours and amounts. Rows are
+# updated incrementally with a single upsert per batch:
+#   - Attendance submit: +pending (calculated overtime stored on the Attendance)
+#   - Approve:           -pending, +approved
+#   - Reject:            -pending, +rejected
+#   - Attendance cancel: -pending
+# Department figures are GROUP BY department over the same rows.
+
+import frappe
+from frappe import _
+from frappe.utils import flt, get_first_day, get_last_day, getdate, now
+
+ROLLUP_FIELDS = (
+    "pending_count",
+    "pending_hours",
+    "pending_amount",
+    "approved_count",
+    "approved_hours",
+    "approved_amount",
+    "rejected_count"
+)
+
+
+def rollup_name(employee, month):
+    return f"{employee}-{month.strftime('%Y-%m')}"
+
+
+def add_rollup_delta(deltas, row, **changes):
+    """
+    Accumulate changes for the (employee, month) of an attendance row.
+
+    Args:
+        deltas: dict being accumulated for a batch
+        row: dict with employee, employee_name, department, company, attendance_date
+        changes: e.g. pending_count=-1, approved_count=1, approved_hours=2.5
+    """
+    month = get_first_day(row['attendance_date'])
+    key = (row['employee'], month)
+
+    entry = deltas.get(key)
+    if entry is None:
+        entry = deltas[key] = {
+            "employee": row['employee'],
+            "employee_name": row.get('employee_name'),
+            "department": row.get('department'),
+            "company": row.get('company'),
+            "month": month,
+            **dict.fromkeys(ROLLUP_FIELDS, 0)
+        }
+
+    for field, value in changes.items():
+        entry[field] += value
+
+
+def add_pending_delta(deltas, row, sign=1):
+    """
+    Move a row's stored calculated overtime in (+1) or out (-1) of pending
+    """
+    hours = flt(row.get('calculated_overtime_hours'))
+    if hours <= 0 or row.get('is_overtime_approved'):
+        return
+
+    add_rollup_delta(
+        deltas, row,
+        pending_count=sign,
+        pending_hours=sign * hours,
+        pending_amount=sign * flt(row.get('calculated_overtime_amount'))
+    )
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Write accumulated deltas with one multi-row upsert
+    """
+    if not deltas:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    columns = [
+        "name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "employee", "employee_name", "department", "company", "month", *ROLLUP_FIELDS
+    ]
+
+    rows = []
+    values = []
+    for entry in deltas.values():
+        rows.append("(" + ", ".join(["%s"] * len(columns)) + ")")
+        values.extend([
+            rollup_name(entry["employee"], entry["month"]), timestamp, timestamp, user, user, 0,
+            entry["employee"], entry["employee_name"], entry["department"], entry["company"], entry["month"],
+            *(entry[field] for field in ROLLUP_FIELDS)
+        ])
+
+    updates = ", ".join(f"`{field}` = `{field}` + VALUES(`{field}`)" for field in ROLLUP_FIELDS)
+
+    frappe.db.sql(f"""
+        INSERT INTO `tabOvertime Monthly Rollup` ({", ".join(f"`{c}`" for c in columns)})
+        VALUES {", ".join(rows)}
+        ON DUPLICATE KEY UPDATE
+            {updates},
+            `department` = IFNULL(VALUES(`department`), `department`),
+            `modified` = VALUES(`modified`)
+    """, values)
+
+
+# =====================================================================
+# SUMMARY ENDPOINT
+# =====================================================================
+
+@frappe.whitelist()
+def get_overtime_summary(company, from_date, to_date, department=None, employee=None):
+    """
+    Overtime totals from the rollup table (no attendance rows are read).
+    Covers every month that overlaps the date range.
+
+    Returns:
+        dict: totals plus a per-department breakdown
+    """
+    frappe.has_permission("Overtime Monthly Rollup", "read", throw=True)
+
+    conditions = ["company = %(company)s", "month BETWEEN %(from_month)s AND %(to_month)s"]
+    values = {
+        "company": company,
+        "from_month": get_first_day(from_date),
+        "to_month": get_first_day(to_date)
+    }
+    if department:
+        conditions.append("department = %(department)s")
+        values["department"] = department
+    if employee:
+        conditions.append("employee = %(employee)s")
+        values["employee"] = employee
+
+    sums = ", ".join(f"SUM({field}) AS {field}" for field in ROLLUP_FIELDS)
+    by_department = frappe.db.sql(f"""
+        SELECT IFNULL(department, '') AS department, {sums}
+        FROM `tabOvertime Monthly Rollup`
+        WHERE {" AND ".join(conditions)}
+        GROUP BY department
+        ORDER BY department
+    """, values, as_dict=True)
+
+    totals = dict.fromkeys(ROLLUP_FIELDS, 0)
+    for row in by_department:
+        for field in ROLLUP_FIELDS:
+            row[field] = flt(row[field], 2)
+            totals[field] += row[field]
+
+    totals["total_records"] = totals["pending_count"] + totals["approved_count"]
+    totals["total_hours"] = flt(totals["pending_hours"] + totals["approved_hours"], 2)
+    totals["total_amount"] = flt(totals["pending_amount"] + totals["approved_amount"], 2)
+
+    return {
+        "from_month": values["from_month"],
+        "to_month": values["to_month"],
+        "totals": totals,
+        "departments": by_department
+    }
+
+
+# =====================================================================
+# REBUILD (backfill for existing data)
+# =====================================================================
+
+@frappe.whitelist()
+def rebuild_overtime_rollups(company, from_date, to_date):
+    """
+    Recompute rollups for whole months in a range in a background job
+    """
+    frappe.only_for(["HR Manager", "System Manager"])
+
+    frappe.enqueue(
+        "vc_app.vc_overtime.overtime_rollup.rebuild_rollups_job",
+        queue="long",
+        timeout=3600,
+        company=company,
+        from_date=get_first_day(from_date),
+        to_date=to_date
+    )
+    frappe.msgprint(_("Overtime rollups are being rebuilt in the background"), alert=True)
+
+
+def rebuild_rollups_job(company, from_date, to_date):
+    """
+    Approved figures are sums over the overtime ledger. Attendance approved
+    before the ledger existed has no ledger row and is matched to its
+    overtime Additional Salary instead (per-day by employee and date,
+    consolidated by attendance line). Pending figures are recalculated and
+    stored on each remaining Attendance.
+    Rejected counts cannot be recovered and start from zero.
+    """
+    from vc_app.vc_overtime.overtime_calculator import calculate_overtime_for_attendance
+
+    from_month = get_first_day(from_date)
+    to_month = get_first_day(to_date)
+
+    frappe.db.sql("""
+        DELETE FROM `tabOvertime Monthly Rollup`
+        WHERE company = %s AND month BETWEEN %s AND %s
+    """, (company, from_month, to_month))
+
+    deltas = {}
+
+    approved = frappe.db.sql("""
+        SELECT l.attendance, l.employee, e.employee_name, e.department, l.company, l.attendance_date,
+            l.overtime_hours, l.amount, IF(l.entry_type = 'Reversal', -1, 1) AS count
+        FROM `tabOvertime Ledger Entry` l
+        INNER JOIN `tabEmployee` e ON e.name = l.employee
+        WHERE l.company = %s AND l.attendance_date >= %s AND l.attendance_date <= LAST_DAY(%s)
+    """, (company, from_month, to_month), as_dict=True)
+
+    # Reversals cancel their approval: an attendance counts when its net is positive
+    ledger_count = {}
+    for row in approved:
+        ledger_count[row.attendance] = ledger_count.get(row.attendance, 0) + row.count
+        add_rollup_delta(
+            deltas, row,
+            approved_count=row.count,
+            approved_hours=flt(row.overtime_hours),
+            approved_amount=flt(row.amount)
+        )
+
+    per_day, consolidated = get_legacy_approvals(company, from_month, get_last_day(to_month))
+
+    attendance = frappe.db.sql("""
+        SELECT name, employee, employee_name, department, company, attendance_date, in_time, out_time,
+            is_overtime_approved
+        FROM `tabAttendance`
+        WHERE docstatus = 1
+            AND status = 'Present'
+            AND out_time IS NOT NULL
+            AND company = %s
+            AND attendance_date >= %s AND attendance_date <= LAST_DAY(%s)
+    """, (company, from_month, to_month), as_dict=True)
+
+    for row in attendance:
+        if ledger_count.get(row.name, 0) > 0:
+            continue
+
+        legacy = consolidated.get(row.name) or per_day.get((row.employee, getdate(row.attendance_date)))
+        if legacy:
+            add_rollup_delta(
+                deltas, row,
+                approved_count=1,
+                approved_hours=flt(legacy.overtime_hours),
+                approved_amount=flt(legacy.amount)
+            )
+            continue
+        if row.is_overtime_approved:
+            continue
+
+        ot_calc = calculate_overtime_for_attendance(row)
+        row.calculated_overtime_hours = ot_calc['overtime_hours']
+        row.calculated_overtime_amount = ot_calc['overtime_amount']
+        frappe.db.set_value("Attendance", row.name, {
+            "calculated_overtime_hours": row.calculated_overtime_hours,
+            "calculated_overtime_amount": row.calculated_overtime_amount,
+            "overtime_type": ot_calc['overtime_type']
+        }, update_modified=False)
+        add_pending_delta(deltas, row)
+
+    apply_rollup_deltas(deltas)
+    frappe.db.commit()
+
+
+def get_legacy_approvals(company, from_date, to_date):
+    """
+    Overtime Additional Salary figures for a date range
+
+    Returns:
+        tuple: ({(employee, date): row} for per-day Additional Salaries,
+                {attendance: row} for consolidated attendance lines)
+    """
+    values = {"company": company, "from_date": getdate(from_date), "to_date": getdate(to_date)}
+
+    per_day = frappe.db.sql("""
+        SELECT employee, payroll_date, SUM(overtime_hours) AS overtime_hours, SUM(amount) AS amount
+        FROM `tabAdditional Salary`
+        WHERE is_overtime_salary = 1
+            AND IFNULL(is_consolidated_overtime, 0) = 0
+            AND docstatus < 2
+            AND company = %(company)s
+            AND payroll_date BETWEEN %(from_date)s AND %(to_date)s
+        GROUP BY employee, payroll_date
+    """, values, as_dict=True)
+
+    lines = frappe.db.sql("""
+        SELECT l.attendance, l.overtime_hours, l.amount
+        FROM `tabOvertime Attendance Line` l
+        INNER JOIN `tabAdditional Salary` s ON s.name = l.parent
+        WHERE l.parenttype = 'Additional Salary'
+            AND s.docstatus < 2
+            AND s.company = %(company)s
+            AND l.attendance_date BETWEEN %(from_date)s AND %(to_date)s
+    """, values, as_dict=True)
+
+    return (
+        {(row.employee, getdate(row.payroll_date)): row for row in per_day},
+        {row.attendance: row for row in lines}
+    )
@@ -0,0 +1,170 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_sharding.py
+# Sharded VC Overtime Report calculation across background workers
+# =====================================================================
+#
+# With HR Settings "Report Shards" > 1 the report's employees are split
+# into hash shards (MOD(CRC32(employee), shards)). Every shard but the
+# first is calculated by a "short" queue job with its own prefetched
+# context; the requesting process calculates shard 0 itself. Workers
+# store their rows in a Redis hash, and the partial results are sorted
+# together with sort_key. The partials come back in SQL collation order,
+# which Python cannot reproduce, so get_data sorts unsharded rows with
+# the same key and both paths return the same order.
+#
+# Shards whose job has not started (or has failed) when the requesting
+# process is done with its own share are taken back and calculated
+# locally, so the report completes (sequentially) even when no worker
+# is free.
+#
+# A web request waits at most REQUEST_TIMEOUT (well below the HTTP
+# worker timeout) for the shards; background runs (prepared reports)
+# wait up to SHARD_TIMEOUT.
+
+import json
+import time
+
+import frappe
+from frappe import _
+from frappe.utils import cint, getdate
+
+from vc_app.vc_overtime.overtime_codec import decode, encode
+from vc_app.vc_overtime.overtime_logger import get_logger
+
+logger = get_logger("report")
+
+SHARDS_KEY_PREFIX = "vc_overtime_report_shards"
+SHARD_TIMEOUT = 900
+REQUEST_TIMEOUT = 60
+POLL_INTERVAL = 0.2
+
+
+def get_shard_count(filters):
+    """
+    Number of shards for a report run (0 = not sharded)
+    """
+    if filters.get("employee"):
+        return 0
+    return cint(frappe.db.get_single_value("HR Settings", "overtime_report_shards"))
+
+
+def sort_key(row):
+    """Report order: attendance_date DESC, employee_name (case-insensitive), employee"""
+    return (
+        -getdate(row["attendance_date"]).toordinal(),
+        (row.get("employee_name") or "").casefold(),
+        row.get("employee") or ""
+    )
+
+
+def get_sharded_data(filters, shards, progress=None):
+    """
+    Calculate the report in `shards` employee shards and merge the rows
+    """
+    from vc_app.vc_overtime.report.vc_overtime_report.vc_overtime_report import get_rows
+
+    deadline = time.monotonic() + get_wait_timeout()
+    group = frappe.generate_hash(length=12)
+    key = f"{SHARDS_KEY_PREFIX}:{group}"
+    job_ids = {}
+
+    for shard in range(1, shards):
+        job_ids[shard] = f"{key}:{shard}"
+        frappe.enqueue(
+            "vc_app.vc_overtime.overtime_sharding.calculate_shard_job",
+            queue="short",
+            timeout=SHARD_TIMEOUT,
+            job_id=job_ids[shard],
+            filters=dict(filters),
+            shard=shard,
+            shards=shards,
+            key=key
+        )
+
+    results = {0: get_rows(filters, shard=0, shards=shards)}
+    _report_progress(progress, results, shards)
+
+    try:
+        while len(results) < shards:
+            results.update(_collect(key, results))
+
+            for shard in _unstarted(job_ids, results):
+                logger.info("Shard %s of %s calculated locally", shard, shards)
+                results[shard] = get_rows(filters, shard=shard, shards=shards)
+
+            _report_progress(progress, results, shards)
+            if len(results) < shards:
+                if time.monotonic() > deadline:
+                    frappe.throw(_(
+                        "Overtime report shards did not finish in time. Shorten the period or set "
+                        "HR Settings \"Prepare Reports Longer Than (Days)\" to build it in the background."
+                    ))
+                time.sleep(POLL_INTERVAL)
+    finally:
+        frappe.cache().delete_key(key)
+
+    return sorted((row for shard in range(shards) for row in results[shard]), key=sort_key)
+
+
+def get_wait_timeout():
+    """Seconds to wait for the shards: short inside a web request"""
+    if getattr(frappe.local, "request", None):
+        return REQUEST_TIMEOUT
+    return SHARD_TIMEOUT
+
+
+def _collect(key, results):
+    collected = {}
+    for shard, blob in (frappe.cache().hgetall(key) or {}).items():
+        shard = cint(frappe.safe_decode(shard))
+        if shard in results:
+            continue
+        payload = decode(blob)
+        if payload.get("error"):
+            frappe.throw(_("Overtime report shard {0} failed: {1}").format(shard, payload["error"]))
+        collected[shard] = payload["rows"]
+    return collected
+
+
+def _unstarted(job_ids, results):
+    """
+    Shards that no worker is calculating: still queued (the job is
+    cancelled), failed or gone
+    """
+    from frappe.utils.background_jobs import get_job
+
+    unstarted = []
+    for shard, job_id in job_ids.items():
+        if shard in results:
+            continue
+        job = get_job(job_id)
+        status = job.get_status() if job else None
+        if status == "queued":
+            job.cancel()
+        if status in (None, "queued", "failed", "stopped", "canceled"):
+            unstarted.append(shard)
+    return unstarted
+
+
+def _report_progress(progress, results, shards):
+    if progress:
+        progress(len(results), shards)
+
+
+def calculate_shard_job(filters, shard, shards, key):
+    """
+    Calculate one employee shard and store its rows under `key`
+    """
+    from vc_app.vc_overtime.report.vc_overtime_report.vc_overtime_report import get_rows
+
+    try:
+        rows = get_rows(frappe._dict(filters), shard=shard, shards=shards)
+        # Dates and datetimes become strings, as in the report response
+        payload = {"rows": json.loads(frappe.as_json(rows, indent=None))}
+    except Exception as e:
+        frappe.log_error(title="VC Overtime report shard failed")
+        payload = {"error": str(e)}
+
+    cache = frappe.cache()
+    cache.hset(key, str(shard), encode(payload))
+    cache.expire(cache.make_key(key), SHARD_TIMEOUT)
@@ -0,0 +1,142 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/overtime_sql.py
+# frappe.db.sql wrapper with slow-query capture
+# =====================================================================
+#
+# The hand-written queries of the calculator, processor and report go
+# through run_sql(). Statements slower than HR Settings "Slow Query
+# Threshold (ms)" are recorded in a rotating Redis log:
+#   - the statement shape (whitespace collapsed, literals replaced by ?;
+#     bound parameters are never stored)
+#   - duration, user and time
+#   - on the first occurrence of a shape, the EXPLAIN plan (SELECT only)
+# HR Managers read the log with get_slow_queries().
+
+import hashlib
+import json
+import re
+import time
+
+import frappe
+from frappe.utils import cint
+
+SLOW_QUERIES_KEY = "vc_overtime_slow_queries"
+SEEN_SHAPES_KEY = "vc_overtime_slow_query_shapes"
+MAX_SLOW_QUERIES = 200
+
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def get_threshold_ms():
+    threshold = getattr(frappe.local, "vc_overtime_slow_query_ms", None)
+    if threshold is None:
+        threshold = frappe.local.vc_overtime_slow_query_ms = cint(
+            frappe.db.get_single_value("HR Settings", "overtime_slow_query_ms")
+        )
+    return threshold
+
+
+def run_sql(query, values=(), **kwargs):
+    """
+    Same signature as frappe.db.sql; records the statement when slow
+    """
+    threshold = get_threshold_ms()
+    if threshold <= 0:
+        return frappe.db.sql(query, values, **kwargs)
+
+    started = time.perf_counter()
+    result = frappe.db.sql(query, values, **kwargs)
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    if duration_ms >= threshold:
+        try:
+            record_slow_query(query, values, duration_ms)
+        except Exception:
+            frappe.log_error(title="VC Overtime slow query capture failed")
+
+    return result
+
+
+def statement_shape(query):
+    """
+    Statement with whitespace collapsed and literal values redacted
+    """
+    return _WHITESPACE.sub(" ", _LITERALS.sub("?", str(query))).strip()
+
+
+def record_slow_query(query, values, duration_ms):
+    shape = statement_shape(query)
+    fingerprint = hashlib.md5(shape.encode()).hexdigest()[:12]
+
+    cache = frappe.cache()
+    occurrences = cache.hincrby(cache.make_key(SEEN_SHAPES_KEY), fingerprint, 1)
+
+    entry = {
+        "fingerprint": fingerprint,
+        "shape": shape,
+        "duration_ms": round(duration_ms, 1),
+        "occurrence": occurrences,
+        "user": frappe.session.user,
+        "timestamp": frappe.utils.now()
+    }
+    if occurrences == 1:
+        entry["explain"] = explain(query, values)
+
+    cache.lpush(SLOW_QUERIES_KEY, frappe.as_json(entry, indent=None))
+    cache.ltrim(SLOW_QUERIES_KEY, 0, MAX_SLOW_QUERIES - 1)
+
+
+def explain(query, values):
+    """
+    EXPLAIN plan rows for a SELECT (other statements are not explained)
+    """
+    if not str(query).lstrip().upper().startswith("SELECT"):
+        return None
+    try:
+        return frappe.db.sql(f"EXPLAIN {query}", values, as_dict=True)
+    except Exception as e:
+        return [{"error": str(e)}]
+
+
+@frappe.whitelist()
+def get_slow_queries(limit=50):
+    """
+    Recent slow overtime queries, newest first
+
+    Returns:
+        dict: threshold, entries and per-shape occurrence counts
+    """
+    frappe.only_for(["HR Manager", "System Manager"])
+
+    limit = min(cint(limit) or 50, MAX_SLOW_QUERIES)
+    cache = frappe.cache()
+    entries = [json.loads(frappe.safe_decode(e)) for e in cache.lrange(SLOW_QUERIES_KEY, 0, limit - 1)]
+
+    # The EXPLAIN is only captured on the first occurrence of a shape
+    plans = {}
+    for entry in cache.lrange(SLOW_QUERIES_KEY, 0, MAX_SLOW_QUERIES - 1):
+        entry = json.loads(frappe.safe_decode(entry))
+        if entry.get("explain") is not None:
+            plans.setdefault(entry["fingerprint"], entry["explain"])
+
+    counts = {
+        frappe.safe_decode(fingerprint): cint(count)
+        for fingerprint, count in cache.hscan_iter(cache.make_key(SEEN_SHAPES_KEY))
+    }
+
+    return {
+        "threshold_ms": get_threshold_ms(),
+        "entries": entries,
+        "plans": plans,
+        "occurrences": counts
+    }
+
+
+@frappe.whitelist()
+def clear_slow_queries():
+    frappe.only_for(["HR Manager", "System Manager"])
+    cache = frappe.cache()
+    cache.delete_key(SLOW_QUERIES_KEY)
+    cache.delete(cache.make_key(SEEN_SHAPES_KEY))
+    return {"success": True}
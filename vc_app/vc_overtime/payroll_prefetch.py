@@ -0,0 +1,85 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/payroll_prefetch.py
+# Payroll-period overtime totals, fetched once per payroll run
+# =====================================================================
+#
+# A Payroll Entry fires Salary Slip before_save once per employee.
+# Instead of every slip folding its own overtime rows, the overtime
+# Additional Salaries of the whole period are grouped per
+# (employee, component) in a single query and kept in frappe.local, so
+# every slip built in the same request or job (HRMS creates and submits
+# the slips of a large payroll in one background job) shares the map.
+# Submitting or cancelling an overtime Additional Salary drops it.
+
+import frappe
+from frappe.utils import flt, getdate
+
+from vc_app.vc_overtime.overtime_logger import get_logger
+
+logger = get_logger("salary_slip")
+
+
+def _period_key(company, start_date, end_date):
+    return f"{company}|{getdate(start_date)}|{getdate(end_date)}"
+
+
+def _get_store():
+    store = getattr(frappe.local, "vc_overtime_payroll_prefetch", None)
+    if store is None:
+        store = frappe.local.vc_overtime_payroll_prefetch = {}
+    return store
+
+
+def prefetch_payroll_overtime(company, start_date, end_date):
+    """
+    Load overtime totals for a payroll period in one grouped query.
+
+    Returns:
+        dict: {employee: {salary_component: {"amount": float, "additional_salaries": [names]}}}
+    """
+    rows = frappe.db.sql("""
+        SELECT
+            employee,
+            salary_component,
+            SUM(amount) AS amount,
+            GROUP_CONCAT(name ORDER BY payroll_date, name SEPARATOR ',') AS names
+        FROM `tabAdditional Salary`
+        WHERE is_overtime_salary = 1
+            AND docstatus = 1
+            AND company = %s
+            AND payroll_date BETWEEN %s AND %s
+        GROUP BY employee, salary_component
+    """, (company, getdate(start_date), getdate(end_date)), as_dict=True)
+
+    totals = {}
+    for row in rows:
+        totals.setdefault(row.employee, {})[row.salary_component] = {
+            "amount": flt(row.amount, 2),
+            "additional_salaries": row.names.split(",") if row.names else []
+        }
+
+    _get_store()[_period_key(company, start_date, end_date)] = totals
+    logger.info(
+        "Prefetched overtime for %s employees (%s to %s)", len(totals), start_date, end_date
+    )
+    return totals
+
+
+def get_payroll_overtime(company, start_date, end_date):
+    """
+    Overtime totals for a payroll period, loaded on first use in this
+    request/job and shared by every slip after that.
+    """
+    totals = _get_store().get(_period_key(company, start_date, end_date))
+    if totals is None:
+        totals = prefetch_payroll_overtime(company, start_date, end_date)
+    return totals
+
+
+def clear_payroll_overtime(doc=None, method=None):
+    """
+    Additional Salary on_submit / on_cancel hook (overtime only)
+    """
+    if doc and not doc.get("is_overtime_salary"):
+        return
+    frappe.local.vc_overtime_payroll_prefetch = {}
@@ -104,8 +104,46 @@ frappe.query_reports["VC Overtime Report"] = {
         }, __("View"));
 
         report.page.add_inner_button(__("Refresh Data"), function() {
-            report.refresh();
+            // Reloads the rows in the compact columnar format when a table is shown
+            if (report.datatable && report.data) {
+                load_columnar_data(report);
+            } else {
+                report.refresh();
+            }
         }, __("View"));
+
+        // Streaming export for long periods (built in a background job)
+        report.page.add_inner_button(__("CSV (Large Periods)"), function() {
+            export_overtime(report, "csv");
+        }, __("Export"));
+
+        report.page.add_inner_button(__("Excel (Large Periods)"), function() {
+            export_overtime(report, "xlsx");
+        }, __("Export"));
+
+        // Long ranges are prepared in a background job (progress is shown by
+        // the job); reload once the result is stored
+        frappe.realtime.off("vc_overtime_report_prepared");
+        frappe.realtime.on("vc_overtime_report_prepared", function() {
+            if (frappe.query_report && frappe.query_report.report_name === "VC Overtime Report") {
+                frappe.query_report.refresh();
+            }
+        });
+
+        frappe.realtime.off("vc_overtime_export_ready");
+        frappe.realtime.on("vc_overtime_export_ready", function(data) {
+            if (data.error) {
+                frappe.msgprint({ title: __("Export Failed"), message: data.error, indicator: "red" });
+                return;
+            }
+            frappe.msgprint({
+                title: __("Export Ready"),
+                message: __("{0} rows exported. <a href='{1}' target='_blank'>Download</a>",
+                    [data.rows, encodeURI(data.file_url)]),
+                indicator: "green"
+            });
+        });
+
         setTimeout(async () => {
             const edits = await OvertimeEditCache.getAll();
             const count = Object.keys(edits).length;
@@ -475,7 +513,7 @@ function show_approval_dialog(report, checked_data) {
                         }
                         report.checked_items = [];
                         report.edited_values = {};
-                        report.refresh();
+                        refresh_changed_rows(report, attendance_data.map(row => row.attendance));
                         d.hide();
                     }
                 }
@@ -524,7 +562,7 @@ function show_rejection_dialog(report, checked_data) {
                         }, 5);
                         report.checked_items = [];
                         report.edited_values = {};
-                        report.refresh();
+                        refresh_changed_rows(report, attendance_data.map(row => row.attendance));
                         d.hide();
                     }
                 }
@@ -536,6 +574,109 @@ function show_rejection_dialog(report, checked_data) {
     d.show();
 }
 
+// =====================================================================
+// DELTA REFRESH
+// =====================================================================
+
+function refresh_changed_rows(report, attendance_ids) {
+    // Only the processed rows are recalculated on the server and patched
+    // into the datatable; the rest of the report is left as it is
+    frappe.call({
+        method: "vc_app.vc_overtime.report.vc_overtime_report.vc_overtime_report.get_changed_rows",
+        args: { attendance_list: attendance_ids, columnar: 1 },
+        callback: function(r) {
+            if (!r.message || !report.datatable) {
+                report.refresh();
+                return;
+            }
+            patch_report_rows(report, decode_columnar(r.message.rows), r.message.removed);
+        }
+    });
+}
+
+function patch_report_rows(report, rows, removed) {
+    const index_of = {};
+    report.data.forEach((row, index) => {
+        index_of[row.attendance] = index;
+    });
+
+    rows.forEach(row => {
+        const index = index_of[row.attendance];
+        if (index === undefined) return;
+
+        Object.assign(report.data[index], row);
+        report.datatable.refreshRow(
+            report.columns.map(col => report.data[index][col.fieldname]),
+            index
+        );
+    });
+
+    // Rows without overtime any more are dropped (re-renders from report.data)
+    if (removed.length) {
+        const gone = new Set(removed);
+        report.data = report.data.filter(row => !gone.has(row.attendance));
+        report.datatable.refresh(report.data, report.columns);
+    }
+
+    report.datatable.rowmanager.checkAll(false);
+    enable_manual_cell_editing(report);
+    update_report_totals(report);
+}
+
+// =====================================================================
+// COLUMNAR PAYLOAD
+// =====================================================================
+
+function decode_columnar(payload) {
+    // { length, columns: [field], values: [column], derived: [field] }
+    // A column is a plain array or { d: dictionary, i: indexes }
+    const columns = payload.values.map(column =>
+        Array.isArray(column) ? column : column.i.map(index => column.d[index])
+    );
+    const round2 = value => Math.round(value * 100) / 100;
+
+    const rows = new Array(payload.length);
+    for (let r = 0; r < payload.length; r++) {
+        const row = {};
+        payload.columns.forEach((field, c) => {
+            row[field] = columns[c][r];
+        });
+
+        // Derived columns, as calculated in calculate_rows()
+        row.select_row = 0;
+        row.ot_rate = round2(row.hourly_rate * row.overtime_multiplier);
+        row.approved_overtime_hours = row.overtime_hours;
+        row.approved_overtime_amount = round2(
+            row.approved_overtime_hours * row.hourly_rate * row.overtime_multiplier
+        );
+        rows[r] = row;
+    }
+    return rows;
+}
+
+function load_columnar_data(report) {
+    frappe.call({
+        method: "vc_app.vc_overtime.report.vc_overtime_report.vc_overtime_report.get_columnar_data",
+        args: { filters: report.get_values() || {} },
+        freeze: true,
+        freeze_message: __("Loading..."),
+        callback: function(r) {
+            if (!r.message) return;
+
+            report.data = decode_columnar(r.message.data);
+            report.datatable.refresh(report.data, report.columns);
+            // e.g. a long range still being prepared in the background
+            if (!report.data.length && r.message.message) {
+                frappe.show_alert({ message: r.message.message, indicator: "blue" }, 5);
+            }
+
+            enable_manual_cell_editing(report);
+            update_report_totals(report);
+            applyStoredEdits();
+        }
+    });
+}
+
 // =====================================================================
 // SUMMARY GENERATORS
 // =====================================================================
@@ -637,34 +778,79 @@ function get_rejection_warning(checked_data) {
         </div>`;
 }
 
+// =====================================================================
+// STREAMING EXPORT
+// =====================================================================
+
+function export_overtime(report, file_format) {
+    // The file is written by a background job; the download link arrives
+    // over realtime (vc_overtime_export_ready)
+    frappe.call({
+        method: "vc_app.vc_overtime.overtime_export.export_overtime",
+        args: {
+            filters: report.get_values() || {},
+            file_format: file_format
+        }
+    });
+}
+
 // =====================================================================
 // SUMMARY DIALOG
 // =====================================================================
 
 function show_overtime_summary(report) {
-    let data = report.data || [];
-    let total_hours = 0;
-    let total_amount = 0;
-    let pending = 0;
-    let approved = 0;
-    
-    data.forEach(row => {
-        total_hours += parseFloat(row.overtime_hours) || 0;
-        total_amount += parseFloat(row.overtime_amount) || 0;
-        if (row.status == "Approved & Paid") approved++;
-        else if (row.status == "Pending Review") pending++;
-    });
+    // Totals come from the server-side monthly rollups - no rows are loaded
+    const filters = report.get_values() || {};
     
-    frappe.msgprint({
-        title: __("Overtime Summary"),
-        message: `
-            <b>Total Records:</b> ${data.length}<br>
-            <b>Total Hours:</b> ${total_hours.toFixed(2)}<br>
-            <b>Total Amount:</b> KES ${total_amount.toLocaleString('en-KE', {minimumFractionDigits: 2})}<br>
-            <b>Pending:</b> ${pending}<br>
-            <b>Approved:</b> ${approved}
-        `,
-        indicator: "blue"
+    frappe.call({
+        method: "vc_app.vc_overtime.overtime_rollup.get_overtime_summary",
+        args: {
+            company: filters.company,
+            from_date: filters.from_date,
+            to_date: filters.to_date,
+            department: filters.department,
+            employee: filters.employee
+        },
+        callback: function(r) {
+            if (!r.message) return;
+            
+            const totals = r.message.totals;
+            const fmt = value => (parseFloat(value) || 0).toLocaleString('en-KE', {minimumFractionDigits: 2});
+            
+            let departments = "";
+            if (r.message.departments.length > 1) {
+                departments = `
+                    <hr>
+                    <table class="table table-bordered" style="margin: 0;">
+                        <tr><th>${__("Department")}</th><th>${__("Pending")}</th><th>${__("Approved")}</th><th>${__("Amount")}</th></tr>
+                        ${r.message.departments.map(d => `
+                            <tr>
+                                <td>${frappe.utils.escape_html(d.department || __("Not Set"))}</td>
+                                <td>${d.pending_count}</td>
+                                <td>${d.approved_count}</td>
+                                <td>KES ${fmt(d.pending_amount + d.approved_amount)}</td>
+                            </tr>`).join("")}
+                    </table>`;
+            }
+            
+            frappe.msgprint({
+                title: __("Overtime Summary"),
+                message: `
+                    <b>Total Records:</b> ${totals.total_records}<br>
+                    <b>Total Hours:</b> ${totals.total_hours.toFixed(2)}<br>
+                    <b>Total Amount:</b> KES ${fmt(totals.total_amount)}<br>
+                    <b>Pending:</b> ${totals.pending_count}<br>
+                    <b>Approved:</b> ${totals.approved_count}<br>
+                    <b>Rejected:</b> ${totals.rejected_count}<br>
+                    <small class="text-muted">${__("Whole months {0} to {1}", [
+                        frappe.datetime.str_to_user(r.message.from_month),
+                        frappe.datetime.str_to_user(r.message.to_month)
+                    ])}</small>
+                    ${departments}
+                `,
+                indicator: "blue"
+            });
+        }
     });
 }
 
@@ -1044,4 +1230,4 @@ console.log("  - Double-click a cell to edit");
 console.log("  - OvertimeEditCache.getAll() - view all edits");
 console.log("  - OvertimeEditCache.info() - cache statistics");
 console.log("  - OvertimeEditCache.clearAll() - clear all edits");
-console.log("\n⏱️ Edits expire after 24 hours");
\ No newline at end of file
+console.log("\n⏱️ Each edit expires 24 hours after it was last saved (HR Settings > Overtime Edit Cache)");
\ No newline at end of file
@@ -1,11 +1,41 @@
 import frappe
 from frappe import _
-from frappe.utils import flt, getdate
+from frappe.utils import cint, flt, getdate
+
 from vc_app.vc_overtime.overtime_calculator import calculate_overtime_for_attendance
+from vc_app.vc_overtime.overtime_codec import encode_columns
+from vc_app.vc_overtime.overtime_context import overtime_context
+from vc_app.vc_overtime.overtime_instrumentation import (
+    get_last_profile,
+    instrumented,
+    is_enabled,
+    render_profile,
+)
+from vc_app.vc_overtime.overtime_metrics import inc, timed
+from vc_app.vc_overtime.overtime_prepared import get_prepared_data, should_prepare
+from vc_app.vc_overtime.overtime_processor import get_approved_overtime
+from vc_app.vc_overtime.overtime_sharding import get_shard_count, get_sharded_data, sort_key
+from vc_app.vc_overtime.overtime_sql import run_sql
+
+PROGRESS_CHUNK_SIZE = 500
+
+# Recomputed by the client from the other columns in the columnar payload
+DERIVED_FIELDS = ("select_row", "ot_rate", "approved_overtime_hours", "approved_overtime_amount")
 
 def execute(filters=None):
     columns = get_columns()
+
+    # Long ranges are built by a background job and reused until the data changes
+    if should_prepare(filters):
+        data, message = get_prepared_data(filters)
+        return columns, data, message
+
     data = get_data(filters)
+
+    # Query/latency breakdown when profiling is enabled in HR Settings
+    if is_enabled():
+        return columns, data, render_profile(get_last_profile())
+
     return columns, data
 
 def get_columns():
@@ -114,17 +144,117 @@ def get_columns():
         }
     ]
 
-def get_data(filters):
+@instrumented("report_get_data")
+@timed("vc_overtime_report_build_seconds")
+def get_data(filters, progress=None):
     """
     Get attendance data and calculate overtime dynamically.
+    progress(done, total) is called after each chunk when given.
     """
     if not filters:
         filters = {}
     
+    # Optionally split by employee across background workers
+    shards = get_shard_count(filters)
+    if shards > 1:
+        return get_sharded_data(filters, shards, progress)
+
+    # Same Python order as the sharded merge (not the SQL collation's)
+    return sorted(get_rows(filters, progress=progress), key=sort_key)
+
+def get_rows(filters, shard=None, shards=None, progress=None):
+    """
+    Calculated rows with overtime; limited to one employee hash shard
+    when `shard` of `shards` is given.
+    """
     conditions = get_conditions(filters)
+    values = filters
+    if shards:
+        conditions += " AND MOD(CRC32(a.employee), %(shard_count)s) = %(shard)s"
+        values = dict(filters, shard_count=shards, shard=shard)
     
     # Get attendance records
-    data = frappe.db.sql(f"""
+    data = run_sql(get_attendance_query(conditions), values, as_dict=1)
+
+    inc("vc_overtime_report_rows_scanned_total", len(data))
+
+    if not data:
+        return data
+
+    from_date = min(row.attendance_date for row in data)
+    to_date = max(row.attendance_date for row in data)
+
+    # Approved overtime for the whole range (per-day and consolidated)
+    approved_days, approved_attendance = get_approved_overtime(
+        from_date, to_date, filters.get("company")
+    )
+
+    # Shifts, rates and holidays for every row, loaded once
+    with overtime_context(
+        [row.employee for row in data],
+        [row.company for row in data],
+        from_date,
+        to_date
+    ):
+        if progress:
+            for start in range(0, len(data), PROGRESS_CHUNK_SIZE):
+                calculate_rows(data[start:start + PROGRESS_CHUNK_SIZE], approved_days, approved_attendance)
+                progress(min(start + PROGRESS_CHUNK_SIZE, len(data)), len(data))
+        else:
+            calculate_rows(data, approved_days, approved_attendance)
+
+    # Filter out records with no overtime
+    data = [d for d in data if d.get('overtime_hours', 0) > 0]
+    inc("vc_overtime_report_rows_returned_total", len(data))
+
+    return data
+
+@frappe.whitelist()
+def get_columnar_data(filters):
+    """
+    Report rows as a columnar payload (see overtime_codec.encode_columns):
+    field names once, employee names/departments/types/status
+    dictionary-encoded and derived columns left to the client.
+    """
+    frappe.only_for(["HR Manager", "HR User", "System Manager"])
+
+    result = execute(frappe._dict(frappe.parse_json(filters) or {}))
+    return {
+        "data": encode_columnar(result[1]),
+        "message": result[2] if len(result) > 2 else None
+    }
+
+def encode_columnar(rows):
+    fields = [c["fieldname"] for c in get_columns()] + ["overtime_multiplier", "department", "company"]
+    return encode_columns(rows, fields, derived=DERIVED_FIELDS)
+
+@frappe.whitelist()
+def get_changed_rows(attendance_list, columnar=0):
+    """
+    Recalculate only the given attendance rows (after approve/reject) so
+    the client can patch them into the datatable instead of refreshing.
+
+    Returns:
+        dict: rows (still with overtime; columnar when `columnar` is set)
+              and removed (attendance no longer in the report)
+    """
+    frappe.only_for(["HR Manager", "HR User", "System Manager"])
+
+    attendance_list = frappe.parse_json(attendance_list) or []
+    if not attendance_list:
+        return {"rows": [], "removed": []}
+
+    rows = get_rows(frappe._dict(attendance=tuple(attendance_list)))
+    found = {row.attendance for row in rows}
+
+    return {
+        "rows": encode_columnar(rows) if cint(columnar) else rows,
+        "removed": [name for name in attendance_list if name not in found]
+    }
+
+def get_attendance_query(conditions, order_by="a.attendance_date DESC, e.employee_name"):
+    """Attendance rows the report calculates overtime for"""
+    return f"""
         SELECT 
             a.name as attendance,
             a.employee,
@@ -141,9 +271,11 @@ def get_data(filters):
             AND a.status = 'Present'
             AND a.out_time IS NOT NULL
             {conditions}
-        ORDER BY a.attendance_date DESC, e.employee_name
-    """, filters, as_dict=1)
-    
+        ORDER BY {order_by}
+    """
+
+def calculate_rows(data, approved_days, approved_attendance):
+    """Calculate overtime and status for each row (in place)"""
     # Calculate overtime for each row dynamically
     for row in data:
         # Add checkbox field (unchecked by default)
@@ -170,24 +302,17 @@ def get_data(filters):
         )
         
         # Check if already processed (Additional Salary exists)
-        additional_salary = frappe.db.exists("Additional Salary", {
-            "employee": row['employee'],
-            "payroll_date": row['attendance_date'],
-            "is_overtime_salary": 1,
-            "docstatus": ["<", 2]
-        })
+        is_approved = (
+            (row['employee'], getdate(row['attendance_date'])) in approved_days
+            or row['attendance'] in approved_attendance
+        )
         
-        if additional_salary:
+        if is_approved:
             row['status'] = "Approved & Paid"
         elif ot_calc['overtime_hours'] > 0:
             row['status'] = "Pending Review"
         else:
             row['status'] = "No Overtime"
-    
-    # Filter out records with no overtime
-    data = [d for d in data if d.get('overtime_hours', 0) > 0]
-    
-    return data
 
 def get_conditions(filters):
     """Build SQL WHERE conditions from filters"""
@@ -208,6 +333,9 @@ def get_conditions(filters):
     if filters.get("company"):
         conditions.append("AND a.company = %(company)s")
     
+    if filters.get("attendance"):
+        conditions.append("AND a.name IN %(attendance)s")
+
     if filters.get("eligible_for_overtime") == "Yes":
         conditions.append("AND e.eligible_for_overtime = 1")
     elif filters.get("eligible_for_overtime") == "No":
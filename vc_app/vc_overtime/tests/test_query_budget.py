@@ -0,0 +1,189 @@
+# =====================================================================
+# FILE: vc_app/vc_overtime/tests/test_query_budget.py
+# Database round-trip budgets for the report and approval paths
+# =====================================================================
+#
+# Run:
+#   bench --site <test-site> run-tests --module vc_app.vc_overtime.tests.test_query_budget
+#
+# Queries are counted by wrapping frappe.db.sql while the real entry
+# points run against the synthetic BENCH- dataset. The report must
+# issue the same number of queries whatever the number of rows; an
+# approval chunk may only grow, per row, by the queries of the
+# Additional Salary insert + submit (measured in the same run) and the
+# approval's own lookups.
+# The overtime salary components and HR Settings the paths read are set
+# up by the test and restored afterwards.
+
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days
+
+from vc_app.install import create_salary_components
+from vc_app.vc_overtime.benchmarks.data import delete_benchmark_data, generate_benchmark_data
+from vc_app.vc_overtime.overtime_processor import process_selected_overtime
+from vc_app.vc_overtime.report.vc_overtime_report.vc_overtime_report import execute
+
+EMPLOYEES = 15
+DAYS = 20
+
+# Report: base query, approved overtime lookups, prefetched context and
+# settings - none of them per row
+REPORT_QUERY_BUDGET = 25
+
+# Approval, per row besides the Additional Salary insert + submit:
+# attendance fetch, eligibility, duplicate per-day and consolidated
+# checks, component setting and existence, consolidation setting and the
+# attendance update. Ledger and rollup writes happen once per chunk.
+APPROVAL_LOOKUPS_PER_ROW = 8
+APPROVAL_QUERIES_PER_CHUNK = 20
+APPROVAL_MARGIN = 5
+
+# Per-day Additional Salaries on the installed components, report
+# calculated in the request
+TEST_SETTINGS = {
+    "weekday_overtime_component": "Overtime Pay - Weekday",
+    "holiday_overtime_component": "Overtime Pay - Holiday",
+    "consolidate_overtime_additional_salary": 0,
+    "enable_overtime_instrumentation": 0,
+    "overtime_prepared_report_days": 0,
+    "overtime_report_shards": 0
+}
+
+
+class count_queries:
+    """
+    with count_queries() as counter:
+        ...
+    counter.count, counter.statements
+    """
+
+    def __enter__(self):
+        self.statements = []
+        db = frappe.local.db
+        original = db.sql
+
+        def sql(query, *args, **kwargs):
+            self.statements.append(str(query))
+            return original(query, *args, **kwargs)
+
+        self._patch = patch.object(db, "sql", side_effect=sql)
+        self._patch.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._patch.stop()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+class TestQueryBudget(FrappeTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        create_salary_components()
+        cls.saved_settings = {
+            field: frappe.db.get_single_value("HR Settings", field) for field in TEST_SETTINGS
+        }
+        for field, value in TEST_SETTINGS.items():
+            frappe.db.set_single_value("HR Settings", field, value)
+        frappe.local.vc_overtime_instrumentation = None
+
+        delete_benchmark_data()
+        cls.dataset = generate_benchmark_data(employees=EMPLOYEES, days=DAYS, seed=7)
+
+    @classmethod
+    def tearDownClass(cls):
+        delete_benchmark_data()
+        for field, value in cls.saved_settings.items():
+            frappe.db.set_single_value("HR Settings", field, value)
+        frappe.db.commit()
+        super().tearDownClass()
+
+    def setUp(self):
+        frappe.local.vc_overtime_context = None
+        frappe.flags.mute_messages = True
+
+    def tearDown(self):
+        frappe.flags.mute_messages = False
+
+    def report_filters(self, days):
+        return frappe._dict(
+            company=self.dataset["company"],
+            from_date=self.dataset["from_date"],
+            to_date=add_days(self.dataset["from_date"], days - 1)
+        )
+
+    def run_report(self, days):
+        filters = self.report_filters(days)
+        execute(filters)  # warm Redis caches (shift windows, policy tables)
+
+        with count_queries() as counter:
+            data = execute(filters)[1]
+        return counter, data
+
+    def test_report_queries_independent_of_rows(self):
+        small, small_data = self.run_report(days=3)
+        large, large_data = self.run_report(days=DAYS)
+
+        self.assertGreater(len(large_data), len(small_data))
+        self.assertEqual(small.count, large.count, "report queries grow with the number of rows")
+        self.assertLessEqual(large.count, REPORT_QUERY_BUDGET)
+
+    def test_report_has_no_per_row_approval_lookup(self):
+        counter, data = self.run_report(days=DAYS)
+
+        additional_salary_queries = [q for q in counter.statements if "Additional Salary" in q]
+        self.assertTrue(data)
+        self.assertLessEqual(len(additional_salary_queries), 2)
+
+    def approve(self, rows):
+        """
+        Returns:
+            tuple: (queries of the chunk, queries of each Additional Salary
+                    insert + submit)
+        """
+        counter = count_queries()
+        document_queries = []
+
+        @contextmanager
+        def measure(*args, **kwargs):
+            # approve_overtime times the insert and the submit separately
+            start = counter.count
+            yield
+            document_queries.append(counter.count - start)
+
+        with counter, patch("vc_app.vc_overtime.overtime_processor.timer", measure):
+            result = process_selected_overtime([{
+                "attendance": row["attendance"],
+                "approved_overtime_hours": row["approved_overtime_hours"],
+                "has_custom_hours": False
+            } for row in rows], action="approve")
+
+        self.assertFalse(result["errors"], result["errors"])
+        self.assertEqual(result["approved"], len(rows))
+        self.assertEqual(len(document_queries), 2 * len(rows))
+        inserts, submits = document_queries[::2], document_queries[1::2]
+        return counter.count, [insert + submit for insert, submit in zip(inserts, submits, strict=True)]
+
+    def test_approval_budget_per_chunk(self):
+        data = execute(self.report_filters(DAYS))[1]
+        pending = [
+            row for row in data
+            if row["is_eligible"] and row["status"] == "Pending Review"
+        ]
+        self.assertGreaterEqual(len(pending), 15)
+
+        small, small_documents = self.approve(pending[:5])
+        large, large_documents = self.approve(pending[5:15])
+
+        per_row = max(small_documents + large_documents) + APPROVAL_LOOKUPS_PER_ROW
+        self.assertLessEqual(small, APPROVAL_QUERIES_PER_CHUNK + 5 * per_row)
+        self.assertLessEqual(large, APPROVAL_QUERIES_PER_CHUNK + 10 * per_row)
+        # The 5 extra rows cost their documents and lookups, nothing per chunk
+        self.assertLessEqual(large - small, 5 * per_row + APPROVAL_MARGIN)